@@ -0,0 +1,88 @@
+"""Asyncio API class for Business Verification services."""
+
+from typing import Any, Dict, Optional, Union
+
+from smile_id_core.AsyncUtilities import AsyncUtilities
+from smile_id_core.base import AsyncBase
+from smile_id_core.constants import JobType
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import SignatureProvider
+from smile_id_core.transport import AsyncTransport
+from smile_id_core.Utilities import Utilities
+
+__all__ = ["AsyncBusinessVerification"]
+
+
+class AsyncBusinessVerification(AsyncBase):
+    """Asyncio version of BusinessVerification for KYB Services."""
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        async_transport: Optional[AsyncTransport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+    ):
+        """Initialize all relevant params required for business verification.
+
+        argument(s):
+            partner_id: distinct identification number for a partner
+            api_key(str): api_key obtained from the partner portal
+            sid_server(str or int): specifies production or sandbox
+            async_transport: pooled async HTTP transport
+            signature_provider: source of request signatures
+        """
+        super().__init__(
+            partner_id, api_key, sid_server, async_transport, signature_provider
+        )
+        self.utilities = AsyncUtilities(
+            partner_id,
+            api_key,
+            sid_server,
+            self.async_transport,
+            self.signature_provider,
+        )
+
+    async def submit_job(
+        self,
+        partner_params: Dict[str, Any],
+        id_params: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """Generate signature, creates payload and get response for KYB jobs.
+
+        argument(s):
+        partner_params: Dict containing all partner params (job_id, user_id,
+            job_type)
+        id_params: Dict containaing id info params such as country,
+            business_type, id_number and id_type
+
+        Returns:
+            Dict[str, Any] which contains response to the HTTP post request.
+        """
+        Utilities.validate_partner_params(partner_params)
+
+        if not id_params:
+            raise ValueError(
+                "Please ensure that you send through ID Information"
+            )
+
+        if partner_params.get("job_type") != JobType.BUSINESS_VERIFICATION:
+            raise ValueError("Job type must be 7 for kyb")
+
+        payload = self.utilities.configure_json(
+            partner_params=partner_params,
+            id_params=id_params,
+            signature=self.signature_provider.get_signature(),
+        )
+        url = f"{self.url}/business_verification"
+        response = await self.utilities.execute_post(url, payload)
+
+        body = self.async_transport.codec.decode(response)
+        if response.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {self.url}/business_verification,"
+                f" status={response.status_code}, response={body}",
+                status_code=response.status_code,
+            )
+        return dict(body)
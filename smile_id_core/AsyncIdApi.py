@@ -0,0 +1,100 @@
+"""Asyncio ID API class for kyc services."""
+
+from typing import Any, Dict, Optional, Union
+
+from smile_id_core.AsyncBusinessVerification import AsyncBusinessVerification
+from smile_id_core.AsyncUtilities import AsyncUtilities
+from smile_id_core.base import AsyncBase
+from smile_id_core.constants import JobType
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import SignatureProvider
+from smile_id_core.transport import AsyncTransport
+from smile_id_core.types import OptionsParams
+from smile_id_core.Utilities import Utilities
+
+__all__ = ["AsyncIdApi"]
+
+
+class AsyncIdApi(AsyncBase):
+    """Asyncio version of IdApi for KYC Services."""
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        async_transport: Optional[AsyncTransport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+    ):
+        """Initialize all relevant params required for KYC jobs.
+
+        argument(s):
+        partner_id: Distinct Smile partner id from the portal
+        api_key: API key to access the portal
+        sid_server: The server to use for the SID API. 0 for staging
+        and 1 for production.
+        async_transport: pooled async HTTP transport
+        signature_provider: source of request signatures
+        """
+        super().__init__(
+            partner_id, api_key, sid_server, async_transport, signature_provider
+        )
+        self.utilities = AsyncUtilities(
+            partner_id,
+            api_key,
+            sid_server,
+            self.async_transport,
+            self.signature_provider,
+        )
+
+    async def submit_job(
+        self,
+        partner_params: Dict[str, Any],
+        id_params: Dict[str, str],
+        options_params: Optional[OptionsParams] = None,
+    ) -> Dict[str, Any]:
+        """Validate data params & query id_verification endpoint for KYC jobs.
+
+        argument(s):
+        partner_params: Dictionary containing all partner params
+        id_params: Dictionary containing id info params
+        option_params: Dictionary containing optional info params
+
+        Returns: the id_verification response of type Dict[str, Any].
+        Alternatively, raises a server or value error.
+        """
+        Utilities.validate_partner_params(partner_params)
+        if not id_params:
+            raise ValueError(
+                "Please ensure that you send through ID Information"
+            )
+
+        if partner_params.get("job_type") == JobType.BUSINESS_VERIFICATION:
+            return await AsyncBusinessVerification(
+                self.partner_id,
+                self.api_key,
+                self.url,
+                self.async_transport,
+                self.signature_provider,
+            ).submit_job(partner_params, id_params)
+
+        Utilities.validate_id_params(self.url, id_params, partner_params)
+
+        if partner_params.get("job_type") != JobType.ENHANCED_KYC:
+            raise ValueError("Job type must be 5 for ID Api")
+
+        payload = self.utilities.configure_json(
+            partner_params,
+            id_params,
+            self.signature_provider.get_signature(),
+        )
+        url = f"{self.url}/id_verification"
+        response = await self.utilities.execute_post(url, payload)
+        body = self.async_transport.codec.decode(response)
+        if response.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {url},"
+                f" status={response.status_code}, response={body}",
+                status_code=response.status_code,
+            )
+        return dict(body)
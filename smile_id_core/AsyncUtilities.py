@@ -0,0 +1,206 @@
+"""AsyncUtilities Class allows to query job status from asyncio code."""
+
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+from smile_id_core.base import AsyncBase
+from smile_id_core.cache import JobStatusCache
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.singleflight import AsyncSingleFlight
+from smile_id_core.transport import AsyncTransport
+from smile_id_core.types import OptionsParams, SignatureParams
+from smile_id_core.Utilities import Utilities, validate_signature_params
+
+if TYPE_CHECKING:
+    import httpx
+
+__all__ = ["AsyncUtilities"]
+
+
+class AsyncUtilities(AsyncBase):
+    """Query information on submitted job status without blocking."""
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[int, str],
+        async_transport: Optional[AsyncTransport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        job_status_cache: Optional[JobStatusCache] = None,
+    ):
+        """Initialize all relevant params required for AsyncUtilities methods.
+
+        argument(s):
+            partner_id: distinct identification number for a partner
+            api_key(str): api_key obtained from the partner portal
+            sid_server(str or int): specifies production or sandbox
+            async_transport: pooled async HTTP transport
+            signature_provider: source of request signatures
+            job_status_cache: cache of verified job statuses consulted
+                before querying a job
+        """
+        super().__init__(
+            partner_id, api_key, sid_server, async_transport, signature_provider
+        )
+        self._utilities = Utilities(
+            partner_id,
+            api_key,
+            sid_server,
+            self.transport,
+            self.signature_provider,
+            job_status_cache,
+        )
+        self.job_status_cache = job_status_cache
+        self.single_flight = AsyncSingleFlight()
+
+    async def get_job_status(
+        self,
+        partner_params: Dict[str, Any],
+        option_params: OptionsParams,
+        signature: Optional[SignatureParams] = None,
+    ) -> Dict[str, Any]:
+        """Validate params (signature & partner) and queries job status.
+
+        argument(s):
+        partner_params: Dict containing all partner params (job_id, user_id,
+            job_type)
+        option_params: Dict containaing optional info params such as
+            return_job_status, return_image_links, and return_history.
+
+        Returns:
+        The job status of type Dict[str, Any].
+        """
+        if signature is None:
+            signature = self.signature_provider.get_signature()
+
+        validate_signature_params(signature)
+        Utilities.validate_partner_params(
+            {
+                **partner_params,
+                "job_type": partner_params.get("job_type", "1"),
+            }
+        )
+        if not option_params:
+            option_params = OptionsParams(
+                return_job_status=True,
+                return_history=False,
+                return_images=False,
+                use_enrolled_image=False,
+            )
+        return await self.query_job_status(
+            str(partner_params.get("user_id")),
+            str(partner_params.get("job_id")),
+            option_params,
+            signature,
+        )
+
+    async def query_job_status(
+        self,
+        user_id: str,
+        job_id: str,
+        option_params: OptionsParams,
+        signature: SignatureParams,
+    ) -> Dict[str, Any]:
+        """Make post request, checks validity of job status response/code.
+
+        argument(s):
+        user_id: A unique string representing user's ID
+        job_id: Unique job id
+        option_params: Dict containaing optional info params
+        signature: Dictionary of a uniquely generated signature value and
+            a timestamp
+
+        Concurrent queries for the same job and options share a single
+        request and its verified result.
+
+        Returns:
+            Returns status if status code passes. This is of type Dict[str, Any]
+        """
+        cache_key = JobStatusCache.key(user_id, job_id, option_params)
+        if self.job_status_cache is not None:
+            cached = self.job_status_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        job_status: Dict[str, Any] = await self.single_flight.do(
+            cache_key,
+            lambda: self._fetch_job_status(
+                user_id, job_id, option_params, signature
+            ),
+        )
+        return job_status
+
+    async def _fetch_job_status(
+        self,
+        user_id: str,
+        job_id: str,
+        option_params: OptionsParams,
+        signature: SignatureParams,
+    ) -> Dict[str, Any]:
+        """Query a job's status, verify it and cache it."""
+        job_status = await self.execute_post(
+            f"{self.url}/job_status",
+            self._utilities.configure_job_query(
+                user_id, job_id, option_params, signature
+            ),
+            idempotent=True,
+        )
+        job_status_json_resp = dict(
+            self.async_transport.codec.decode(job_status)
+        )
+        if job_status.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {self.url}/job_status,"
+                f" response={job_status.status_code}:"
+                f"{job_status.reason_phrase} - {job_status_json_resp}",
+                status_code=job_status.status_code,
+            )
+        valid = Signature(self.partner_id, self.api_key).confirm_signature(
+            job_status_json_resp["timestamp"],
+            job_status_json_resp["signature"],
+        )
+        if not valid:
+            raise ServerError(
+                "Unable to confirm validity of the job_status response"
+            )
+        if self.job_status_cache is not None:
+            self.job_status_cache.put(
+                JobStatusCache.key(user_id, job_id, option_params),
+                job_status_json_resp,
+            )
+        return job_status_json_resp
+
+    def configure_json(
+        self,
+        partner_params: Dict[str, Any],
+        id_params: Dict[str, str],
+        signature: SignatureParams,
+    ) -> Dict[str, Any]:
+        """Configure JSON request payload by merging job params."""
+        return self._utilities.configure_json(
+            partner_params, id_params, signature
+        )
+
+    async def execute_post(
+        self, url: str, payload: Dict[str, Any], idempotent: bool = False
+    ) -> "httpx.Response":
+        """Make post request to specified url with payload data.
+
+        argument(s):
+        url: str: endpoint url
+        payload: data payload to be sent to url
+        idempotent: whether the request may be retried on any transient
+            failure, see Utilities.execute_post
+
+        Returns: httpx.Response from post request to endpoint
+        """
+        return await self.async_transport.post(
+            url,
+            self.async_transport.codec.dumps(payload),
+            headers={
+                "Accept": "application/json",
+                "Accept-Language": "en_US",
+                "Content-type": "application/json",
+            },
+            idempotent=idempotent,
+        )
@@ -0,0 +1,317 @@
+"""Asyncio version of WebApi for image based jobs."""
+
+import asyncio
+import itertools
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Union
+
+from smile_id_core.AsyncIdApi import AsyncIdApi
+from smile_id_core.AsyncUtilities import AsyncUtilities
+from smile_id_core.base import AsyncBase
+from smile_id_core.cache import ZipEntryCache
+from smile_id_core.constants import JobType
+from smile_id_core.image_upload import (
+    CompressionPolicy,
+    generate_zip_file,
+    pack_image_entries,
+)
+from smile_id_core.polling import PollSchedule, get_poll_schedule
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.transport import AsyncTransport
+from smile_id_core.types import ImageParams, OptionsParams, SignatureParams
+from smile_id_core.Utilities import validate_signature_params
+from smile_id_core.WebApi import WebApi
+from smile_id_core.webhook import CallbackReceiver
+
+if TYPE_CHECKING:
+    import httpx
+
+__all__ = ["AsyncWebApi"]
+
+
+class AsyncWebApi(AsyncBase):
+    """Submit image based jobs and poll their status from asyncio code.
+
+    Validation and payloads are shared with WebApi; HTTP calls go through an
+    AsyncTransport, the zip file is built in a worker thread and polling
+    waits with asyncio.sleep, so no thread is held while a job is pending.
+
+    Attributes:
+    partner_id (str): Smile partner id from the portal
+    call_back_url(str): Callback url to endpoint
+    """
+
+    def __init__(
+        self,
+        partner_id: str,
+        call_back_url: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        async_transport: Optional[AsyncTransport] = None,
+        poll_schedules: Optional[Mapping[JobType, PollSchedule]] = None,
+        callback_receiver: Optional[CallbackReceiver] = None,
+        compression: Optional[CompressionPolicy] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        pipeline_uploads: bool = False,
+        entry_cache: Optional[ZipEntryCache] = None,
+    ):
+        """Set ups environment and initialises params.
+
+        argument(s):
+        partner_id: distinct id of partner
+        call_back_url(str): Callback url to endpoint
+        api_key: api key from the partner portal
+        sid_server: The server to use for the SID API. 0 for staging and 1 for
+            production.
+        async_transport: pooled async HTTP transport
+        poll_schedules: poll schedules keyed by JobType, see WebApi
+        callback_receiver: receiver every submitted job is registered with
+        compression: how the entries of job zip files are compressed
+        signature_provider: source of request signatures
+        pipeline_uploads: zip the images while the upload is being
+            prepared, see WebApi
+        entry_cache: cache of compressed image entries, see WebApi
+        """
+        super().__init__(
+            partner_id, api_key, sid_server, async_transport, signature_provider
+        )
+        self.call_back_url = call_back_url
+        self.poll_schedules = poll_schedules
+        self.callback_receiver = callback_receiver
+        self.compression = compression
+        self.pipeline_uploads = pipeline_uploads
+        self.entry_cache = entry_cache
+        self._web_api = WebApi(
+            partner_id,
+            call_back_url,
+            api_key,
+            sid_server,
+            self.transport,
+            signature_provider=self.signature_provider,
+        )
+        self.utilities = AsyncUtilities(
+            partner_id,
+            api_key,
+            sid_server,
+            self.async_transport,
+            self.signature_provider,
+        )
+
+    @property
+    def signature_params(self) -> SignatureParams:
+        """Return the signature used for the next job."""
+        return self.signature_provider.get_signature()
+
+    async def submit_job(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+    ) -> Dict[str, Any]:
+        """Perform key/parameter validation, creates zipped file and uploads."""
+        id_info_params, options_params = self._web_api._prepare_job_params(
+            partner_params, id_info_params, options_params
+        )
+        job_type = partner_params.get("job_type")
+        if job_type in (JobType.ENHANCED_KYC, JobType.BUSINESS_VERIFICATION):
+            return await AsyncIdApi(
+                self.partner_id,
+                self.api_key,
+                self.url,
+                self.async_transport,
+                self.signature_provider,
+            ).submit_job(partner_params, id_info_params, options_params)
+
+        self._web_api._validate_upload_job(
+            partner_params, images_params, id_info_params, options_params
+        )
+
+        signature_params = self.signature_params
+        callback = None
+        if self.callback_receiver is not None:
+            callback = self.callback_receiver.register(partner_params)
+        try:
+            smile_job_id = await self._upload_job(
+                partner_params,
+                images_params,
+                id_info_params,
+                options_params,
+                signature_params,
+            )
+        except Exception:
+            if self.callback_receiver is not None:
+                self.callback_receiver.unregister(partner_params)
+            raise
+
+        if options_params["return_job_status"]:
+            return await self.poll_job_status(
+                0, partner_params, options_params, None, callback=callback
+            )
+        return {"success": True, "smile_job_id": smile_job_id}
+
+    async def _upload_job(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+        signature_params: SignatureParams,
+    ) -> str:
+        """Prepare the upload, zip the job files and upload them.
+
+        Returns:
+            str: the smile_job_id assigned to the job
+        """
+        packing: Optional["asyncio.Task[bytes]"] = None
+        if self.pipeline_uploads:
+            packing = asyncio.create_task(
+                asyncio.to_thread(
+                    pack_image_entries,
+                    images_params,
+                    self.compression,
+                    self.entry_cache,
+                )
+            )
+        try:
+            prep_upload = await self.utilities.execute_post(
+                f"{self.url}/upload",
+                self._web_api._prepare_prep_upload_payload(
+                    partner_params,
+                    signature_params,
+                    options_params.get("use_enrolled_image", False),
+                ),
+            )
+            prep_upload_json_resp = self.async_transport.codec.decode(
+                prep_upload
+            )
+            if prep_upload.status_code != 200:
+                raise ServerError(
+                    f"Failed to post entity to {self.url}/upload,"
+                    f" status={prep_upload.status_code},"
+                    f" response={prep_upload_json_resp}",
+                    status_code=prep_upload.status_code,
+                )
+        except BaseException:
+            if packing is not None:
+                packing.cancel()
+            raise
+        upload_url: str = prep_upload_json_resp["upload_url"]
+        smile_job_id: str = prep_upload_json_resp["smile_job_id"]
+        zip_stream = await asyncio.to_thread(
+            generate_zip_file,
+            partner_id=self.partner_id,
+            callback_url=self.call_back_url,
+            image_params=images_params,
+            partner_params=partner_params,
+            id_info_params=id_info_params,
+            upload_url=upload_url,
+            signature_params=signature_params,
+            compression=self.compression,
+            codec=self.async_transport.codec,
+            packed_images=None if packing is None else await packing,
+            entry_cache=self.entry_cache,
+        )
+
+        upload_response = await self.upload(upload_url, zip_stream)
+        if upload_response.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {upload_url},"
+                f" status={upload_response.status_code},"
+                f" response="
+                f"{self.async_transport.codec.decode(upload_response)}",
+                status_code=upload_response.status_code,
+            )
+        return smile_job_id
+
+    async def get_web_token(
+        self,
+        user_id: str,
+        job_id: str,
+        product: str,
+        timestamp: Optional[str] = None,
+        callback_url: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Create  authorization token used in Hosted Web Integration."""
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        signature_params = Signature(
+            self.partner_id, self.api_key
+        ).generate_signature(timestamp)
+        response = await self.utilities.execute_post(
+            f"{self.url}/token",
+            {
+                "timestamp": signature_params["timestamp"],
+                "signature": signature_params["signature"],
+                "user_id": user_id,
+                "job_id": job_id,
+                "product": product,
+                "callback_url": callback_url or self.call_back_url,
+                "partner_id": self.partner_id,
+            },
+        )
+        return dict(self.async_transport.codec.decode(response))
+
+    async def poll_job_status(
+        self,
+        counter: int,
+        partner_params: Dict[str, str],
+        options_params: OptionsParams,
+        signature_params: Optional[SignatureParams],
+        callback: Optional["Future[Dict[str, Any]]"] = None,
+    ) -> Dict[str, Any]:
+        """Get job status & check completion over some specified duration.
+
+        The wait before each query comes from the poll schedule of the job
+        type. counter is the number of polls already made, which are skipped.
+
+        argument(s):
+        signature_params: signature of every query, see WebApi
+        callback: the job's callback future, see WebApi.poll_job_status
+        """
+        if signature_params is not None:
+            validate_signature_params(signature_params)
+        schedule = get_poll_schedule(
+            partner_params.get("job_type"), self.poll_schedules
+        )
+        registered = callback is not None
+        waiter = None if callback is None else asyncio.wrap_future(callback)
+        job_status: Optional[Dict[str, Any]] = None
+        for delay in itertools.islice(schedule.delays(), counter, None):
+            if waiter is None:
+                await asyncio.sleep(delay)
+            else:
+                # asyncio.wait() leaves the callback pending on timeout,
+                # where wait_for() would cancel it.
+                await asyncio.wait({waiter}, timeout=delay)
+                if waiter.done():
+                    waiter = None
+            job_status = await self.utilities.get_job_status(
+                partner_params,
+                options_params,
+                signature_params or self.signature_provider.get_signature(),
+            )
+            if job_status["job_complete"]:
+                break
+
+        if job_status is None:
+            # The schedule was used up before this call, query once anyway.
+            job_status = await self.utilities.get_job_status(
+                partner_params,
+                options_params,
+                signature_params or self.signature_provider.get_signature(),
+            )
+        if (
+            registered
+            and self.callback_receiver is not None
+            and job_status["job_complete"]
+        ):
+            self.callback_receiver.unregister(partner_params)
+        return job_status
+
+    async def upload(self, url: str, file: Any) -> "httpx.Response":
+        """Send a PUT request to upload file to specified url."""
+        return await self.async_transport.put(
+            url, file, headers={"Content-type": "application/zip"}
+        )
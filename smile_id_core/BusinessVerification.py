@@ -7,12 +7,14 @@ directors, beneficial owners and fiduciaries of a business while
 the tax information returns only the company information
 """
 
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 from smile_id_core.base import Base
 from smile_id_core.constants import JobType
 from smile_id_core.ServerError import ServerError
-from smile_id_core.Utilities import Utilities, get_signature
+from smile_id_core.Signature import SignatureProvider
+from smile_id_core.transport import Transport
+from smile_id_core.Utilities import Utilities, get_signature  # noqa: F401
 
 __all__ = ["BusinessVerification"]
 
@@ -26,7 +28,13 @@ class BusinessVerification(Base):
     """
 
     def __init__(
-        self, partner_id: str, api_key: str, sid_server: Union[str, int]
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        transport: Optional[Transport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        utilities: Optional[Utilities] = None,
     ):
         """Initialize all relevant params required for business verification.
 
@@ -34,9 +42,26 @@ class BusinessVerification(Base):
             partner_id: distinct identification number for a partner
             api_key(str): api_key obtained from the partner portal
             sid_server(str or int): specifies production or sandbox
+            transport: pooled HTTP transport, defaults to the shared one
+            signature_provider: source of request signatures, defaults to
+                the one shared by clients with the same credentials
+            utilities: Utilities to share with other clients, one is
+                created when not supplied
         """
-        super().__init__(partner_id, api_key, sid_server)
-        self.utilities = Utilities(partner_id, api_key, sid_server)
+        super().__init__(
+            partner_id, api_key, sid_server, transport, signature_provider
+        )
+        self.utilities = (
+            utilities
+            if utilities is not None
+            else Utilities(
+                partner_id,
+                api_key,
+                sid_server,
+                self.transport,
+                self.signature_provider,
+            )
+        )
 
     def submit_job(
         self,
@@ -64,21 +89,20 @@ class BusinessVerification(Base):
         if partner_params.get("job_type") != JobType.BUSINESS_VERIFICATION:
             raise ValueError("Job type must be 7 for kyb")
 
-        signature_object = get_signature(self.partner_id, self.api_key)
-        self.utilities = Utilities(
-            self.partner_id, self.api_key, self.sid_server
-        )
+        signature_object = self.signature_provider.get_signature()
         payload = self.utilities.configure_json(
             partner_params=partner_params,
             id_params=id_params,
             signature=signature_object,
         )
         url = f"{self.url}/business_verification"
-        response = self.utilities.execute_http(url, payload)
+        response = self.utilities.execute_http(url, payload, self.transport)
 
+        body = self.transport.codec.decode(response)
         if response.status_code != 200:
             raise ServerError(
                 f"Failed to post entity to {self.url}/business_verification,"
-                f" status={response.status_code}, response={response.json()}"
+                f" status={response.status_code}, response={body}",
+                status_code=response.status_code,
             )
-        return dict(response.json())
+        return dict(body)
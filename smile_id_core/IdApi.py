@@ -1,13 +1,17 @@
 """ID API class for kyc services."""
 
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 
 from smile_id_core.base import Base
+from smile_id_core.batch import JobResult, run_jobs
 from smile_id_core.BusinessVerification import BusinessVerification
+from smile_id_core.concurrency import AdaptiveLimiter
 from smile_id_core.constants import JobType
 from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import SignatureProvider
+from smile_id_core.transport import Transport
 from smile_id_core.types import OptionsParams
-from smile_id_core.Utilities import Utilities, get_signature
+from smile_id_core.Utilities import Utilities
 
 __all__ = ["IdApi"]
 
@@ -20,7 +24,15 @@ class IdApi(Base):
     """
 
     def __init__(
-        self, partner_id: str, api_key: str, sid_server: Union[str, int]
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        transport: Optional[Transport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        utilities: Optional[Utilities] = None,
+        business_verification: Optional[BusinessVerification] = None,
+        concurrency_limiter: Optional[AdaptiveLimiter] = None,
     ):
         """Initialize all relevant params required for business verification.
 
@@ -29,9 +41,45 @@ class IdApi(Base):
         api_key: API key to access the portal
         sid_server: The server to use for the SID API. 0 for staging
         and 1 for production.
+        transport: pooled HTTP transport, defaults to the shared one
+        signature_provider: source of request signatures, defaults to
+            the one shared by clients with the same credentials
+        utilities: Utilities to share with other clients, one is created
+            when not supplied
+        business_verification: BusinessVerification that KYB jobs are
+            handed to, one sharing this client's utilities is created when
+            not supplied
+        concurrency_limiter: adaptive limit on the KYC requests in flight,
+            shared with other clients. Requests are not limited when not
+            supplied.
         """
-        super().__init__(partner_id, api_key, sid_server)
-        self.utilities = Utilities(partner_id, api_key, sid_server)
+        super().__init__(
+            partner_id, api_key, sid_server, transport, signature_provider
+        )
+        self.utilities = (
+            utilities
+            if utilities is not None
+            else Utilities(
+                partner_id,
+                api_key,
+                sid_server,
+                self.transport,
+                self.signature_provider,
+            )
+        )
+        self.business_verification = (
+            business_verification
+            if business_verification is not None
+            else BusinessVerification(
+                partner_id,
+                api_key,
+                sid_server,
+                self.transport,
+                self.signature_provider,
+                self.utilities,
+            )
+        )
+        self.concurrency_limiter = concurrency_limiter
 
     def submit_job(
         self,
@@ -69,9 +117,9 @@ class IdApi(Base):
             )
 
         if partner_params.get("job_type") == JobType.BUSINESS_VERIFICATION:
-            return BusinessVerification(
-                self.partner_id, self.api_key, self.url
-            ).submit_job(partner_params, id_params)
+            return self.business_verification.submit_job(
+                partner_params, id_params
+            )
 
         Utilities.validate_id_params(
             self.url,
@@ -82,15 +130,46 @@ class IdApi(Base):
         if partner_params.get("job_type") != JobType.ENHANCED_KYC:
             raise ValueError("Job type must be 5 for ID Api")
 
-        signature_object = get_signature(self.partner_id, self.api_key)
+        signature_object = self.signature_provider.get_signature()
         payload = self.utilities.configure_json(
             partner_params, id_params, signature_object
         )
         url = f"{self.url}/id_verification"
-        response = self.utilities.execute_http(url, payload)
+        if self.concurrency_limiter is not None:
+            return self.concurrency_limiter.run(self._post_job, url, payload)
+        return self._post_job(url, payload)
+
+    def _post_job(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Post a KYC job and return the response body."""
+        response = self.utilities.execute_http(url, payload, self.transport)
+        body = self.transport.codec.decode(response)
         if response.status_code != 200:
             raise ServerError(
                 f"Failed to post entity to {url},"
-                f" status={response.status_code}, response={response.json()}"
+                f" status={response.status_code}, response={body}",
+                status_code=response.status_code,
             )
-        return dict(response.json())
+        return dict(body)
+
+    def submit_jobs(
+        self,
+        jobs: Iterable[Any],
+        max_in_flight: int = 4,
+        ordered: bool = False,
+    ) -> Iterator[JobResult]:
+        """Submit many KYC jobs concurrently and yield their results.
+
+        argument(s):
+        jobs: iterable of jobs, each a mapping of submit_job's keyword
+            arguments (partner_params, id_params, options_params) or a
+            sequence of its positional arguments
+        max_in_flight: maximum number of jobs being submitted at once.
+            With a concurrency_limiter this is an upper bound, and the
+            limiter decides how many requests are actually in flight.
+        ordered: yield results in input order instead of completion order
+
+        Returns:
+            An iterator of JobResult, one per job. A job that fails carries
+            its error instead of stopping the batch.
+        """
+        return run_jobs(self.submit_job, jobs, max_in_flight, ordered)
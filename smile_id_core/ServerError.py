@@ -1,11 +1,20 @@
 """ServerError Class."""
 
+from typing import Optional
+
 __all__ = ["ServerError"]
 
 
 class ServerError(Exception):
-    """Server error handling."""
+    """Server error handling.
+
+    Attributes:
+    message (str): description of the error
+    status_code (Optional[int]): status of the response that caused the
+        error, if any
+    """
 
-    def __init__(self, message: str):
+    def __init__(self, message: str, status_code: Optional[int] = None):
         """Return message string."""
         self.message = message
+        self.status_code = status_code
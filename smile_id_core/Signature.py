@@ -3,12 +3,19 @@
 import base64
 import hashlib
 import hmac
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
 from smile_id_core.types import SignatureParams
 
-__all__ = ["Signature"]
+__all__ = ["Signature", "SignatureProvider", "get_signature_provider"]
+
+# Seconds a signature handed out by a SignatureProvider is reused for, and
+# how long before the end of that window it is replaced.
+DEFAULT_SIGNATURE_VALIDITY = 300.0
+DEFAULT_REFRESH_MARGIN = 30.0
 
 
 class Signature:
@@ -70,3 +77,100 @@ class Signature:
         """
         expected = self.generate_signature(timestamp)["signature"]
         return hmac.compare_digest(expected, msg_signature)
+
+
+class SignatureProvider:
+    """Hand out one signature for a time window and refresh it before expiry.
+
+    Signing a request is an HMAC over a fresh timestamp. The provider signs
+    once and returns the same signature until it is refresh_margin seconds
+    away from the end of its validity window, then signs again. It is safe
+    to share between threads and clients.
+
+    Attributes:
+    partner_id (str): Smile partner id from the portal
+    validity (float): seconds a signature is reused for
+    refresh_margin (float): seconds before the end of validity at which a
+        new signature is generated
+    """
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        validity: float = DEFAULT_SIGNATURE_VALIDITY,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the provider.
+
+        argument(s):
+        partner_id: distinct identification number for a partner
+        api_key: api key obtained from the partner portal
+        validity: seconds a signature is reused for
+        refresh_margin: seconds before the end of validity at which a new
+            signature is generated
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if validity <= 0 or refresh_margin < 0:
+            raise ValueError(
+                "validity must be positive and refresh_margin not negative"
+            )
+        if refresh_margin >= validity:
+            raise ValueError("refresh_margin must be less than validity")
+        self.partner_id = partner_id
+        self.signer = Signature(partner_id, api_key)
+        self.validity = validity
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._signature: Optional[SignatureParams] = None
+        self._refresh_at = 0.0
+
+    def get_signature(self, min_lifetime: float = 0.0) -> SignatureParams:
+        """Return the current signature, generating a new one if it is due.
+
+        argument(s):
+        min_lifetime: seconds the signature must stay in use for. The
+            signature is replaced when it is due for a refresh sooner.
+
+        Returns:
+        A dictionary containing the signature and its timestamp
+        """
+        with self._lock:
+            if (
+                self._signature is None
+                or self._clock() + min_lifetime >= self._refresh_at
+            ):
+                return self._sign()
+            return SignatureParams(**self._signature)
+
+    def refresh(self) -> SignatureParams:
+        """Replace the current signature with a new one and return it."""
+        with self._lock:
+            return self._sign()
+
+    def _sign(self) -> SignatureParams:
+        """Generate a signature and schedule its refresh. Holds the lock."""
+        self._signature = self.signer.generate_signature()
+        self._refresh_at = self._clock() + self.validity - self.refresh_margin
+        return SignatureParams(**self._signature)
+
+
+_providers: Dict[Tuple[str, str], SignatureProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_signature_provider(partner_id: str, api_key: str) -> SignatureProvider:
+    """Return the process-wide SignatureProvider for a partner's credentials.
+
+    Every client created without its own provider uses this one, so they
+    share a single signature per partner_id and api_key.
+    """
+    key = (str(partner_id), api_key)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = SignatureProvider(partner_id, api_key)
+            _providers[key] = provider
+        return provider
@@ -4,19 +4,20 @@ Additionally, the Utilities class makes a call to the Signature class and
 performs signature parama validation.
 """
 
-import json
 import re
 import sys
 from typing import Any, Dict, Optional, Union
 
-import requests
 from requests import Response
 
 from smile_id_core import constants
 from smile_id_core.base import Base
+from smile_id_core.cache import JobStatusCache
 from smile_id_core.constants import JobType
 from smile_id_core.ServerError import ServerError
-from smile_id_core.Signature import Signature
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.singleflight import SingleFlight
+from smile_id_core.transport import Transport, get_default_transport
 from smile_id_core.types import OptionsParams, SignatureParams
 
 # import importlib.metadata if available, otherwise importlib_metadata
@@ -49,7 +50,13 @@ class Utilities(Base):
     """Query information on subitted job status."""
 
     def __init__(
-        self, partner_id: str, api_key: str, sid_server: Union[int, str]
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[int, str],
+        transport: Optional[Transport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        job_status_cache: Optional[JobStatusCache] = None,
     ):
         """Initialize all relevant params required for Utilities methods.
 
@@ -57,8 +64,17 @@ class Utilities(Base):
             partner_id: distinct identification number for a partner
             api_key(str): api_key obtained from the partner portal
             sid_server(str or int): specifies production or sandbox
+            transport: pooled HTTP transport, defaults to the shared one
+            signature_provider: source of request signatures, defaults to
+                the one shared by clients with the same credentials
+            job_status_cache: cache of verified job statuses consulted
+                before querying a job. Nothing is cached when not supplied.
         """
-        super().__init__(partner_id, api_key, sid_server)
+        super().__init__(
+            partner_id, api_key, sid_server, transport, signature_provider
+        )
+        self.job_status_cache = job_status_cache
+        self.single_flight = SingleFlight()
 
     def get_job_status(
         self,
@@ -80,7 +96,7 @@ class Utilities(Base):
         Dict[str, Any].
         """
         if signature is None:
-            signature = get_signature(self.partner_id, self.api_key)
+            signature = self.signature_provider.get_signature()
 
         validate_signature_params(signature)
         # validate_partner_param throws an error if job_type is empty/not
@@ -125,9 +141,33 @@ class Utilities(Base):
         signature: Dictionary of a uniquely generated signature value and
             a timestamp
 
+        Concurrent queries for the same job and options share a single
+        request and its verified result.
+
         Returns:
             Returns status if status code passes. This is of type Dict[str, Any]
         """
+        cache_key = JobStatusCache.key(user_id, job_id, option_params)
+        if self.job_status_cache is not None:
+            cached = self.job_status_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        job_status: Dict[str, Any] = self.single_flight.do(
+            cache_key,
+            lambda: self._fetch_job_status(
+                user_id, job_id, option_params, signature
+            ),
+        )
+        return job_status
+
+    def _fetch_job_status(
+        self,
+        user_id: str,
+        job_id: str,
+        option_params: OptionsParams,
+        signature: SignatureParams,
+    ) -> Dict[str, Any]:
+        """Query a job's status, verify it and cache it."""
         job_status = Utilities.execute_post(
             f"{self.url}/job_status",
             self.configure_job_query(
@@ -136,15 +176,18 @@ class Utilities(Base):
                 option_params,
                 signature,
             ),
+            self.transport,
+            idempotent=True,
         )
 
+        job_status_json_resp = self.transport.codec.decode(job_status)
         if job_status.status_code != 200:
             raise ServerError(
                 f"Failed to post entity to {self.url}/job_status,"
                 f" response={job_status.status_code}:{job_status.reason} -"
-                f" {job_status.json()}"
+                f" {job_status_json_resp}",
+                status_code=job_status.status_code,
             )
-        job_status_json_resp = job_status.json()
         timestamp = job_status_json_resp["timestamp"]
         server_signature = job_status_json_resp["signature"]
         new_signature = Signature(self.partner_id, self.api_key)
@@ -153,7 +196,12 @@ class Utilities(Base):
             raise ServerError(
                 "Unable to confirm validity of the job_status response"
             )
-        return dict(job_status.json())
+        if self.job_status_cache is not None:
+            self.job_status_cache.put(
+                JobStatusCache.key(user_id, job_id, option_params),
+                job_status_json_resp,
+            )
+        return dict(job_status_json_resp)
 
     def configure_job_query(
         self,
@@ -256,13 +304,17 @@ class Utilities(Base):
             raise ValueError("key id_number cannot be empty")
 
     @staticmethod
-    def execute_get(url: str) -> Response:
+    def execute_get(
+        url: str, transport: Optional[Transport] = None
+    ) -> Response:
         """Send Get request to url endpoint.
 
         argument(s):
         url: Url endpoint string
+        transport: pooled HTTP transport, defaults to the shared one
         """
-        resp = requests.get(
+        transport = transport or get_default_transport()
+        resp = transport.get(
             url=url,
             headers={
                 "Accept": "application/json",
@@ -272,17 +324,26 @@ class Utilities(Base):
         return resp
 
     @staticmethod
-    def execute_post(url: str, payload: Dict[str, str]) -> Response:
+    def execute_post(
+        url: str,
+        payload: Dict[str, str],
+        transport: Optional[Transport] = None,
+        idempotent: bool = False,
+    ) -> Response:
         """Make post request to specified url with payload data.
 
         argument(s):
         url: str: endpoint url
         payload: data payload to be sent to url
+        transport: pooled HTTP transport, defaults to the shared one
+        idempotent: whether the request may be retried on any transient
+            failure, as queries may but job submissions may not
 
         Returns: Response from post request to endpoint
         """
-        data = json.dumps(payload)
-        resp = requests.post(
+        transport = transport or get_default_transport()
+        data = transport.codec.dumps(payload)
+        resp = transport.post(
             url=url,
             data=data,
             headers={
@@ -290,22 +351,29 @@ class Utilities(Base):
                 "Accept-Language": "en_US",
                 "Content-type": "application/json",
             },
+            idempotent=idempotent,
         )
         return resp
 
     @staticmethod
-    def execute_http(url: str, payload: Dict[str, Response]) -> Response:
+    def execute_http(
+        url: str,
+        payload: Dict[str, Response],
+        transport: Optional[Transport] = None,
+    ) -> Response:
         """Send http request to specified endpoint url and return response.
 
         argument(s):
         url: Endpoint url based on api key
         payload: Dictionary containing payload data
+        transport: pooled HTTP transport, defaults to the shared one
         Returns:
         Returns Response form post request
         """
-        data = json.dumps(payload)
+        transport = transport or get_default_transport()
+        data = transport.codec.dumps(payload)
 
-        resp = requests.post(
+        resp = transport.post(
             url=url,
             data=data,
             headers={
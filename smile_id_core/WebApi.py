@@ -1,27 +1,76 @@
 """WebAPI allows ID authority/third parties User validation by partners."""
 
-import json
+import contextlib
+import copy
+import functools
+import itertools
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import requests
 from requests import Response
 
 from smile_id_core.base import Base
-from smile_id_core.BusinessVerification import BusinessVerification
+from smile_id_core.batch import JobResult, run_jobs
+from smile_id_core.cache import ZipEntryCache
+from smile_id_core.concurrency import AdaptiveLimiter
 from smile_id_core.constants import JobType
+from smile_id_core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    deadline_scope,
+)
 from smile_id_core.IdApi import IdApi
-from smile_id_core.image_upload import generate_zip_file, validate_images
+from smile_id_core.image_upload import (
+    DEFAULT_SPOOL_SIZE,
+    CompressionPolicy,
+    generate_zip_file,
+    iter_zip_file,
+    pack_image_entries,
+    spool_zip_file,
+    validate_images,
+)
+from smile_id_core.ledger import (
+    COMPLETE,
+    FAILED,
+    SUBMITTED,
+    UPLOADING,
+    JobLedger,
+)
+from smile_id_core.package import Package, PreparedPackage
+from smile_id_core.polling import (
+    JobHandle,
+    JobStatusPoller,
+    PollSchedule,
+    get_poll_schedule,
+)
 from smile_id_core.ServerError import ServerError
-from smile_id_core.Signature import Signature
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.transport import Transport, get_default_transport
 from smile_id_core.types import ImageParams, OptionsParams, SignatureParams
+from smile_id_core.upload_slots import UploadSlot, UploadSlotPool
 from smile_id_core.Utilities import (
     Utilities,
-    get_signature,
     get_version,
     validate_signature_params,
 )
+from smile_id_core.webhook import CallbackReceiver
 
 __all__ = ["WebApi"]
 
@@ -44,6 +93,21 @@ class WebApi(Base):
         call_back_url: str,
         api_key: str,
         sid_server: Union[str, int],
+        transport: Optional[Transport] = None,
+        poll_schedules: Optional[Mapping[JobType, PollSchedule]] = None,
+        callback_receiver: Optional[CallbackReceiver] = None,
+        stream_uploads: bool = False,
+        compression: Optional[CompressionPolicy] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        utilities: Optional[Utilities] = None,
+        id_api: Optional[IdApi] = None,
+        concurrency_limiter: Optional[AdaptiveLimiter] = None,
+        ledger: Optional[JobLedger] = None,
+        poller: Optional[JobStatusPoller] = None,
+        pipeline_uploads: bool = False,
+        upload_slots: Optional[UploadSlotPool] = None,
+        entry_cache: Optional[ZipEntryCache] = None,
+        spool_size: int = DEFAULT_SPOOL_SIZE,
     ):
         """Set ups environment and initialises params.
 
@@ -53,13 +117,102 @@ class WebApi(Base):
         api_key: api key from the partner portal
         sid_server: The server to use for the SID API. 0 for staging and 1 for
             production.
+        transport: pooled HTTP transport, defaults to the shared one
+        poll_schedules: poll schedules keyed by JobType used when waiting
+            for a job to complete. Job types that are not listed use
+            DEFAULT_POLL_SCHEDULE.
+        callback_receiver: receiver every submitted job is registered
+            with. A job being polled is queried as soon as its callback
+            arrives instead of at its next scheduled poll.
+        stream_uploads: build the zip file in chunks into a temporary file,
+            held in memory up to spool_size bytes, instead of building it
+            in memory. It is uploaded from there with a
+            Content-Length, which the upload_url host requires.
+        compression: how the entries of job zip files are compressed,
+            defaults to DEFAULT_COMPRESSION_POLICY
+        signature_provider: source of request signatures, defaults to the
+            one shared by clients with the same credentials
+        utilities: Utilities to share with other clients, one is created
+            when not supplied
+        id_api: IdApi that Enhanced KYC and KYB jobs are handed to, one
+            sharing this client's utilities is created when not supplied
+        concurrency_limiter: adaptive limit on the uploads in flight,
+            shared with other clients. Uploads are not limited when not
+            supplied. Polling for the job status does not hold a slot.
+        ledger: JobLedger each job and its state changes are recorded in,
+            so jobs in flight can be resumed with JobLedger.resume() after
+            a restart
+        poller: poller that polls the jobs of submit_job_async, shared
+            with other clients. One is created on first use when not
+            supplied.
+        pipeline_uploads: zip the images on a worker thread while the
+            upload is being prepared, and only add info.json, which needs
+            the upload_url, once it is. info.json is then the last entry
+            of the zip file. Ignored with stream_uploads.
+        upload_slots: pool holding the upload slots requested ahead of
+            their jobs by prefetch_upload
+        entry_cache: cache of compressed image entries, shared with other
+            clients, so images submitted with several jobs are read and
+            compressed once. Splicing cached entries relies on ZipFile
+            internals checked on Python 3.9 to 3.13; elsewhere the cache
+            is not used and a RuntimeWarning is emitted once.
+        spool_size: bytes of a streamed zip file held in memory before it
+            is moved to disk, defaults to DEFAULT_SPOOL_SIZE
         """
-        super().__init__(partner_id, api_key, sid_server)
+        super().__init__(
+            partner_id, api_key, sid_server, transport, signature_provider
+        )
         self.call_back_url = call_back_url
-        self.utilities: Optional[Utilities] = Utilities(
-            self.partner_id, self.api_key, self.sid_server
+        self.poll_schedules = poll_schedules
+        self.callback_receiver = callback_receiver
+        self.stream_uploads = stream_uploads
+        self.spool_size = spool_size
+        self.compression = compression
+        self.entry_cache = entry_cache
+        self.utilities: Optional[Utilities] = (
+            utilities
+            if utilities is not None
+            else Utilities(
+                self.partner_id,
+                self.api_key,
+                self.sid_server,
+                self.transport,
+                self.signature_provider,
+            )
+        )
+        self.id_api = (
+            id_api
+            if id_api is not None
+            else IdApi(
+                self.partner_id,
+                self.api_key,
+                self.sid_server,
+                self.transport,
+                self.signature_provider,
+                self.utilities,
+                concurrency_limiter=concurrency_limiter,
+            )
+        )
+        self.concurrency_limiter = concurrency_limiter
+        self.ledger = ledger
+        self.poller = poller
+        self._poller_lock = threading.Lock()
+        self._owns_poller = False
+        self.upload_slots = upload_slots
+        self._zip_executor = (
+            ThreadPoolExecutor(thread_name_prefix="smile-id-zip")
+            if pipeline_uploads and not stream_uploads
+            else None
         )
-        self.signature_params = get_signature(self.partner_id, self.api_key)
+
+    @property
+    def signature_params(self) -> SignatureParams:
+        """Return the signature used for the next job.
+
+        It comes from signature_provider, so it is reused between jobs and
+        replaced before its timestamp goes stale.
+        """
+        return self.signature_provider.get_signature()
 
     def __call_id_api(
         self,
@@ -67,8 +220,9 @@ class WebApi(Base):
         id_info_params: Dict[str, str],
         options_params: OptionsParams,
     ) -> Dict[str, Any]:
-        id_api = IdApi(self.partner_id, self.api_key, self.sid_server)
-        return id_api.submit_job(partner_params, id_info_params, options_params)
+        return self.id_api.submit_job(
+            partner_params, id_info_params, options_params
+        )
 
     def submit_job(
         self,
@@ -76,8 +230,573 @@ class WebApi(Base):
         images_params: List[ImageParams],
         id_info_params: Dict[str, Any],
         options_params: OptionsParams,
+        deadline: Union[None, float, Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Perform key/parameter validation, creates zipped file and uploads.
+
+        argument(s):
+        partner_params: Dict containing all partner params
+        images_params: List of the images to upload
+        id_info_params: Dict containing id info params
+        options_params: Dict containing optional info params
+        deadline: seconds, or a Deadline, the whole submission may take,
+            including polling for the job status. Every request's timeouts
+            are capped by the time left and DeadlineExceeded, carrying the
+            smile_job_id once known, is raised when it passes.
+        """
+        with deadline_scope(deadline):
+            return self._submit_job(
+                partner_params, images_params, id_info_params, options_params
+            )
+
+    def _submit_job(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
     ) -> Dict[str, Any]:
-        """Perform key/parameter validation, creates zipped file and uploads."""
+        """Submit a job, see submit_job."""
+        id_info_params, options_params = self._prepare_job_params(
+            partner_params, id_info_params, options_params
+        )
+        job_type = partner_params.get("job_type")
+
+        if (
+            job_type == JobType.ENHANCED_KYC
+            or job_type == JobType.BUSINESS_VERIFICATION
+        ):
+            return self.__call_id_api(
+                partner_params,
+                id_info_params,
+                options_params,
+            )
+
+        if job_type == JobType.BUSINESS_VERIFICATION:
+            return self.id_api.business_verification.submit_job(
+                partner_params, id_info_params
+            )
+
+        self._validate_upload_job(
+            partner_params, images_params, id_info_params, options_params
+        )
+        signature_params = self.signature_params
+        smile_job_id, callback = self._start_upload(
+            partner_params,
+            self._upload_job,
+            partner_params,
+            images_params,
+            id_info_params,
+            options_params,
+            signature_params,
+        )
+        return self._finish_job(
+            partner_params, options_params, smile_job_id, callback
+        )
+
+    def submit_prepared_package(
+        self,
+        package: Package,
+        options_params: Optional[OptionsParams] = None,
+        deadline: Union[None, float, Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Submit a job zip file built ahead of time, streaming it from disk.
+
+        The package's info.json is validated and its partner_params are
+        those of the job. The upload is prepared as for submit_job, then
+        the package is sent from its file in chunks, with an info.json
+        holding the new upload_url and signature, so it is never loaded
+        in memory.
+
+        argument(s):
+        package: path of the zip file, a file descriptor open for reading
+            or a seekable binary file, e.g. one built by generate_zip_file
+        options_params: Dict containing optional info params
+        deadline: seconds, or a Deadline, the whole submission may take,
+            see submit_job
+
+        Returns:
+            What submit_job returns for the job
+        """
+        with deadline_scope(deadline), PreparedPackage(package) as prepared:
+            if prepared.partner_id not in (None, self.partner_id):
+                raise ValueError(
+                    f"The package was built for partner {prepared.partner_id}"
+                )
+            partner_params = prepared.partner_params
+            Utilities.validate_partner_params(partner_params)
+            if not options_params:
+                options_params = OptionsParams(
+                    return_job_status=True,
+                    return_history=False,
+                    return_images=False,
+                    use_enrolled_image=False,
+                )
+            signature_params = self.signature_params
+            smile_job_id, callback = self._start_upload(
+                partner_params,
+                self._upload_package,
+                prepared,
+                options_params,
+                signature_params,
+            )
+            return self._finish_job(
+                partner_params, options_params, smile_job_id, callback
+            )
+
+    def _finish_job(
+        self,
+        partner_params: Dict[str, Any],
+        options_params: OptionsParams,
+        smile_job_id: str,
+        callback: Optional["Future[Dict[str, Any]]"] = None,
+    ) -> Dict[str, Any]:
+        """Poll an uploaded job if return_job_status is set.
+
+        argument(s):
+        callback: the job's callback future registered by _start_upload
+
+        Returns:
+            The job status, or the smile_job_id when it is not polled
+        """
+        if options_params["return_job_status"]:
+            if self.utilities is None:
+                self.utilities = Utilities(
+                    self.partner_id,
+                    self.api_key,
+                    self.sid_server,
+                    self.transport,
+                    self.signature_provider,
+                )
+            try:
+                # Polls are signed as they are sent: the job may be polled
+                # for longer than the submission's signature stays valid.
+                job_status = self.poll_job_status(
+                    0, partner_params, options_params, None, callback=callback
+                )
+            except DeadlineExceeded as error:
+                error.smile_job_id = smile_job_id
+                raise
+            if self.ledger is not None and job_status.get("job_complete"):
+                self.ledger.record(partner_params, COMPLETE, result=job_status)
+            return job_status
+        return {"success": True, "smile_job_id": smile_job_id}
+
+    def submit_job_async(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+    ) -> JobHandle:
+        """Upload a job and poll its status in the background.
+
+        Returns as soon as the job is uploaded, with a handle the caller
+        can wait on with result(timeout), be notified by with
+        add_done_callback(), cancel() to stop polling, or read the last
+        status received from. Jobs are polled by the client's poller.
+        With a callback_receiver the job is polled as soon as its callback
+        arrives, and unregistered once its handle is done.
+
+        Enhanced KYC and Business Verification jobs, which are answered
+        at once, and jobs with return_job_status off get a handle that is
+        already resolved with what submit_job would return. Errors raised
+        before polling, such as a failed upload, are raised here.
+
+        argument(s):
+        partner_params: Dict containing all partner params
+        images_params: List of the images to upload
+        id_info_params: Dict containing id info params
+        options_params: Dict containing optional info params
+        """
+        id_info_params, options_params = self._prepare_job_params(
+            partner_params, id_info_params, options_params
+        )
+        job_type = partner_params.get("job_type")
+
+        if (
+            job_type == JobType.ENHANCED_KYC
+            or job_type == JobType.BUSINESS_VERIFICATION
+        ):
+            return _resolved_handle(
+                partner_params,
+                self.__call_id_api(
+                    partner_params, id_info_params, options_params
+                ),
+            )
+
+        self._validate_upload_job(
+            partner_params, images_params, id_info_params, options_params
+        )
+        smile_job_id, callback = self._start_upload(
+            partner_params,
+            self._upload_job,
+            partner_params,
+            images_params,
+            id_info_params,
+            options_params,
+            self.signature_params,
+        )
+        if not options_params["return_job_status"]:
+            return _resolved_handle(
+                partner_params,
+                {"success": True, "smile_job_id": smile_job_id},
+                smile_job_id,
+            )
+        handle = self._get_poller().add(
+            partner_params,
+            options_params,
+            smile_job_id=smile_job_id,
+            wake=callback,
+        )
+        receiver = self.callback_receiver
+        if receiver is not None:
+            # Once the handle is done nothing waits for the callback.
+            handle.add_done_callback(
+                lambda _: receiver.unregister(partner_params)
+            )
+        ledger = self.ledger
+        if ledger is not None:
+
+            def record(future: "Future[Dict[str, Any]]") -> None:
+                # Like submit_job, jobs that do not complete stay submitted
+                # so that JobLedger.resume() polls them again.
+                if future.cancelled() or future.exception() is not None:
+                    return
+                job_status = future.result()
+                if job_status.get("job_complete"):
+                    ledger.record(partner_params, COMPLETE, result=job_status)
+
+            handle.add_done_callback(record)
+        return handle
+
+    def submit_jobs(
+        self,
+        jobs: Iterable[Any],
+        max_in_flight: int = 4,
+        ordered: bool = False,
+    ) -> Iterator[JobResult]:
+        """Submit many jobs concurrently and yield their results.
+
+        argument(s):
+        jobs: iterable of jobs, each a mapping of submit_job's keyword
+            arguments (partner_params, images_params, id_info_params,
+            options_params) or a sequence of its positional arguments
+        max_in_flight: maximum number of jobs being submitted at once.
+            With a concurrency_limiter this is an upper bound, and the
+            limiter decides how many uploads are actually in flight.
+        ordered: yield results in input order instead of completion order
+
+        Returns:
+            An iterator of JobResult, one per job. A job that fails carries
+            its error instead of stopping the batch.
+        """
+        return run_jobs(self.submit_job, jobs, max_in_flight, ordered)
+
+    def _start_upload(
+        self,
+        partner_params: Dict[str, Any],
+        upload: Callable[..., str],
+        *upload_args: Any,
+    ) -> Tuple[str, Optional["Future[Dict[str, Any]]"]]:
+        """Call upload(*upload_args) for a job, holding a concurrency slot.
+
+        The job is registered with the callback_receiver before it is
+        uploaded, so a callback arriving before polling starts is kept.
+
+        Returns:
+            The smile_job_id assigned to the job, and the future of its
+            callback when there is a callback_receiver
+        """
+        callback = None
+        if self.callback_receiver is not None:
+            callback = self.callback_receiver.register(partner_params)
+        try:
+            if self.concurrency_limiter is not None:
+                smile_job_id: str = self.concurrency_limiter.run(
+                    upload, *upload_args
+                )
+            else:
+                smile_job_id = upload(*upload_args)
+        except Exception as error:
+            if self.callback_receiver is not None:
+                self.callback_receiver.unregister(partner_params)
+            if self.ledger is not None:
+                self.ledger.record(partner_params, FAILED, error=str(error))
+            raise
+        return smile_job_id, callback
+
+    def _get_poller(self) -> JobStatusPoller:
+        """Return the poller of submit_job_async, creating it if needed."""
+        with self._poller_lock:
+            if self.poller is None:
+                if not isinstance(self.utilities, Utilities):
+                    raise ValueError("Utilities not initialized")
+                self.poller = JobStatusPoller(
+                    self.utilities, poll_schedules=self.poll_schedules
+                )
+                self._owns_poller = True
+            return self.poller
+
+    def close(self) -> None:
+        """Stop the worker threads created by this client.
+
+        Shuts down the thread zipping images for pipeline_uploads and the
+        poller of submit_job_async if this client created it, which cancels
+        the jobs it still polls. A poller passed in, like the transport, may
+        be shared and is left open.
+        """
+        if self._zip_executor is not None:
+            self._zip_executor.shutdown()
+        with self._poller_lock:
+            poller = self.poller if self._owns_poller else None
+        if poller is not None:
+            poller.close()
+
+    def __enter__(self) -> "WebApi":
+        """Return the client itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the client when leaving the context manager."""
+        self.close()
+
+    def prefetch_upload(
+        self,
+        partner_params: Dict[str, Any],
+        options_params: Optional[OptionsParams] = None,
+    ) -> bool:
+        """Request the upload slot of a job before it is submitted.
+
+        The /upload request is made on a background thread of the client's
+        upload_slots pool, and submit_job uses its upload_url and
+        smile_job_id if the job is submitted with the same partner_params
+        and use_enrolled_image option before the slot expires. Slots expire
+        after the pool's ttl, or sooner when the signature they were
+        requested with is due for a refresh.
+
+        argument(s):
+        partner_params: the partner_params the job will be submitted with,
+            including its job_id
+        options_params: the options the job will be submitted with
+
+        Returns:
+            bool: whether a slot is held for the job. False when the pool
+            is full, in which case the job requests its slot itself.
+        """
+        if self.upload_slots is None:
+            raise ValueError("prefetch_upload needs an upload_slots pool")
+        Utilities.validate_partner_params(partner_params)
+        use_enrolled_image = bool(
+            options_params and options_params.get("use_enrolled_image")
+        )
+        # The slot is written to info.json with this signature, so it is
+        # dropped once the signature would have been refreshed.
+        provider = self.signature_provider
+        ttl = min(
+            self.upload_slots.ttl, provider.validity - provider.refresh_margin
+        )
+        signature_params = provider.get_signature(min_lifetime=ttl)
+        params = copy.deepcopy(partner_params)
+        return self.upload_slots.reserve(
+            params,
+            use_enrolled_image,
+            lambda: self._prepare_upload(
+                params, signature_params, use_enrolled_image
+            ),
+            ttl,
+        )
+
+    def _prepare_upload(
+        self,
+        partner_params: Dict[str, Any],
+        signature_params: SignatureParams,
+        use_enrolled_image: bool,
+    ) -> UploadSlot:
+        """Request the upload_url and smile_job_id of a job."""
+        prep_upload = WebApi.execute_http(
+            f"{self.url}/upload",
+            self._prepare_prep_upload_payload(
+                partner_params, signature_params, use_enrolled_image
+            ),
+            self.transport,
+        )
+        prep_upload_json_resp = self.transport.codec.decode(prep_upload)
+        if prep_upload.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {self.url}/upload,"
+                f" status={prep_upload.status_code},"
+                f" response={prep_upload_json_resp}",
+                status_code=prep_upload.status_code,
+            )
+        return UploadSlot(
+            prep_upload_json_resp["upload_url"],
+            prep_upload_json_resp["smile_job_id"],
+            signature_params,
+        )
+
+    def _upload_job(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+        signature_params: SignatureParams,
+    ) -> str:
+        """Prepare the upload, zip the job files and upload them.
+
+        Returns:
+            str: the smile_job_id assigned to the job
+        """
+        packing: Optional["Future[bytes]"] = None
+        if self._zip_executor is not None:
+            packing = self._zip_executor.submit(
+                pack_image_entries,
+                images_params,
+                self.compression,
+                self.entry_cache,
+            )
+        try:
+            upload_url, smile_job_id, signature_params = self._reserve_upload(
+                partner_params, options_params, signature_params
+            )
+        except BaseException:
+            if packing is not None and not packing.cancel():
+                # Already zipping: wait for it rather than leave the worker
+                # busy with a job that failed.
+                with contextlib.suppress(Exception):
+                    _wait_for_packing(packing)
+            raise
+        zip_file: Callable[..., Any] = generate_zip_file
+        if self.stream_uploads:
+            zip_file = iter_zip_file
+        elif packing is not None:
+            try:
+                packed_images = _wait_for_packing(packing)
+            except DeadlineExceeded as error:
+                error.smile_job_id = smile_job_id
+                raise
+            zip_file = functools.partial(
+                generate_zip_file, packed_images=packed_images
+            )
+        zip_stream = zip_file(
+            partner_id=self.partner_id,
+            callback_url=self.call_back_url,
+            image_params=images_params,
+            partner_params=partner_params,
+            id_info_params=id_info_params,
+            upload_url=upload_url,
+            signature_params=signature_params,
+            compression=self.compression,
+            codec=self.transport.codec,
+            entry_cache=self.entry_cache,
+        )
+        if self.stream_uploads:
+            with spool_zip_file(zip_stream, self.spool_size) as body:
+                self._send_upload(
+                    partner_params, upload_url, smile_job_id, body
+                )
+        else:
+            self._send_upload(
+                partner_params, upload_url, smile_job_id, zip_stream
+            )
+        return smile_job_id
+
+    def _upload_package(
+        self,
+        prepared: PreparedPackage,
+        options_params: OptionsParams,
+        signature_params: SignatureParams,
+    ) -> str:
+        """Prepare the upload of a prepared package and upload it.
+
+        Returns:
+            str: the smile_job_id assigned to the job
+        """
+        upload_url, smile_job_id, signature_params = self._reserve_upload(
+            prepared.partner_params, options_params, signature_params
+        )
+        body = prepared.body(
+            upload_url,
+            signature_params,
+            codec=self.transport.codec,
+            compression=self.compression,
+        )
+        self._send_upload(
+            prepared.partner_params, upload_url, smile_job_id, body
+        )
+        return smile_job_id
+
+    def _reserve_upload(
+        self,
+        partner_params: Dict[str, Any],
+        options_params: OptionsParams,
+        signature_params: SignatureParams,
+    ) -> UploadSlot:
+        """Take the job's prefetched upload slot or request one.
+
+        Returns:
+            UploadSlot: the upload_url, smile_job_id and signature to use
+        """
+        use_enrolled_image = options_params.get("use_enrolled_image", False)
+        slot = None
+        if self.upload_slots is not None:
+            slot = self.upload_slots.take(partner_params, use_enrolled_image)
+        if slot is None:
+            slot = self._prepare_upload(
+                partner_params, signature_params, use_enrolled_image
+            )
+        if self.ledger is not None:
+            # Committed before uploading, so a job the upload may have
+            # created upstream is never missing from the ledger.
+            self.ledger.record(
+                partner_params,
+                UPLOADING,
+                smile_job_id=slot.smile_job_id,
+                options_params=options_params,
+                wait=True,
+            )
+        return slot
+
+    def _send_upload(
+        self,
+        partner_params: Dict[str, Any],
+        upload_url: str,
+        smile_job_id: str,
+        body: Any,
+    ) -> None:
+        """Upload the zip file of a job to its upload_url."""
+        try:
+            upload_response = WebApi.upload(upload_url, body, self.transport)
+        except DeadlineExceeded as error:
+            error.smile_job_id = smile_job_id
+            raise
+        if upload_response.status_code != 200:
+            raise ServerError(
+                f"Failed to post entity to {upload_url},"
+                f" status={upload_response.status_code},"
+                f" response={self.transport.codec.decode(upload_response)}",
+                status_code=upload_response.status_code,
+            )
+        if self.ledger is not None:
+            self.ledger.record(partner_params, SUBMITTED)
+
+    def _prepare_job_params(
+        self,
+        partner_params: Dict[str, Any],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+    ) -> Tuple[Dict[str, Any], OptionsParams]:
+        """Validate partner params and fill in id info and option defaults.
+
+        argument(s):
+        partner_params: Dict containing all partner params
+        id_info_params: Dict containing id info params
+        options_params: Dict containing optional info params
+
+        Returns:
+        A tuple of the id info params and options params to submit with
+        """
         Utilities.validate_partner_params(partner_params)
         job_type = partner_params.get("job_type")
 
@@ -117,76 +836,25 @@ class WebApi(Base):
                 return_images=False,
                 use_enrolled_image=False,
             )
+        return id_info_params, options_params
 
-        if (
-            job_type == JobType.ENHANCED_KYC
-            or job_type == JobType.BUSINESS_VERIFICATION
-        ):
-            return self.__call_id_api(
-                partner_params,
-                id_info_params,
-                options_params,
-            )
-
-        if job_type == JobType.BUSINESS_VERIFICATION:
-            return BusinessVerification(
-                self.partner_id, self.api_key, self.sid_server
-            ).submit_job(partner_params, id_info_params)
-
+    def _validate_upload_job(
+        self,
+        partner_params: Dict[str, Any],
+        images_params: List[ImageParams],
+        id_info_params: Dict[str, Any],
+        options_params: OptionsParams,
+    ) -> None:
+        """Validate the params of a job that uploads images."""
         self.__validate_options(options_params)
         validate_images(
             images_params,
             use_enrolled_image=options_params.get("use_enrolled_image", False),
-            job_type=job_type,
+            job_type=partner_params.get("job_type"),
         )
         Utilities.validate_id_params(self.url, id_info_params, partner_params)
         self.__validate_return_data(options_params)
 
-        signature_params = self.signature_params
-        use_enrolled_image = options_params.get("use_enrolled_image", False)
-        prep_upload = WebApi.execute_http(
-            f"{self.url}/upload",
-            self.__prepare_prep_upload_payload(
-                partner_params, signature_params, use_enrolled_image
-            ),
-        )
-        if prep_upload.status_code != 200:
-            raise ServerError(
-                f"Failed to post entity to {self.url}/upload,"
-                f" status={prep_upload.status_code},"
-                f" response={prep_upload.json()}"
-            )
-        prep_upload_json_resp = prep_upload.json()
-        upload_url: str = prep_upload_json_resp["upload_url"]
-        smile_job_id: str = prep_upload_json_resp["smile_job_id"]
-        zip_stream = generate_zip_file(
-            partner_id=self.partner_id,
-            callback_url=self.call_back_url,
-            image_params=images_params,
-            partner_params=partner_params,
-            id_info_params=id_info_params,
-            upload_url=upload_url,
-            signature_params=signature_params,
-        )
-
-        upload_response = WebApi.upload(upload_url, zip_stream)
-        if upload_response.status_code != 200:
-            raise ServerError(
-                f"Failed to post entity to {upload_url},"
-                f" status={upload_response.status_code},"
-                f" response={upload_response.json()}"
-            )
-
-        if options_params["return_job_status"]:
-            self.utilities = Utilities(
-                self.partner_id, self.api_key, self.sid_server
-            )
-            job_status = self.poll_job_status(
-                0, partner_params, options_params, signature_params
-            )
-            return job_status
-        return {"success": True, "smile_job_id": smile_job_id}
-
     def get_web_token(
         self,
         user_id: str,
@@ -213,9 +881,10 @@ class WebApi(Base):
                 "callback_url": callback_url,
                 "partner_id": self.partner_id,
             },
+            self.transport,
         )
 
-        return dict(response.json())
+        return dict(self.transport.codec.decode(response))
 
     def __validate_options(self, options_params: OptionsParams) -> None:
         """Perform validations on options params and callback_url."""
@@ -240,7 +909,7 @@ class WebApi(Base):
                 " job status query"
             )
 
-    def __prepare_prep_upload_payload(
+    def _prepare_prep_upload_payload(
         self,
         partner_params: Dict[str, str],
         signature_params: SignatureParams,
@@ -276,43 +945,82 @@ class WebApi(Base):
         partner_params: Dict[str, str],
         options_params: OptionsParams,
         signature_params: Optional[SignatureParams],
+        callback: Optional["Future[Dict[str, Any]]"] = None,
     ) -> Dict[str, Any]:
-        """Get job status & check completion over some specified duration."""
-        if signature_params is None:
-            signature_params = get_signature(self.partner_id, self.api_key)
+        """Get job status & check completion over some specified duration.
 
-        validate_signature_params(signature_params)
-        counter = counter + 1
-        if counter < 4:
-            time.sleep(2)
-        else:
-            time.sleep(4)
+        The wait before each query comes from the poll schedule of the job
+        type. counter is the number of polls already made, which are skipped.
+        Inside deadline_scope() polling stops with DeadlineExceeded, carrying
+        the last job status, when the next poll would be past the deadline.
+
+        argument(s):
+        signature_params: signature of every query. When None, each query
+            takes a current one from signature_provider, so polls long
+            after the job was submitted are not signed with a stale one.
+        callback: the future CallbackReceiver.register() returned for the
+            job. Its callback cuts the current wait short, so the job is
+            queried as soon as SmileID reports it done, and the job is
+            unregistered from the callback_receiver once it completes.
+        """
+        if signature_params is not None:
+            validate_signature_params(signature_params)
         if not isinstance(self.utilities, Utilities):
             raise ValueError("Utilities not initialized")
-        job_status = self.utilities.get_job_status(
-            partner_params, options_params, signature_params
+        schedule = get_poll_schedule(
+            partner_params.get("job_type"), self.poll_schedules
         )
-
-        if not job_status["job_complete"] and counter < 20:
-            return self.poll_job_status(
-                counter, partner_params, options_params, signature_params
+        deadline = current_deadline()
+        registered = callback is not None
+        job_status: Optional[Dict[str, Any]] = None
+        for delay in itertools.islice(schedule.delays(), counter, None):
+            try:
+                callback = _wait_for_poll(delay, callback, deadline)
+            except DeadlineExceeded as error:
+                error.job_status = job_status
+                raise
+            job_status = self.utilities.get_job_status(
+                partner_params,
+                options_params,
+                signature_params or self.signature_provider.get_signature(),
             )
+            if job_status["job_complete"]:
+                break
 
+        if job_status is None:
+            # The schedule was used up before this call, query once anyway.
+            job_status = self.utilities.get_job_status(
+                partner_params,
+                options_params,
+                signature_params or self.signature_provider.get_signature(),
+            )
+        if (
+            registered
+            and self.callback_receiver is not None
+            and job_status["job_complete"]
+        ):
+            self.callback_receiver.unregister(partner_params)
         return job_status
 
     @staticmethod
-    def execute_http(url: str, payload: Dict[str, str]) -> Response:
+    def execute_http(
+        url: str,
+        payload: Dict[str, str],
+        transport: Optional[Transport] = None,
+    ) -> Response:
         """Send http request to specified endpoint url and return response.
 
         argument(s):
         url: Endpoint url based on api key
         payload: Dictionary containing payload data
+        transport: pooled HTTP transport, defaults to the shared one
 
         Returns:
         Returns Response form post request
         """
-        data = json.dumps(payload)
-        resp = requests.post(
+        transport = transport or get_default_transport()
+        data = transport.codec.dumps(payload)
+        resp = transport.post(
             url=url,
             data=data,
             headers={
@@ -324,9 +1032,69 @@ class WebApi(Base):
         return resp
 
     @staticmethod
-    def upload(url: str, file: Any) -> Response:
+    def upload(
+        url: str, file: Any, transport: Optional[Transport] = None
+    ) -> Response:
         """Send a PUT request to upload file to specified url."""
-        resp = requests.put(
+        transport = transport or get_default_transport()
+        resp = transport.put(
             url=url, data=file, headers={"Content-type": "application/zip"}
         )
         return resp
+
+
+def _wait_for_packing(packing: "Future[bytes]") -> bytes:
+    """Return the images zipped by pipeline_uploads within the deadline."""
+    deadline = current_deadline()
+    if deadline is None:
+        return packing.result()
+    try:
+        return packing.result(deadline.remaining())
+    except FutureTimeoutError as error:
+        packing.cancel()
+        raise DeadlineExceeded(
+            "pack_image_entries", deadline.timeout
+        ) from error
+
+
+def _wait_for_poll(
+    delay: float,
+    callback: Optional["Future[Dict[str, Any]]"],
+    deadline: Optional[Deadline],
+) -> Optional["Future[Dict[str, Any]]"]:
+    """Wait delay seconds before a poll, less if the job's callback arrives.
+
+    argument(s):
+    delay: seconds until the poll is due
+    callback: the job's callback future, None once it has arrived or when
+        there is no callback_receiver
+    deadline: deadline the wait may not outlast
+
+    Returns:
+        The callback future to wait on before the next poll, None once the
+        callback has arrived
+    """
+    if callback is None:
+        if deadline is None:
+            time.sleep(delay)
+        else:
+            deadline.sleep(delay, "poll_job_status")
+        return None
+    if not callback.done():
+        if deadline is not None and delay >= deadline.remaining():
+            raise DeadlineExceeded("poll_job_status", deadline.timeout)
+        wait([callback], timeout=delay)
+    return None if callback.done() else callback
+
+
+def _resolved_handle(
+    partner_params: Dict[str, Any],
+    result: Dict[str, Any],
+    smile_job_id: Optional[str] = None,
+) -> JobHandle:
+    """Return a JobHandle already resolved with result."""
+    handle = JobHandle(partner_params, smile_job_id)
+    handle.status = result
+    handle.set_running_or_notify_cancel()
+    handle.set_result(result)
+    return handle
@@ -1,23 +1,89 @@
 """Defines and exports all classes used throughout this project."""
 
+from smile_id_core.AsyncBusinessVerification import AsyncBusinessVerification
+from smile_id_core.AsyncIdApi import AsyncIdApi
+from smile_id_core.AsyncUtilities import AsyncUtilities
+from smile_id_core.AsyncWebApi import AsyncWebApi
 from smile_id_core.base import Base
+from smile_id_core.batch import JobResult
 from smile_id_core.BusinessVerification import BusinessVerification
+from smile_id_core.cache import JobStatusCache, ZipEntryCache
+from smile_id_core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+from smile_id_core.client import SmileClient
+from smile_id_core.codec import JsonCodec, OrjsonCodec
+from smile_id_core.concurrency import AdaptiveLimiter
 from smile_id_core.constants import ImageTypes, JobType
+from smile_id_core.deadline import Deadline, DeadlineExceeded
 from smile_id_core.IdApi import IdApi
+from smile_id_core.image_upload import CompressionPolicy
+from smile_id_core.ledger import JobLedger
+from smile_id_core.package import PreparedPackage
+from smile_id_core.polling import (
+    DeadlineSchedule,
+    ExponentialSchedule,
+    FixedSchedule,
+    JitteredSchedule,
+    JobHandle,
+    JobStatusPoller,
+    PollSchedule,
+)
+from smile_id_core.rate_limit import RateLimiter
+from smile_id_core.retry import RetryBudget, RetryPolicy
 from smile_id_core.ServerError import ServerError
-from smile_id_core.Signature import Signature
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.transport import AsyncTransport, Transport
+from smile_id_core.upload_slots import UploadSlotPool
 from smile_id_core.Utilities import Utilities, get_version
 from smile_id_core.WebApi import WebApi
+from smile_id_core.webhook import CallbackReceiver
 
 __version__: str = get_version()
 __all__ = [
+    "AdaptiveLimiter",
+    "AsyncBusinessVerification",
+    "AsyncIdApi",
+    "AsyncTransport",
+    "AsyncUtilities",
+    "AsyncWebApi",
     "Base",
     "BusinessVerification",
+    "CallbackReceiver",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitOpenError",
+    "CompressionPolicy",
+    "Deadline",
+    "DeadlineExceeded",
+    "DeadlineSchedule",
+    "ExponentialSchedule",
+    "FixedSchedule",
     "IdApi",
     "ImageTypes",
+    "JitteredSchedule",
+    "JobHandle",
+    "JobLedger",
+    "JobResult",
+    "JobStatusCache",
+    "JobStatusPoller",
     "JobType",
+    "JsonCodec",
+    "OrjsonCodec",
+    "PollSchedule",
+    "PreparedPackage",
+    "RateLimiter",
+    "RetryBudget",
+    "RetryPolicy",
     "ServerError",
     "Signature",
+    "SignatureProvider",
+    "SmileClient",
+    "Transport",
+    "UploadSlotPool",
     "Utilities",
     "WebApi",
+    "ZipEntryCache",
 ]
@@ -1,15 +1,26 @@
 """Constains reusable functions across this repository."""
 
-from typing import Union
+from typing import Any, Optional, Union
 
 from smile_id_core import constants
+from smile_id_core.Signature import SignatureProvider, get_signature_provider
+from smile_id_core.transport import (
+    AsyncTransport,
+    Transport,
+    get_default_transport,
+)
 
 
 class Base:
     """A super class that defines reusable constructor variables."""
 
     def __init__(
-        self, partner_id: str, api_key: str, sid_server: Union[str, int]
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        transport: Optional[Transport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
     ):
         """Initialize all relevant params required for job submission/query.
 
@@ -18,6 +29,11 @@ class Base:
         api_key (str): Api key from the portal
         sid_server (str/int): The server to use for the SID API. 0 for staging
             and 1 for production.
+        transport (Transport): pooled HTTP transport used for every request.
+            Defaults to the process-wide shared transport.
+        signature_provider (SignatureProvider): source of request
+            signatures. Defaults to the one shared by every client with the
+            same partner_id and api_key.
         """
         if not partner_id or not api_key:
             raise ValueError("partner_id or api_key cannot be null or empty")
@@ -28,3 +44,58 @@ class Base:
             self.url = constants.sid_server_map[int(sid_server)]
         else:
             self.url = str(sid_server)
+        self.transport = (
+            transport if transport is not None else get_default_transport()
+        )
+        self.signature_provider = (
+            signature_provider
+            if signature_provider is not None
+            else get_signature_provider(partner_id, api_key)
+        )
+
+
+class AsyncBase(Base):
+    """A super class for the asyncio clients that owns an AsyncTransport."""
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        async_transport: Optional[AsyncTransport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+    ):
+        """Initialize params shared by the asyncio clients.
+
+        argument(s):
+        partner_id (str): Smile partner id from the portal
+        api_key (str): Api key from the portal
+        sid_server (str/int): The server to use for the SID API. 0 for staging
+            and 1 for production.
+        async_transport (AsyncTransport): pooled async HTTP transport. One is
+            created, and closed by aclose(), when not supplied.
+        signature_provider (SignatureProvider): source of request signatures
+        """
+        super().__init__(
+            partner_id,
+            api_key,
+            sid_server,
+            signature_provider=signature_provider,
+        )
+        self._owns_async_transport = async_transport is None
+        self.async_transport = (
+            async_transport if async_transport is not None else AsyncTransport()
+        )
+
+    async def aclose(self) -> None:
+        """Close the async transport if it was created by this client."""
+        if self._owns_async_transport:
+            await self.async_transport.aclose()
+
+    async def __aenter__(self) -> Any:
+        """Return the client itself when used as a context manager."""
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """Close the client when leaving the context manager."""
+        await self.aclose()
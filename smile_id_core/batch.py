@@ -0,0 +1,108 @@
+"""Submit many jobs with bounded concurrency and stream their results."""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+__all__ = ["JobResult", "run_jobs"]
+
+
+class JobResult(NamedTuple):
+    """The outcome of one job submitted by submit_jobs.
+
+    Attributes:
+    position (int): position of the job in the submitted iterable
+    job (Any): the job as it was submitted
+    result (Dict[str, Any]): the submit_job response, None on error
+    error (Exception): the error raised by submit_job, None on success
+    """
+
+    position: int
+    job: Any
+    result: Optional[Dict[str, Any]]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        """Return True when the job was submitted without error."""
+        return self.error is None
+
+
+def run_jobs(
+    submit: Callable[..., Dict[str, Any]],
+    jobs: Iterable[Any],
+    max_in_flight: int = 4,
+    ordered: bool = False,
+) -> Iterator[JobResult]:
+    """Call submit for every job on a worker pool and yield the outcomes.
+
+    Jobs are read from the iterable lazily, only when a worker is free, so
+    arbitrarily long or generated inputs use constant memory. A job is
+    either a mapping of submit's keyword arguments or a sequence of its
+    positional arguments. Errors raised by one job are returned in its
+    JobResult and do not stop the others.
+
+    argument(s):
+    submit: function that submits one job, e.g. WebApi.submit_job
+    jobs: iterable of jobs
+    max_in_flight: maximum number of jobs being submitted at once
+    ordered: yield results in input order instead of completion order.
+        A slow job then holds back the results, and new submissions, of
+        the jobs after it.
+
+    Returns:
+        An iterator of JobResult
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be >= 1")
+
+    def call(job: Any) -> Dict[str, Any]:
+        if isinstance(job, Mapping):
+            return submit(**job)
+        return submit(*job)
+
+    pending = enumerate(jobs)
+    in_flight: Dict["Future[Dict[str, Any]]", Tuple[int, Any]] = {}
+    finished: Dict[int, JobResult] = {}
+    next_index = 0
+    with ThreadPoolExecutor(
+        max_workers=max_in_flight, thread_name_prefix="smile-id-batch"
+    ) as executor:
+        try:
+            while True:
+                while len(in_flight) + len(finished) < max_in_flight:
+                    item = next(pending, None)
+                    if item is None:
+                        break
+                    in_flight[executor.submit(call, item[1])] = item
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, job = in_flight.pop(future)
+                    error = future.exception()
+                    if error is not None and not isinstance(error, Exception):
+                        raise error
+                    outcome = JobResult(
+                        index, job, None if error else future.result(), error
+                    )
+                    if ordered:
+                        finished[index] = outcome
+                    else:
+                        yield outcome
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            for future in in_flight:
+                future.cancel()
@@ -0,0 +1,247 @@
+"""Cache job status responses that have been signature-verified.
+
+The status of a completed job never changes, so JobStatusCache keeps it
+until it is evicted to make room for more recent entries. The status of a
+job still in progress is only kept for a short TTL, which spares repeated
+queries made within a moment of each other without hiding progress for
+long.
+
+ZipEntryCache keeps the image entries of job zip files, compressed and
+ready to be written, so an image submitted with several jobs is only read
+and compressed once.
+"""
+
+import collections
+import copy
+import threading
+import time
+import zipfile
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    NamedTuple,
+    Optional,
+    OrderedDict,
+    Tuple,
+)
+
+__all__ = [
+    "CacheStats",
+    "JobStatusCache",
+    "JobStatusKey",
+    "ZipEntry",
+    "ZipEntryCache",
+]
+
+# (user_id, job_id, image_links, history): the option flags change what a
+# job status response contains, so they are part of the key.
+JobStatusKey = Tuple[str, str, bool, bool]
+# (expiry time, or None for completed jobs, and the job status)
+_Entry = Tuple[Optional[float], Dict[str, Any]]
+
+
+class CacheStats(NamedTuple):
+    """Counters of a JobStatusCache.
+
+    Attributes:
+    hits (int): lookups answered from the cache
+    misses (int): lookups that were not
+    evictions (int): entries dropped to make room for others
+    size (int): entries held
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class JobStatusCache:
+    """LRU cache of job status responses with a TTL for incomplete jobs.
+
+    A single cache is safe to share between threads and between clients
+    with the same credentials. Statuses are copied in and out, so callers
+    may modify the dicts they get.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        pending_ttl: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize an empty cache.
+
+        argument(s):
+        max_entries: entries held before the least recently used is evicted
+        pending_ttl: seconds the status of a job that is not complete is
+            served from the cache. 0 only caches completed jobs.
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if max_entries < 1 or pending_ttl < 0:
+            raise ValueError(
+                "max_entries must be >= 1 and pending_ttl cannot be negative"
+            )
+        self.max_entries = max_entries
+        self.pending_ttl = pending_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[JobStatusKey, _Entry] = (
+            collections.OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(user_id: str, job_id: str, options: Any) -> JobStatusKey:
+        """Return the key of a job status query.
+
+        argument(s):
+        user_id: the user_id of the job
+        job_id: the job_id of the job
+        options: the OptionsParams of the query
+        """
+        return (
+            user_id,
+            job_id,
+            bool(options.get("return_images")),
+            bool(options.get("return_history")),
+        )
+
+    def get(self, key: JobStatusKey) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached status of key, if fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, job_status = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return copy.deepcopy(job_status)
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: JobStatusKey, job_status: Dict[str, Any]) -> None:
+        """Cache a verified job status, if it may be cached."""
+        expires_at: Optional[float] = None
+        if not job_status.get("job_complete"):
+            if self.pending_ttl <= 0:
+                return
+            expires_at = self._clock() + self.pending_ttl
+        entry: _Entry = (expires_at, copy.deepcopy(job_status))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: JobStatusKey) -> None:
+        """Drop the cached status of key, if any."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return the hit, miss and eviction counters and the size."""
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._evictions, len(self._entries)
+            )
+
+
+class ZipEntry(NamedTuple):
+    """A zip entry ready to be written to any archive.
+
+    Attributes:
+    zip_info (zipfile.ZipInfo): name, date, CRC, sizes and compression of
+        the entry, copied before it is added to an archive
+    data (bytes): the entry's data, compressed
+    """
+
+    zip_info: zipfile.ZipInfo
+    data: bytes
+
+
+class ZipEntryCache:
+    """LRU cache of zip entries bounded by the size of their data.
+
+    Entries are keyed by the identity of their content, see
+    image_upload.generate_zip_file, so an image submitted again is written
+    from the cache without being read or compressed. A single cache is safe
+    to share between threads and clients.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize an empty cache.
+
+        argument(s):
+        max_bytes: total size of the entries' data held before the least
+            recently used entries are evicted. Larger entries are not kept.
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, ZipEntry] = (
+            collections.OrderedDict()
+        )
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[ZipEntry]:
+        """Return the entry cached under key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: ZipEntry) -> None:
+        """Cache an entry, if its data fits in max_bytes."""
+        if len(entry.data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= len(previous.data)
+            self._entries[key] = entry
+            self._nbytes += len(entry.data)
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted.data)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Return the total size of the entries' data held."""
+        with self._lock:
+            return self._nbytes
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return the hit, miss and eviction counters and the size."""
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._evictions, len(self._entries)
+            )
@@ -0,0 +1,236 @@
+"""Fail fast on endpoints that keep failing.
+
+Each endpoint gets its own CircuitBreaker. While the recent error rate of
+an endpoint is low its circuit is closed and requests go through. Once
+the error rate crosses a threshold the circuit opens and requests fail
+immediately with CircuitOpenError instead of waiting out another
+failure. After a cool-down a few probe requests are let through
+(half-open): if they succeed the circuit closes, otherwise it opens again.
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+from smile_id_core.retry import RETRYABLE_STATUS_CODES
+from smile_id_core.ServerError import ServerError
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitOpenError",
+    "endpoint_key",
+]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ServerError):
+    """Raised in place of a request to an endpoint whose circuit is open.
+
+    Attributes:
+    endpoint (str): the endpoint whose circuit is open
+    retry_after (float): seconds until the circuit lets a probe through
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        """Build the error message."""
+        super().__init__(
+            f"Circuit open for {endpoint}, failing fast for another"
+            f" {retry_after:.1f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Track the outcomes of one endpoint's requests and open on failure.
+
+    The error rate is measured over the last window_size requests and only
+    once at least minimum_calls of them were made.
+
+    Attributes:
+    endpoint (str): the endpoint this breaker protects
+    state (str): "closed", "open" or "half_open"
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 20,
+        window_size: int = 50,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a closed circuit.
+
+        argument(s):
+        endpoint: the endpoint this breaker protects
+        failure_rate_threshold: fraction of failed requests, between 0 and
+            1, at which the circuit opens
+        minimum_calls: requests needed in the window before the error rate
+            is acted on
+        window_size: number of most recent requests the error rate is
+            measured over
+        reset_timeout: seconds the circuit stays open before probing
+        half_open_max_calls: probe requests allowed at once when half-open
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be in (0, 1]")
+        if minimum_calls < 1 or window_size < minimum_calls:
+            raise ValueError("window_size must be >= minimum_calls >= 1")
+        if reset_timeout < 0 or half_open_max_calls < 1:
+            raise ValueError(
+                "reset_timeout cannot be negative and half_open_max_calls"
+                " must be >= 1"
+            )
+        self.endpoint = endpoint
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = collections.deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state, moving from open to half-open if due."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def before_call(self) -> bool:
+        """Reserve a request, or raise CircuitOpenError if it must not run.
+
+        Returns:
+            bool: whether the request is a half-open probe. A probe that
+            ends without an outcome, e.g. because it was cancelled, must be
+            given back with release_probe().
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return False
+            if (
+                self._state == HALF_OPEN
+                and self._probes < self.half_open_max_calls
+            ):
+                self._probes += 1
+                return True
+            retry_after = max(
+                0.0, self._opened_at + self.reset_timeout - self._clock()
+            )
+        raise CircuitOpenError(self.endpoint, retry_after)
+
+    def release_probe(self) -> None:
+        """Give back a probe reserved by before_call() without an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        """Record a request that reached a healthy endpoint."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._probes = 0
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed request and open the circuit if needed."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(False)
+            if len(self._outcomes) < self.minimum_calls:
+                return
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open()
+
+    def record_status(self, status_code: int) -> None:
+        """Record a response, failed when its status is 429 or 5xx."""
+        if status_code in RETRYABLE_STATUS_CODES:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _open(self) -> None:
+        """Open the circuit. Holds the lock."""
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self._probes = 0
+
+    def _refresh_state(self) -> None:
+        """Move an open circuit to half-open after reset_timeout."""
+        if (
+            self._state == OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = HALF_OPEN
+            self._probes = 0
+
+
+class CircuitBreakerRegistry:
+    """Create and keep one CircuitBreaker per endpoint.
+
+    Attributes:
+    enabled (bool): whether requests are checked against their breakers
+    """
+
+    def __init__(self, enabled: bool = True, **breaker_options: Any):
+        """Initialize the registry.
+
+        argument(s):
+        enabled: False lets every request through and records nothing
+        breaker_options: keyword arguments of every CircuitBreaker created,
+            such as failure_rate_threshold or reset_timeout
+        """
+        self.enabled = enabled
+        self.breaker_options = breaker_options
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> Optional[CircuitBreaker]:
+        """Return the breaker of the endpoint url belongs to.
+
+        Returns:
+            The endpoint's CircuitBreaker, or None if the registry is
+            disabled
+        """
+        if not self.enabled:
+            return None
+        key = endpoint_key(url)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key, **self.breaker_options)
+                self._breakers[key] = breaker
+            return breaker
+
+
+def endpoint_key(url: str) -> str:
+    """Return the endpoint a request url is counted against.
+
+    SmileID endpoints such as {url}/upload or {url}/job_status are keyed by
+    their full path. Presigned upload URLs carry a query string and a path
+    unique to each job, so they are keyed by their host.
+    """
+    parts = urlsplit(url)
+    if parts.query:
+        return f"{parts.scheme}://{parts.netloc}"
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
@@ -0,0 +1,145 @@
+"""SmileClient gives access to every product from one shared configuration."""
+
+from typing import Any, Mapping, Optional, Union
+
+from smile_id_core.BusinessVerification import BusinessVerification
+from smile_id_core.cache import JobStatusCache, ZipEntryCache
+from smile_id_core.concurrency import AdaptiveLimiter
+from smile_id_core.constants import JobType
+from smile_id_core.IdApi import IdApi
+from smile_id_core.image_upload import DEFAULT_SPOOL_SIZE, CompressionPolicy
+from smile_id_core.ledger import JobLedger
+from smile_id_core.polling import JobStatusPoller, PollSchedule
+from smile_id_core.Signature import SignatureProvider, get_signature_provider
+from smile_id_core.transport import Transport, get_default_transport
+from smile_id_core.upload_slots import UploadSlotPool
+from smile_id_core.Utilities import Utilities
+from smile_id_core.WebApi import WebApi
+from smile_id_core.webhook import CallbackReceiver
+
+__all__ = ["SmileClient"]
+
+
+class SmileClient:
+    """Build each product client once and share what they have in common.
+
+    The web, id_api, kyb and utilities clients are created together and
+    share one transport, one signature provider and one Utilities, so
+    submitting jobs does not create new clients or connection pools.
+
+    Attributes:
+    web (WebApi): client for image based jobs
+    id_api (IdApi): client for Enhanced KYC jobs
+    kyb (BusinessVerification): client for Business Verification jobs
+    utilities (Utilities): client for job status queries
+    """
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        sid_server: Union[str, int],
+        call_back_url: str = "",
+        transport: Optional[Transport] = None,
+        signature_provider: Optional[SignatureProvider] = None,
+        poll_schedules: Optional[Mapping[JobType, PollSchedule]] = None,
+        callback_receiver: Optional[CallbackReceiver] = None,
+        stream_uploads: bool = False,
+        compression: Optional[CompressionPolicy] = None,
+        concurrency_limiter: Optional[AdaptiveLimiter] = None,
+        job_status_cache: Optional[JobStatusCache] = None,
+        ledger: Optional[JobLedger] = None,
+        poller: Optional[JobStatusPoller] = None,
+        pipeline_uploads: bool = False,
+        upload_slots: Optional[UploadSlotPool] = None,
+        entry_cache: Optional[ZipEntryCache] = None,
+        spool_size: int = DEFAULT_SPOOL_SIZE,
+    ):
+        """Create the product clients.
+
+        argument(s):
+        partner_id: distinct id of partner
+        api_key: api key from the partner portal
+        sid_server: The server to use for the SID API. 0 for staging and 1 for
+            production.
+        call_back_url: Callback url for image based jobs
+        transport: pooled HTTP transport, defaults to the shared one
+        signature_provider: source of request signatures, defaults to the
+            one shared by clients with the same credentials
+        poll_schedules, callback_receiver, stream_uploads, compression,
+        ledger, poller, pipeline_uploads, upload_slots, entry_cache,
+        spool_size: options of the web client, see WebApi
+        concurrency_limiter: adaptive limit on the jobs in flight, shared
+            by the web and id_api clients
+        job_status_cache: cache of verified job statuses used by the
+            shared Utilities
+        """
+        self.partner_id = partner_id
+        self.sid_server = sid_server
+        self.transport = (
+            transport if transport is not None else get_default_transport()
+        )
+        self.signature_provider = (
+            signature_provider
+            if signature_provider is not None
+            else get_signature_provider(partner_id, api_key)
+        )
+        self.utilities = Utilities(
+            partner_id,
+            api_key,
+            sid_server,
+            self.transport,
+            self.signature_provider,
+            job_status_cache,
+        )
+        self.kyb = BusinessVerification(
+            partner_id,
+            api_key,
+            sid_server,
+            self.transport,
+            self.signature_provider,
+            self.utilities,
+        )
+        self.id_api = IdApi(
+            partner_id,
+            api_key,
+            sid_server,
+            self.transport,
+            self.signature_provider,
+            self.utilities,
+            self.kyb,
+            concurrency_limiter,
+        )
+        self.web = WebApi(
+            partner_id,
+            call_back_url,
+            api_key,
+            sid_server,
+            self.transport,
+            poll_schedules=poll_schedules,
+            callback_receiver=callback_receiver,
+            stream_uploads=stream_uploads,
+            compression=compression,
+            signature_provider=self.signature_provider,
+            utilities=self.utilities,
+            id_api=self.id_api,
+            concurrency_limiter=concurrency_limiter,
+            ledger=ledger,
+            poller=poller,
+            pipeline_uploads=pipeline_uploads,
+            upload_slots=upload_slots,
+            entry_cache=entry_cache,
+            spool_size=spool_size,
+        )
+
+    def close(self) -> None:
+        """Stop the worker threads of the web client, see WebApi.close()."""
+        self.web.close()
+
+    def __enter__(self) -> "SmileClient":
+        """Return the client itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the client when leaving the context manager."""
+        self.close()
@@ -0,0 +1,81 @@
+"""Encode request payloads and decode responses as JSON.
+
+Every client encodes and decodes through the codec of its transport.
+JsonCodec uses the standard library and is the default. OrjsonCodec uses
+orjson, an optional dependency, which encodes straight to bytes and
+decodes large job status responses several times faster.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+__all__ = ["JsonCodec", "OrjsonCodec", "get_codec"]
+
+
+class JsonCodec:
+    """JSON codec built on the standard library json module."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        """Return obj encoded as JSON."""
+        return json.dumps(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Return the object encoded in a JSON document."""
+        return json.loads(data)
+
+    def decode(self, response: Any) -> Any:
+        """Return the JSON body of a requests or httpx response."""
+        return response.json()
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON codec built on orjson.
+
+    Payloads are encoded to compact UTF-8 bytes, and response bodies are
+    decoded from their raw content without first being decoded to text.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        """Check that orjson is installed."""
+        if orjson is None:
+            raise ImportError(
+                "OrjsonCodec requires orjson, install it with"
+                " `pip install orjson`"
+            )
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        """Return obj encoded as JSON bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Return the object encoded in a JSON document."""
+        return orjson.loads(data)
+
+    def decode(self, response: Any) -> Any:
+        """Return the JSON body of a requests or httpx response."""
+        return orjson.loads(response.content)
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """Return a codec by name.
+
+    argument(s):
+    name: "json", "orjson", or "auto" for orjson when it is installed and
+        the standard library otherwise
+    """
+    if name == "auto":
+        return OrjsonCodec() if orjson is not None else JsonCodec()
+    if name == "json":
+        return JsonCodec()
+    if name == "orjson":
+        return OrjsonCodec()
+    raise ValueError(f"Unknown JSON codec {name!r}")
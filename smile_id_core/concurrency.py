@@ -0,0 +1,233 @@
+"""Adapt the number of jobs submitted at once to what the API can take.
+
+AdaptiveLimiter caps the submissions in flight with an
+additive-increase/multiplicative-decrease (AIMD) limit. While submissions
+succeed and their latency stays close to its usual level the limit grows
+by about one per round of submissions. A timeout, a 429 or 5xx response,
+an open circuit or a latency spike cuts it by decrease_factor, so
+throughput follows the backend instead of a hand-tuned max_in_flight.
+
+The latency of a submission is the time spent in its API calls, as
+reported by the transport with record_rpc_latency(), so zipping, rate
+limit waits, retry backoff and the upload to the storage host do not
+count as backend load.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, List, Optional, TypeVar
+
+from smile_id_core.circuit_breaker import CircuitOpenError
+from smile_id_core.deadline import DeadlineExceeded, current_deadline
+from smile_id_core.retry import RETRYABLE_ERRORS, RETRYABLE_STATUS_CODES
+from smile_id_core.ServerError import ServerError
+
+__all__ = ["AdaptiveLimiter", "is_overload", "record_rpc_latency"]
+
+T = TypeVar("T")
+
+# Durations of the API calls made by the submission AdaptiveLimiter.run()
+# is timing in this context, if any.
+_rpc_latencies: "contextvars.ContextVar[Optional[List[float]]]" = (
+    contextvars.ContextVar("smile_id_rpc_latencies", default=None)
+)
+
+
+def record_rpc_latency(seconds: float) -> None:
+    """Count an API call towards the latency of the running submission."""
+    latencies = _rpc_latencies.get()
+    if latencies is not None:
+        latencies.append(seconds)
+
+
+def is_overload(error: BaseException) -> bool:
+    """Return True when an error shows the API is overloaded.
+
+    Timeouts, connection errors, open circuits and ServerErrors for 429 or
+    5xx responses are overloads. Validation and other client errors are not.
+    """
+    if isinstance(error, (CircuitOpenError,) + RETRYABLE_ERRORS):
+        return True
+    return (
+        isinstance(error, ServerError)
+        and error.status_code in RETRYABLE_STATUS_CODES
+    )
+
+
+class AdaptiveLimiter:
+    """Limit concurrent submissions with an AIMD limit.
+
+    A single limiter is safe to share between threads and between the
+    WebApi and IdApi clients that submit to the same partner account.
+
+    Attributes:
+    limit (float): the current concurrency limit
+    in_flight (int): submissions currently holding a slot
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the limiter.
+
+        argument(s):
+        initial_limit: submissions allowed at once to begin with
+        min_limit: the limit is never cut below this
+        max_limit: the limit never grows past this
+        increase: growth of the limit per round of successful submissions
+        decrease_factor: factor, between 0 and 1, the limit is multiplied
+            by on an overload
+        latency_tolerance: a submission slower than this many times the
+            usual latency is treated as an overload
+        smoothing: weight, between 0 and 1, of each new sample in the
+            moving average of the usual latency. Every successful
+            submission is a sample, slow ones included, so the usual
+            latency follows a lasting change instead of cutting the limit
+            forever.
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "limits must satisfy 1 <= min_limit <= initial_limit"
+                " <= max_limit"
+            )
+        if increase <= 0 or not 0 < decrease_factor < 1:
+            raise ValueError(
+                "increase must be positive and decrease_factor in (0, 1)"
+            )
+        if latency_tolerance <= 1 or not 0 < smoothing <= 1:
+            raise ValueError(
+                "latency_tolerance must be > 1 and smoothing in (0, 1]"
+            )
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        # Incremented on every decrease. Submissions started before the
+        # latest one cannot cause another, so one overload seen by many
+        # concurrent submissions only cuts the limit once.
+        self._epoch = 0
+
+    @property
+    def limit(self) -> float:
+        """Return the current concurrency limit."""
+        with self._condition:
+            return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of submissions currently holding a slot."""
+        with self._condition:
+            return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """Wait for a free slot and take it.
+
+        Inside deadline_scope() the wait ends with the deadline.
+
+        argument(s):
+        timeout: most seconds to wait, None to wait until a slot is free
+
+        Returns:
+            A token to pass back to release()
+
+        Raises:
+            DeadlineExceeded: the deadline passed before a slot was free
+            TimeoutError: timeout passed before a slot was free
+        """
+        deadline = current_deadline()
+        wait = timeout
+        if deadline is not None and (
+            wait is None or deadline.remaining() < wait
+        ):
+            wait = deadline.remaining()
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._in_flight < int(self._limit), wait
+            ):
+                if deadline is not None and wait != timeout:
+                    raise DeadlineExceeded(
+                        "concurrency_limiter", deadline.timeout
+                    )
+                raise TimeoutError(f"No concurrency slot free in {timeout}s")
+            self._in_flight += 1
+            return self._epoch
+
+    def release(self, token: int, latency: float, overload: bool) -> None:
+        """Give back a slot and adjust the limit to its outcome.
+
+        argument(s):
+        token: the value returned by acquire()
+        latency: seconds the submission spent waiting for the API
+        overload: whether the submission failed because of an overload
+        """
+        with self._condition:
+            saturated = self._in_flight >= int(self._limit)
+            self._in_flight -= 1
+            baseline = self._baseline
+            if not overload:
+                self._baseline = (
+                    latency
+                    if baseline is None
+                    else baseline + self.smoothing * (latency - baseline)
+                )
+                overload = (
+                    baseline is not None
+                    and latency > baseline * self.latency_tolerance
+                )
+            if overload:
+                if token == self._epoch:
+                    self._epoch += 1
+                    self._limit = max(
+                        float(self.min_limit),
+                        self._limit * self.decrease_factor,
+                    )
+            else:
+                # Only grow a limit that is actually reached, otherwise an
+                # idle client would end up allowed max_limit submissions.
+                if saturated:
+                    self._limit = min(
+                        float(self.max_limit),
+                        self._limit + self.increase / self._limit,
+                    )
+            self._condition.notify_all()
+
+    def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call func in a slot, timing it and recording its outcome.
+
+        The latency recorded is the time func spent in API calls, or its
+        whole duration when it made none through a Transport.
+
+        Returns:
+            What func returns. Errors raised by func are re-raised.
+        """
+        token = self.acquire()
+        latencies: List[float] = []
+        context_token = _rpc_latencies.set(latencies)
+        started = self._clock()
+        overload = False
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            overload = is_overload(error)
+            raise
+        finally:
+            _rpc_latencies.reset(context_token)
+            latency = sum(latencies) if latencies else self._clock() - started
+            self.release(token, latency, overload)
@@ -0,0 +1,150 @@
+"""Bound the total time of an operation across all of its requests.
+
+A Deadline is a point in time after which an operation gives up. Code run
+inside deadline_scope() sees it through current_deadline(): Transport caps
+the connect and read timeouts of every request by the time left, skips
+retries and rate limit waits that would end past it, and WebApi stops
+polling. When the deadline passes DeadlineExceeded is raised with what is
+known of the job so far, e.g. its smile_job_id.
+
+    with deadline_scope(30):
+        utilities.get_job_status(partner_params, options_params)
+"""
+
+import contextlib
+import contextvars
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from smile_id_core.ServerError import ServerError
+
+__all__ = [
+    "Deadline",
+    "DeadlineExceeded",
+    "current_deadline",
+    "deadline_scope",
+]
+
+Timeout = Union[float, Tuple[float, float]]
+
+_current: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar(
+    "smile_id_deadline", default=None
+)
+
+
+class DeadlineExceeded(ServerError):
+    """Raised when an operation runs past its deadline.
+
+    Attributes:
+    stage (str): what was being done, e.g. the url of a request
+    timeout (float): the total seconds the operation was given
+    smile_job_id (Optional[str]): id of the job, if it was uploaded
+    job_status (Optional[Dict[str, Any]]): the last job status received
+        while polling, if any
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        timeout: float,
+        smile_job_id: Optional[str] = None,
+        job_status: Optional[Dict[str, Any]] = None,
+    ):
+        """Build the error message."""
+        super().__init__(f"Deadline of {timeout:g}s exceeded during {stage}")
+        self.stage = stage
+        self.timeout = timeout
+        self.smile_job_id = smile_job_id
+        self.job_status = job_status
+
+
+class Deadline:
+    """A point in time after which an operation gives up.
+
+    Attributes:
+    timeout (float): the total seconds the operation was given
+    """
+
+    def __init__(
+        self, timeout: float, clock: Callable[[], float] = time.monotonic
+    ):
+        """Start the deadline timeout seconds from now.
+
+        argument(s):
+        timeout: total seconds the operation may take
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if timeout < 0:
+            raise ValueError("timeout cannot be negative")
+        self.timeout = timeout
+        self._clock = clock
+        self._ends_at = clock() + timeout
+
+    def remaining(self) -> float:
+        """Return the seconds left, 0 once the deadline has passed."""
+        return max(0.0, self._ends_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        """Return True once the deadline has passed."""
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(stage, self.timeout)
+
+    def sleep(self, seconds: float, stage: str = "wait") -> None:
+        """Sleep, or raise DeadlineExceeded if the wait would outlast it."""
+        if seconds >= self.remaining():
+            raise DeadlineExceeded(stage, self.timeout)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def cap(self, timeout: Optional[Timeout]) -> Timeout:
+        """Return a requests timeout shortened to the time left.
+
+        argument(s):
+        timeout: a timeout in seconds, a (connect, read) tuple or None
+        """
+        remaining = self.remaining()
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return min(connect, remaining), min(read, remaining)
+        return min(timeout, remaining)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the running deadline_scope(), if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(
+    deadline: Union[None, float, Deadline],
+) -> Iterator[Optional[Deadline]]:
+    """Apply a deadline to everything run inside the block.
+
+    A scope nested in another keeps whichever deadline is sooner.
+
+    argument(s):
+    deadline: a Deadline, seconds from now, or None to keep the current one
+
+    Returns:
+        The deadline in force inside the block
+    """
+    outer = _current.get()
+    if deadline is None:
+        yield outer
+        return
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    if outer is not None and outer.remaining() <= deadline.remaining():
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
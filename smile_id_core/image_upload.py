@@ -1,15 +1,38 @@
 """Prepare & validate image data, and generate zipped file to be submitted."""
 
+import contextlib
+import copy
+import hashlib
 import io
-import json
 import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import warnings
 import zipfile
-from typing import Any, ByteString, Dict, List, Optional, cast
+from typing import (
+    Any,
+    ByteString,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 from smile_id_core import constants
+from smile_id_core.cache import ZipEntry, ZipEntryCache
+from smile_id_core.codec import JsonCodec
 from smile_id_core.constants import JobType
 from smile_id_core.types import (
     Base64Image,
+    BinaryImage,
     FileImage,
     ImageParams,
     SignatureParams,
@@ -28,6 +51,55 @@ class ApiVersion:
 IMAGE_FILE_EXTENSIONS = (".png", ".jpg", ".jpeg")
 
 
+class CompressionPolicy:
+    """Choose how each entry of a job's zip file is compressed.
+
+    JPEG and PNG images are already compressed and barely shrink when
+    deflated, so they are stored as they are; info.json and any other
+    entry is deflated.
+
+    Attributes:
+    compresslevel (int): deflate level from 0 to 9, None for zlib's default
+    stored_extensions (tuple): file extensions of entries that are stored
+    """
+
+    def __init__(
+        self,
+        compresslevel: Optional[int] = None,
+        stored_extensions: Tuple[str, ...] = IMAGE_FILE_EXTENSIONS,
+    ):
+        """Initialize the policy.
+
+        argument(s):
+        compresslevel: deflate level from 0 (fastest) to 9 (smallest)
+        stored_extensions: lower case extensions of entries written
+            without compression. An empty tuple deflates every entry.
+        """
+        if compresslevel is not None and not 0 <= compresslevel <= 9:
+            raise ValueError("compresslevel must be between 0 and 9")
+        self.compresslevel = compresslevel
+        self.stored_extensions = stored_extensions
+
+    def compression_for(self, arcname: str) -> Tuple[int, Optional[int]]:
+        """Return the compress_type and compresslevel of an entry."""
+        if self.stored_extensions and arcname.lower().endswith(
+            self.stored_extensions
+        ):
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, self.compresslevel
+
+
+DEFAULT_COMPRESSION_POLICY = CompressionPolicy()
+
+# Size of the reads from image files and of the chunks yielded by
+# iter_zip_file.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Largest zip file spool_zip_file keeps in memory before moving it to a
+# temporary file. Kept small, as every upload in flight holds one.
+DEFAULT_SPOOL_SIZE = 1024 * 1024
+
+
 def generate_zip_file(
     partner_id: str,
     callback_url: str,
@@ -36,6 +108,10 @@ def generate_zip_file(
     image_params: List[ImageParams],
     id_info_params: Dict[str, str],
     signature_params: SignatureParams,
+    compression: Optional[CompressionPolicy] = None,
+    codec: Optional[JsonCodec] = None,
+    packed_images: Optional[bytes] = None,
+    entry_cache: Optional[ZipEntryCache] = None,
 ) -> ByteString:
     """Create zipped file with a number of various params.
 
@@ -47,6 +123,17 @@ def generate_zip_file(
         image_params
         id_info_params
         signature params
+        compression: how entries are compressed, defaults to
+            DEFAULT_COMPRESSION_POLICY
+        codec: JSON codec that encodes info.json, defaults to JsonCodec
+        packed_images: the image entries packed by pack_image_entries
+            beforehand. info.json is appended to them instead of zipping
+            the images again.
+        entry_cache: cache of compressed image entries. Images given as
+            a path are looked up by path, modification time and size,
+            those given as bytes by a hash of their content. Images given
+            as file objects are not cached, and the cache is not used
+            where ZipFile cannot splice entries, see WebApi.
     Returns: zipped filed of ByteString type
     """
     info_json = prepare_info_json(
@@ -58,31 +145,539 @@ def generate_zip_file(
         id_info_params,
         signature_params,
     )
-    zip_buffer = io.BytesIO()
+    compression = compression or DEFAULT_COMPRESSION_POLICY
+    # Appending to packed images only rewrites the central directory.
+    zip_buffer = io.BytesIO(packed_images or b"")
     with zipfile.ZipFile(
         zip_buffer, "a", zipfile.ZIP_DEFLATED, False
     ) as zip_file:
-        zip_file.writestr("info.json", data=json.dumps(info_json))
-        for image in image_params:
-            if (
-                "image" in image
-                and image["image_type_id"] in constants.BASE64_IMAGE_TYPES
-            ):
-                image = cast(Base64Image, image)
+        zip_file.writestr(
+            "info.json",
+            (codec or JsonCodec()).dumps(info_json),
+            *compression.compression_for("info.json"),
+        )
+        if packed_images is None:
+            _write_image_entries(
+                zip_file, image_params, compression, entry_cache
+            )
+    return zip_buffer.getvalue()
+
+
+def pack_image_entries(
+    image_params: List[ImageParams],
+    compression: Optional[CompressionPolicy] = None,
+    entry_cache: Optional[ZipEntryCache] = None,
+) -> bytes:
+    """Zip the image entries of a job, without info.json.
+
+    Only info.json depends on the upload_url returned by the upload
+    preparation request, so the images can be read and compressed while
+    that request is in flight, then passed to generate_zip_file as
+    packed_images. info.json is then the last entry of the zip file
+    instead of the first.
+
+    argument(s):
+        image_params
+        compression: how entries are compressed, defaults to
+            DEFAULT_COMPRESSION_POLICY
+        entry_cache: cache of compressed image entries, see
+            generate_zip_file
+    Returns: a zip file holding the image entries
+    """
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(
+        zip_buffer, "w", zipfile.ZIP_DEFLATED, False
+    ) as zip_file:
+        _write_image_entries(
+            zip_file,
+            image_params,
+            compression or DEFAULT_COMPRESSION_POLICY,
+            entry_cache,
+        )
+    return zip_buffer.getvalue()
+
+
+def iter_zip_file(
+    partner_id: str,
+    callback_url: str,
+    upload_url: str,
+    partner_params: Dict[str, Any],
+    image_params: List[ImageParams],
+    id_info_params: Dict[str, str],
+    signature_params: SignatureParams,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    compression: Optional[CompressionPolicy] = None,
+    codec: Optional[JsonCodec] = None,
+    entry_cache: Optional[ZipEntryCache] = None,
+) -> Iterator[bytes]:
+    """Create the same zipped file as generate_zip_file, in chunks.
+
+    Image files are read from disk chunk_size bytes at a time and every
+    compressed chunk is yielded as soon as it is written, so only a few
+    buffers are held in memory whatever the number and size of the images.
+    The zip is written without seeking, so each entry's sizes and CRC follow
+    its data in a data descriptor. Parameters are validated when this is
+    called, not when the first chunk is read.
+
+    argument(s):
+        partner_id
+        callback_url
+        upload_url
+        partner_params
+        image_params
+        id_info_params
+        signature params
+        chunk_size: number of bytes read from image files at once
+        compression: how entries are compressed, defaults to
+            DEFAULT_COMPRESSION_POLICY
+        codec: JSON codec that encodes info.json, defaults to JsonCodec
+        entry_cache: cache of compressed image entries, see
+            generate_zip_file. Images missing from it are compressed in
+            memory to be cached instead of being streamed.
+    Returns: an iterator of the zipped file's bytes
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    info_json = prepare_info_json(
+        partner_id,
+        callback_url,
+        upload_url,
+        partner_params,
+        image_params,
+        id_info_params,
+        signature_params,
+    )
+    return _stream_zip(
+        (codec or JsonCodec()).dumps(info_json),
+        image_params,
+        chunk_size,
+        compression or DEFAULT_COMPRESSION_POLICY,
+        entry_cache,
+    )
+
+
+def spool_zip_file(
+    chunks: Iterable[bytes], max_memory: int = DEFAULT_SPOOL_SIZE
+) -> "SpooledZipFile":
+    """Collect the chunks of iter_zip_file into an upload body of known size.
+
+    Upload hosts such as S3 presigned URLs reject chunked transfer encoding,
+    so a streamed zip file is written to a temporary file, held in memory
+    up to max_memory bytes, and sent from it with a Content-Length.
+
+    argument(s):
+        chunks: the zip file's bytes, as returned by iter_zip_file
+        max_memory: bytes held in memory before the spool moves to disk
+    Returns: a readable, seekable body; close it once it is uploaded
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return SpooledZipFile(spool)
+
+
+class SpooledZipFile(io.RawIOBase):
+    """Upload body reading a zip file spooled by spool_zip_file.
+
+    Its len() lets requests send a Content-Length instead of chunks.
+    """
+
+    def __init__(self, spool: Any):
+        self._spool = spool
+        self._length = int(spool.tell())
+        spool.seek(0)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return int(self._spool.tell())
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return int(self._spool.seek(offset, whence))
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        data = self._spool.read(len(view))
+        view[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._spool.close()
+        super().close()
+
+
+# How the content of a zip entry is given: the path of a file, a str or
+# bytes-like object, or a binary file object.
+_PATH = "path"
+_DATA = "data"
+_STREAM = "stream"
+
+
+def _zip_entries(
+    image_params: List[ImageParams],
+) -> Iterator[Tuple[str, Any, str]]:
+    """Yield the image entries of a job's zip file.
+
+    Returns: tuples of the entry name, its content and how the content is
+    given, one of _PATH, _DATA and _STREAM.
+    """
+    for image in image_params:
+        if (
+            "image" in image
+            and image["image_type_id"] in constants.BASE64_IMAGE_TYPES
+        ):
+            image = cast(Base64Image, image)
+            yield "base64imgString", os.path.basename(image["image"]), _DATA
+        elif "content" in image:
+            image = cast(BinaryImage, image)
+            arcname = os.path.basename(image["file_name"])
+            content = image["content"]
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                yield arcname, _byte_view(content), _DATA
+            else:
+                yield arcname, content, _STREAM
+        elif (
+            "file_name" in image
+            and image["image_type_id"] in constants.FILENAME_IMAGE_TYPES
+        ):
+            image = cast(FileImage, image)
+            file_name = image["file_name"]
+            if file_name is not None:
+                yield os.path.basename(file_name), file_name, _PATH
+
+
+def _byte_view(content: Union[bytes, bytearray, memoryview]) -> Any:
+    """Return content as a flat buffer of bytes, without copying it.
+
+    ZipFile sizes entries with len(), which counts items rather than bytes
+    for memoryviews of other formats or shapes.
+    """
+    if isinstance(content, memoryview) and (
+        content.format != "B" or content.ndim != 1
+    ):
+        return content.cast("B")
+    return content
+
+
+def _entry_info(arcname: str, content: Any, kind: str) -> zipfile.ZipInfo:
+    """Return the ZipInfo of an entry written with ZipFile.open()."""
+    if kind == _PATH:
+        return zipfile.ZipInfo.from_file(content, arcname)
+    zip_info = zipfile.ZipInfo(arcname, time.localtime(time.time())[:6])
+    # The permissions ZipFile.writestr gives entries.
+    zip_info.external_attr = 0o600 << 16
+    return zip_info
+
+
+def _write_image_entries(
+    zip_file: zipfile.ZipFile,
+    image_params: List[ImageParams],
+    compression: CompressionPolicy,
+    entry_cache: Optional[ZipEntryCache] = None,
+) -> None:
+    """Write the image entries of a job to a seekable zip file."""
+    for arcname, content, kind in _zip_entries(image_params):
+        cached = _cached_entry(entry_cache, arcname, content, kind, compression)
+        if cached is not None:
+            _splice_entry(zip_file, cached)
+        else:
+            _write_entry(zip_file, arcname, content, kind, compression)
+
+
+def _write_entry(
+    zip_file: zipfile.ZipFile,
+    arcname: str,
+    content: Any,
+    kind: str,
+    compression: CompressionPolicy,
+) -> None:
+    """Write an image entry to a seekable zip file."""
+    if kind == _PATH:
+        zip_file.write(content, arcname, *compression.compression_for(arcname))
+    elif kind == _DATA:
+        zip_file.writestr(
+            arcname, content, *compression.compression_for(arcname)
+        )
+    else:
+        zip_info = _entry_info(arcname, content, kind)
+        _set_compression(zip_info, *compression.compression_for(arcname))
+        content.seek(0)
+        with zip_file.open(zip_info, "w") as entry:
+            shutil.copyfileobj(content, entry, DEFAULT_CHUNK_SIZE)
+        _check_not_empty(zip_info)
+
+
+def _check_not_empty(zip_info: zipfile.ZipInfo) -> None:
+    """Reject an image whose file object held no data when it was read."""
+    if not zip_info.file_size:
+        raise ValueError(f"content of {zip_info.filename} is empty")
+
+
+def _entry_key(
+    arcname: str,
+    content: Any,
+    kind: str,
+    compression: CompressionPolicy,
+    max_bytes: int,
+) -> Optional[Hashable]:
+    """Return the key of an entry in a ZipEntryCache.
+
+    Returns: None for entries that are not cached: file objects, which
+    would have to be read to be hashed, and content over max_bytes.
+    """
+    if kind == _PATH:
+        stat = os.stat(content)
+        if stat.st_size > max_bytes:
+            return None
+        identity: Hashable = (
+            os.path.realpath(content),
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+    elif kind == _DATA:
+        if isinstance(content, str):
+            content = content.encode()
+        if memoryview(content).nbytes > max_bytes:
+            return None
+        identity = hashlib.blake2b(content, digest_size=16).digest()
+    else:
+        return None
+    return (arcname, compression.compression_for(arcname), kind, identity)
+
+
+def _cached_entry(
+    entry_cache: Optional[ZipEntryCache],
+    arcname: str,
+    content: Any,
+    kind: str,
+    compression: CompressionPolicy,
+) -> Optional[ZipEntry]:
+    """Return an entry from entry_cache, compressing and caching it if new.
+
+    Returns: None when the entry is not cached and must be written as usual
+    """
+    if entry_cache is None:
+        return None
+    if not _CAN_SPLICE:
+        _warn_cannot_splice()
+        return None
+    key = _entry_key(arcname, content, kind, compression, entry_cache.max_bytes)
+    if key is None:
+        return None
+    entry = entry_cache.get(key)
+    if entry is None:
+        entry = _build_entry(arcname, content, kind, compression)
+        entry_cache.put(key, entry)
+    return entry
+
+
+# Size of the fixed part of a local file header, which ends with the
+# lengths of the file name and of the extra field.
+_LOCAL_HEADER_SIZE = 30
+
+
+def _build_entry(
+    arcname: str, content: Any, kind: str, compression: CompressionPolicy
+) -> ZipEntry:
+    """Compress an entry on its own, to be spliced into archives."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+        _write_entry(zip_file, arcname, content, kind, compression)
+    zip_info = zip_file.filelist[0]
+    archive = buffer.getbuffer()
+    name_length, extra_length = struct.unpack(
+        "<HH", archive[_LOCAL_HEADER_SIZE - 4 : _LOCAL_HEADER_SIZE]
+    )
+    start = _LOCAL_HEADER_SIZE + name_length + extra_length
+    return ZipEntry(
+        zip_info, bytes(archive[start : start + zip_info.compress_size])
+    )
+
+
+# Flag of the entries whose CRC and sizes follow their data.
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+# The private ZipFile attributes _splice_entry uses, as ZipFile.mkdir does.
+_SPLICE_ATTRIBUTES = (
+    "_lock",
+    "_writing",
+    "_seekable",
+    "_writecheck",
+    "_didModify",
+    "fp",
+    "start_dir",
+    "filelist",
+    "NameToInfo",
+)
+
+
+def _can_splice() -> bool:
+    """Check that this Python's ZipFile has what _splice_entry relies on.
+
+    Splicing was checked against the ZipFile of Python 3.9 to 3.13. On
+    other versions, or if the attributes are missing, entries are written
+    with ZipFile's public methods and entry caches are not used.
+    """
+    if not (3, 9) <= sys.version_info[:2] <= (3, 13):
+        return False
+    with zipfile.ZipFile(io.BytesIO(), "w") as probe:
+        return all(hasattr(probe, name) for name in _SPLICE_ATTRIBUTES) and (
+            hasattr(zipfile.ZipInfo, "FileHeader")
+        )
+
+
+_CAN_SPLICE = _can_splice()
+_warned_cannot_splice = False
+
+
+def _warn_cannot_splice() -> None:
+    """Warn, once per process, that entry caches are not used."""
+    global _warned_cannot_splice
+    if not _warned_cannot_splice:
+        _warned_cannot_splice = True
+        warnings.warn(
+            "entry_cache is not used: splicing zip entries is not supported"
+            f" on Python {sys.version_info[0]}.{sys.version_info[1]}",
+            RuntimeWarning,
+        )
+
+
+def _splice_entry(zip_file: zipfile.ZipFile, entry: ZipEntry) -> None:
+    """Write a compressed entry to a zip file as it is.
+
+    ZipFile can only write entries by compressing them, so this does what
+    ZipFile.mkdir does for directories, with the entry's data after its
+    header. Its CRC and sizes are known, so they are in the header, even
+    in zip files written without seeking.
+    """
+    zip_info = copy.copy(entry.zip_info)
+    zip_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    zip64 = (
+        zip_info.file_size > zipfile.ZIP64_LIMIT
+        or zip_info.compress_size > zipfile.ZIP64_LIMIT
+    )
+    # The ZipFile attributes used by its own write methods.
+    archive: Any = zip_file
+    with archive._lock:
+        if archive._writing:
+            raise ValueError(
+                "Can't write to the ZIP file while an entry is open"
+            )
+        if archive._seekable:
+            archive.fp.seek(archive.start_dir)
+        zip_info.header_offset = archive.fp.tell()
+        archive._writecheck(zip_info)
+        archive._didModify = True
+        archive.fp.write(zip_info.FileHeader(zip64))
+        archive.fp.write(entry.data)
+        archive.filelist.append(zip_info)
+        archive.NameToInfo[zip_info.filename] = zip_info
+        archive.start_dir = archive.fp.tell()
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Unseekable stream collecting what ZipFile writes until drained."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _set_compression(
+    zip_info: zipfile.ZipInfo, compress_type: int, compresslevel: Optional[int]
+) -> None:
+    """Set how an entry opened with ZipFile.open(zip_info, "w") is written.
+
+    ZipFile.write and writestr take a compresslevel argument, ZipFile.open
+    only reads it from the ZipInfo, where Python 3.13 renamed it.
+    """
+    zip_info.compress_type = compress_type
+    if hasattr(zip_info, "compress_level"):
+        zip_info.compress_level = compresslevel
+    else:
+        zip_info._compresslevel = compresslevel  # type: ignore[attr-defined]
+
+
+def _stream_zip(
+    info_json: Union[str, bytes],
+    image_params: List[ImageParams],
+    chunk_size: int,
+    compression: CompressionPolicy,
+    entry_cache: Optional[ZipEntryCache] = None,
+) -> Iterator[bytes]:
+    """Write a job's zip file to an unseekable buffer, yielding its chunks."""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+        zip_file.writestr(
+            "info.json", info_json, *compression.compression_for("info.json")
+        )
+        for arcname, content, kind in _zip_entries(image_params):
+            cached = _cached_entry(
+                entry_cache, arcname, content, kind, compression
+            )
+            if cached is not None:
+                _splice_entry(zip_file, cached)
+                chunk = buffer.drain()
+                if chunk:
+                    yield chunk
+                continue
+            if kind == _DATA:
                 zip_file.writestr(
-                    "base64imgString", os.path.basename(image["image"])
+                    arcname, content, *compression.compression_for(arcname)
                 )
-            elif (
-                "file_name" in image
-                and image["image_type_id"] in constants.FILENAME_IMAGE_TYPES
+                continue
+            zip_info = _entry_info(arcname, content, kind)
+            _set_compression(zip_info, *compression.compression_for(arcname))
+            if kind == _STREAM:
+                content.seek(0)
+            with (
+                (
+                    open(content, "rb")
+                    if kind == _PATH
+                    else contextlib.nullcontext(content)
+                ) as source,
+                zip_file.open(zip_info, "w") as entry,
             ):
-                image = cast(FileImage, image)
-                if image["file_name"] is not None:
-                    zip_file.write(
-                        image["file_name"],
-                        os.path.basename(image["file_name"]),
-                    )
-    return zip_buffer.getvalue()
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    entry.write(data)
+                    chunk = buffer.drain()
+                    if chunk:
+                        yield chunk
+            if kind == _STREAM:
+                _check_not_empty(zip_info)
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
 
 
 def prepare_info_json(
@@ -194,6 +789,35 @@ def prepare_image_entry_dict(
     }
 
 
+def _validate_image_content(file_name: Any, content: Any) -> None:
+    """Check the content and file_name of an image given as content."""
+    if not isinstance(file_name, str) or not file_name.lower().endswith(
+        IMAGE_FILE_EXTENSIONS
+    ):
+        raise ValueError(
+            "file_name of an image given as content must end with one of"
+            f" {', '.join(IMAGE_FILE_EXTENSIONS)}"
+        )
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        if isinstance(content, memoryview) and not content.c_contiguous:
+            raise ValueError("content memoryview must be contiguous")
+        if not memoryview(content).nbytes:
+            raise ValueError("content cannot be empty")
+    elif isinstance(content, io.TextIOBase) or not callable(
+        getattr(content, "read", None)
+    ):
+        raise ValueError(
+            "content must be bytes, bytearray, memoryview or a binary file"
+        )
+    else:
+        # Streams are read from the start each time the zip file is built,
+        # e.g. again when an upload is retried.
+        if not content.seekable():
+            raise ValueError("content file object must be seekable")
+        if not content.seek(0, io.SEEK_END):
+            raise ValueError("content cannot be empty")
+
+
 def validate_images(
     images_params: List[ImageParams],
     use_enrolled_image: bool = False,
@@ -235,7 +859,11 @@ def validate_images(
             raise ValueError(
                 "check for image_type_id and base64 image mismatch"
             )
-        if image_file_name and isinstance(image_file_name, str):
+        if "content" in image:
+            _validate_image_content(
+                image_file_name, cast(BinaryImage, image)["content"]
+            )
+        elif image_file_name and isinstance(image_file_name, str):
             if image_file_name.lower().endswith(
                 IMAGE_FILE_EXTENSIONS
             ) and not os.path.exists(image_file_name):
@@ -0,0 +1,410 @@
+"""Record submitted jobs in a local SQLite file so polling survives restarts.
+
+WebApi(ledger=...) records each job once its smile_job_id is known and
+before its files are uploaded, then records every change of state. After
+a restart JobLedger.resume() hands the jobs that were still in flight to
+a JobStatusPoller, so they are polled to completion without being
+submitted again.
+
+The database is opened in WAL mode and written by a single background
+thread that commits queued records in batches, so recording a job costs
+the submit path at most one shared commit.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from smile_id_core.polling import JobHandle, JobStatusPoller
+from smile_id_core.types import OptionsParams
+
+__all__ = [
+    "COMPLETE",
+    "FAILED",
+    "JobLedger",
+    "LedgerEntry",
+    "SUBMITTED",
+    "UPLOADING",
+]
+
+# The job's files are being uploaded. It may or may not exist upstream.
+UPLOADING = "uploading"
+# The job was uploaded and its result is not known yet.
+SUBMITTED = "submitted"
+COMPLETE = "complete"
+FAILED = "failed"
+IN_FLIGHT = (UPLOADING, SUBMITTED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    user_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    job_type INTEGER,
+    smile_job_id TEXT,
+    state TEXT NOT NULL,
+    partner_params TEXT NOT NULL,
+    options_params TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, updated_at);
+"""
+
+_UPSERT = """
+INSERT INTO jobs (
+    user_id, job_id, job_type, smile_job_id, state, partner_params,
+    options_params, result, error, created_at, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, job_id) DO UPDATE SET
+    smile_job_id = COALESCE(excluded.smile_job_id, jobs.smile_job_id),
+    state = excluded.state,
+    options_params = COALESCE(excluded.options_params, jobs.options_params),
+    result = COALESCE(excluded.result, jobs.result),
+    error = excluded.error,
+    updated_at = excluded.updated_at
+"""
+
+_COLUMNS = (
+    "user_id, job_id, job_type, smile_job_id, state, partner_params,"
+    " options_params, result, error, updated_at"
+)
+
+_CLOSE = object()
+
+
+class LedgerEntry(NamedTuple):
+    """A job recorded in a JobLedger.
+
+    Attributes:
+    user_id (str): the job's user_id
+    job_id (str): the job's job_id
+    job_type (Optional[int]): the job's job_type
+    smile_job_id (Optional[str]): id assigned by SmileID, once known
+    state (str): "uploading", "submitted", "complete" or "failed"
+    partner_params (Dict[str, Any]): the job's partner_params
+    options_params (Optional[Dict[str, Any]]): the job's options_params
+    result (Optional[Dict[str, Any]]): the last job status received
+    error (Optional[str]): why the job failed, if it did
+    updated_at (float): when the entry was last written, in epoch seconds
+    """
+
+    user_id: str
+    job_id: str
+    job_type: Optional[int]
+    smile_job_id: Optional[str]
+    state: str
+    partner_params: Dict[str, Any]
+    options_params: Optional[Dict[str, Any]]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    updated_at: float
+
+
+class _Write:
+    """A queued record and, for callers waiting on it, its commit."""
+
+    def __init__(self, row: Tuple[Any, ...], wait: bool):
+        self.row = row
+        self.committed = threading.Event() if wait else None
+        self.error: Optional[BaseException] = None
+
+
+class JobLedger:
+    """Durable record of submitted jobs kept in a SQLite file.
+
+    A ledger is safe to share between threads and between the clients of
+    one process. Use one file per process: SQLite serialises writers, so
+    processes sharing a file would slow each other down.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        max_batch: int = 256,
+    ):
+        """Open or create the ledger and start its writer thread.
+
+        argument(s):
+        path: file of the SQLite database
+        flush_interval: longest time in seconds a record nobody waits for
+            is held to be committed with others
+        max_batch: most records committed in one transaction
+        """
+        if flush_interval < 0 or max_batch < 1:
+            raise ValueError(
+                "flush_interval cannot be negative and max_batch must be >= 1"
+            )
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._read_lock = threading.Lock()
+        self._reader = self._connect(check_same_thread=False)
+        self._reader.executescript(_SCHEMA)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="smile-id-ledger", daemon=True
+        )
+        self._writer.start()
+
+    def record(
+        self,
+        partner_params: Dict[str, Any],
+        state: str,
+        smile_job_id: Optional[str] = None,
+        options_params: Optional[OptionsParams] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        wait: bool = False,
+    ) -> None:
+        """Record a job's state.
+
+        Fields left as None keep their recorded value, except error.
+
+        argument(s):
+        partner_params: the job's partner_params
+        state: the job's state, e.g. SUBMITTED
+        smile_job_id: id assigned by SmileID
+        options_params: the job's options_params
+        result: the last job status received
+        error: why the job failed
+        wait: return only once the record is committed
+        """
+        now = time.time()
+        write = _Write(
+            (
+                str(partner_params.get("user_id")),
+                str(partner_params.get("job_id")),
+                partner_params.get("job_type"),
+                smile_job_id,
+                state,
+                json.dumps(partner_params),
+                None if options_params is None else json.dumps(options_params),
+                None if result is None else json.dumps(result),
+                error,
+                now,
+                now,
+            ),
+            wait,
+        )
+        self._put(write)
+        if write.committed is not None:
+            write.committed.wait()
+            if write.error is not None:
+                raise write.error
+
+    def flush(self) -> None:
+        """Wait until every record made so far is committed.
+
+        Raises the error of a failed commit nobody waited for, if any.
+        """
+        write = _Write((), wait=True)
+        self._put(write)
+        assert write.committed is not None
+        write.committed.wait()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def get(self, user_id: str, job_id: str) -> Optional[LedgerEntry]:
+        """Return the entry of a job, if it was recorded."""
+        entries = self._select(
+            "WHERE user_id = ? AND job_id = ?", (user_id, job_id)
+        )
+        return entries[0] if entries else None
+
+    def find(
+        self,
+        state: Optional[str] = None,
+        job_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[LedgerEntry]:
+        """Return the entries matching every criterion given.
+
+        Entries are returned oldest update first.
+        """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (
+            ("state", state),
+            ("job_id", job_id),
+            ("user_id", user_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        where += " ORDER BY updated_at"
+        if limit is not None:
+            where += " LIMIT ?"
+            params.append(limit)
+        return self._select(where, params)
+
+    def in_flight(self) -> List[LedgerEntry]:
+        """Return the jobs being uploaded or waiting for their result."""
+        return [
+            entry for state in IN_FLIGHT for entry in self.find(state=state)
+        ]
+
+    def resume(
+        self, poller: JobStatusPoller
+    ) -> Dict[Tuple[str, str], JobHandle]:
+        """Poll every job still in flight and record how it ends.
+
+        argument(s):
+        poller: poller the jobs are added to
+
+        Returns:
+            The poller's handles keyed by (user_id, job_id)
+        """
+        handles = {}
+        for entry in self.in_flight():
+            handles[(entry.user_id, entry.job_id)] = poller.add(
+                entry.partner_params,
+                entry.options_params,  # type: ignore[arg-type]
+                callback=self._record_outcome(entry),
+                smile_job_id=entry.smile_job_id,
+            )
+        return handles
+
+    def close(self) -> None:
+        """Commit every queued record and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(_CLOSE)
+            self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+    def __enter__(self) -> "JobLedger":
+        """Return the ledger itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the ledger when leaving the context manager."""
+        self.close()
+
+    def _record_outcome(self, entry: LedgerEntry) -> Any:
+        """Return a poller callback recording the outcome of entry's job."""
+
+        def record(future: "Future[Dict[str, Any]]") -> None:
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self.record(entry.partner_params, FAILED, error=str(error))
+                return
+            job_status = future.result()
+            state = COMPLETE if job_status.get("job_complete") else SUBMITTED
+            self.record(entry.partner_params, state, result=job_status)
+
+        return record
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Open a connection to the ledger in WAL mode."""
+        connection = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=check_same_thread,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, not on
+        # a crash of the process, and spares an fsync per commit.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _put(self, write: _Write) -> None:
+        """Queue a write for the writer thread."""
+        if not self._writer.is_alive():
+            raise RuntimeError("JobLedger is closed")
+        self._queue.put(write)
+
+    def _select(self, where: str, params: Iterable[Any]) -> List[LedgerEntry]:
+        """Flush, then return the entries selected by a WHERE clause."""
+        self.flush()
+        with self._read_lock:
+            rows = self._reader.execute(
+                f"SELECT {_COLUMNS} FROM jobs {where}", tuple(params)
+            ).fetchall()
+        return [
+            LedgerEntry(
+                row[0],
+                row[1],
+                row[2],
+                row[3],
+                row[4],
+                json.loads(row[5]),
+                None if row[6] is None else json.loads(row[6]),
+                None if row[7] is None else json.loads(row[7]),
+                row[8],
+                row[9],
+            )
+            for row in rows
+        ]
+
+    def _write_loop(self) -> None:
+        """Commit queued writes in batches until the ledger is closed."""
+        connection = self._connect()
+        closing = False
+        try:
+            while not closing:
+                batch = [self._queue.get()]
+                flush_by = time.monotonic() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    if batch[-1] is _CLOSE:
+                        break
+                    # Wait for more writes only while nobody is waiting.
+                    waiting = any(
+                        write.committed is not None
+                        for write in batch
+                        if write is not _CLOSE
+                    )
+                    timeout = 0.0 if waiting else flush_by - time.monotonic()
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, timeout)))
+                    except queue.Empty:
+                        break
+                closing = batch[-1] is _CLOSE
+                writes = [write for write in batch if write is not _CLOSE]
+                self._commit(connection, writes)
+        finally:
+            connection.close()
+
+    def _commit(
+        self, connection: sqlite3.Connection, writes: List[_Write]
+    ) -> None:
+        """Write a batch in one transaction and notify its waiters."""
+        rows = [write.row for write in writes if write.row]
+        error: Optional[BaseException] = None
+        if rows:
+            try:
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(_UPSERT, rows)
+            except sqlite3.Error as commit_error:
+                error = commit_error
+        for write in writes:
+            if write.committed is None:
+                if error is not None and write.row:
+                    self._error = error
+                continue
+            write.error = error if write.row else None
+            write.committed.set()
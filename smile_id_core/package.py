@@ -0,0 +1,289 @@
+"""Submit job zip files built ahead of time without loading them in memory.
+
+A prepared package is a job zip file, as built by generate_zip_file, kept
+on disk until it is submitted. Only its info.json depends on the upload:
+it holds the upload_url and the request signature. PreparedPackage reads
+the archive's central directory and info.json, and builds an upload body
+made of the archive's entries, read from the file in chunks as they are
+sent, followed by a new info.json and central directory. The bytes of the
+package's own info.json entry are left out of the body, and the entries
+after it are listed at their shifted offsets.
+"""
+
+import copy
+import io
+import json
+import os
+import zipfile
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from smile_id_core.codec import JsonCodec
+from smile_id_core.image_upload import (
+    DEFAULT_COMPRESSION_POLICY,
+    CompressionPolicy,
+)
+from smile_id_core.types import SignatureParams
+
+__all__ = ["PreparedPackage"]
+
+Package = Union[str, "os.PathLike[str]", int, BinaryIO]
+
+
+class PreparedPackage:
+    """A job zip file on disk, validated and ready to be uploaded.
+
+    Attributes:
+    info_json (Dict[str, Any]): the package's info.json
+    partner_params (Dict[str, Any]): the partner_params of the job
+    """
+
+    def __init__(self, package: Package):
+        """Open a package and validate its info.json.
+
+        argument(s):
+        package: path of the zip file, a file descriptor open for reading
+            or a seekable binary file. Descriptors and files are left open.
+        """
+        if isinstance(package, int):
+            self._file: BinaryIO = os.fdopen(package, "rb", closefd=False)
+        elif isinstance(package, (str, os.PathLike)):
+            self._file = open(package, "rb")
+        else:
+            self._file = package
+        self._owned = self._file is not package
+        try:
+            with zipfile.ZipFile(self._file) as archive:
+                self._names = set(archive.namelist())
+                # Where the entries end and the central directory starts.
+                self._entries_end: int = archive.start_dir  # type: ignore
+                try:
+                    info_json = json.loads(archive.read("info.json"))
+                except KeyError:
+                    raise ValueError("The package has no info.json") from None
+                self._stale = _entry_span(archive, "info.json")
+            self.info_json = self._validate(info_json)
+        except Exception:
+            self.close()
+            raise
+        self.partner_params: Dict[str, Any] = self.info_json[
+            "misc_information"
+        ]["partner_params"]
+
+    @property
+    def partner_id(self) -> Optional[str]:
+        """Return the partner id the package was built for."""
+        smile_client_id = self.info_json["misc_information"].get(
+            "smile_client_id"
+        )
+        return None if smile_client_id is None else str(smile_client_id)
+
+    def body(
+        self,
+        upload_url: str,
+        signature_params: SignatureParams,
+        codec: Optional[JsonCodec] = None,
+        compression: Optional[CompressionPolicy] = None,
+    ) -> "_PackageBody":
+        """Return the upload body of the package for an upload_url.
+
+        argument(s):
+        upload_url: the upload_url returned for the job
+        signature_params: the signature the upload was prepared with
+        codec: JSON codec that encodes info.json, defaults to JsonCodec
+        compression: how info.json is compressed, defaults to
+            DEFAULT_COMPRESSION_POLICY
+
+        Returns:
+            A file object of known length that reads the package's entries
+            from its file as it is read itself
+        """
+        info_json = copy.deepcopy(self.info_json)
+        info_json["misc_information"].update(signature_params)
+        info_json["server_information"] = upload_url
+        compression = compression or DEFAULT_COMPRESSION_POLICY
+        start, end = self._stale
+        removed = end - start
+        overlay = _Overlay(self._file, self._entries_end - removed)
+        with zipfile.ZipFile(overlay, "a") as archive:
+            stale = archive.getinfo("info.json")
+            archive.filelist.remove(stale)
+            del archive.NameToInfo["info.json"]
+            # The entries after the old info.json move up in the body.
+            for zip_info in archive.filelist:
+                if zip_info.header_offset >= end:
+                    zip_info.header_offset -= removed
+            archive.start_dir = (  # type: ignore[attr-defined]
+                self._entries_end - removed
+            )
+            archive.writestr(
+                "info.json",
+                (codec or JsonCodec()).dumps(info_json),
+                *compression.compression_for("info.json"),
+            )
+        return _PackageBody(
+            self._file,
+            [(0, start), (end, self._entries_end)],
+            bytes(overlay.tail),
+        )
+
+    def close(self) -> None:
+        """Close the package's file if it was opened from a path or fd."""
+        if self._owned:
+            self._file.close()
+
+    def __enter__(self) -> "PreparedPackage":
+        """Return the package itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the package when leaving the context manager."""
+        self.close()
+
+    def _validate(self, info_json: Any) -> Dict[str, Any]:
+        """Check info.json describes a job whose images are all present."""
+        if not isinstance(info_json, dict):
+            raise ValueError("info.json must hold a JSON object")
+        misc_information = info_json.get("misc_information")
+        if not isinstance(misc_information, dict) or not isinstance(
+            misc_information.get("partner_params"), dict
+        ):
+            raise ValueError("info.json has no misc_information.partner_params")
+        images = info_json.get("images")
+        if not isinstance(images, list) or not images:
+            raise ValueError("info.json lists no images")
+        for image in images:
+            file_name = isinstance(image, dict) and image.get("file_name")
+            if file_name and os.path.basename(file_name) not in self._names:
+                raise ValueError(f"The package has no image {file_name}")
+        return info_json
+
+
+def _entry_span(archive: zipfile.ZipFile, name: str) -> Tuple[int, int]:
+    """Return where an entry's local header starts and the next one does."""
+    start = archive.getinfo(name).header_offset
+    end: int = archive.start_dir  # type: ignore[attr-defined]
+    for zip_info in archive.infolist():
+        if start < zip_info.header_offset < end:
+            end = zip_info.header_offset
+    return start, end
+
+
+class _Overlay(io.RawIOBase):
+    """Archive file whose bytes past offset are replaced by what is written.
+
+    ZipFile in "a" mode reads the central directory, then writes new
+    entries and a new central directory from where the old one started.
+    Reads see the archive and writes go to tail, leaving the file as is.
+    """
+
+    def __init__(self, source: BinaryIO, offset: int):
+        self._source = source
+        self._offset = offset
+        self._position = 0
+        self._writing = False
+        self._size = source.seek(0, io.SEEK_END)
+        self.tail = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += (
+                self._offset + len(self.tail) if self._writing else self._size
+            )
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        if self._writing:
+            raise io.UnsupportedOperation("read after write")
+        self._source.seek(self._position)
+        read = self._source.readinto(buffer)  # type: ignore[attr-defined]
+        self._position += read
+        return int(read)
+
+    def write(self, data: Any) -> int:
+        start = self._position - self._offset
+        if start < 0:
+            raise io.UnsupportedOperation("cannot overwrite archive entries")
+        self._writing = True
+        data = memoryview(data).cast("B")
+        if start > len(self.tail):
+            self.tail.extend(bytes(start - len(self.tail)))
+        self.tail[start : start + len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        size = self._position if size is None else size
+        del self.tail[max(0, size - self._offset) :]
+        return size
+
+
+class _PackageBody(io.RawIOBase):
+    """Upload body reading spans of a file one after another, then tail.
+
+    Its len() lets requests send a Content-Length instead of chunks.
+    """
+
+    def __init__(
+        self, source: BinaryIO, spans: List[Tuple[int, int]], tail: bytes
+    ):
+        self._source = source
+        self._spans = [(start, end) for start, end in spans if end > start]
+        self._length = sum(end - start for start, end in self._spans)
+        self._tail = tail
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._length + len(self._tail)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self)
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        if self._position < self._length:
+            offset = self._position
+            for start, end in self._spans:
+                if offset < end - start:
+                    break
+                offset -= end - start
+            size = min(len(view), end - start - offset)
+            self._source.seek(start + offset)
+            read = int(
+                self._source.readinto(view[:size])  # type: ignore[attr-defined]
+            )
+        else:
+            start = self._position - self._length
+            chunk = self._tail[start : start + len(view)]
+            read = len(chunk)
+            view[:read] = chunk
+        self._position += read
+        return read
@@ -0,0 +1,462 @@
+"""Poll schedules and the shared poller that waits on pending jobs.
+
+A schedule yields the number of seconds to sleep before each job_status
+query; polling stops once the job is complete or the schedule runs out.
+JobStatusPoller runs those schedules for many jobs at once from a single
+priority queue drained by a small pool of worker threads.
+"""
+
+import abc
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from smile_id_core.constants import JobType
+from smile_id_core.types import OptionsParams
+from smile_id_core.Utilities import Utilities
+
+__all__ = [
+    "ChainedSchedule",
+    "DEFAULT_POLL_SCHEDULE",
+    "DeadlineSchedule",
+    "ExponentialSchedule",
+    "FixedSchedule",
+    "JitteredSchedule",
+    "JobHandle",
+    "JobStatusPoller",
+    "PollSchedule",
+    "get_poll_schedule",
+]
+
+
+class PollSchedule(abc.ABC):
+    """Base class of every poll schedule."""
+
+    @abc.abstractmethod
+    def delays(self) -> Iterator[float]:
+        """Yield the seconds to wait before each poll, one per attempt.
+
+        Each call returns a fresh iterator, so a schedule can be shared by
+        many jobs and threads.
+        """
+
+
+class FixedSchedule(PollSchedule):
+    """Wait the same interval before each of max_attempts polls."""
+
+    def __init__(self, interval: float, max_attempts: int):
+        """Initialize the schedule.
+
+        argument(s):
+        interval: seconds to wait before each poll
+        max_attempts: number of polls to make
+        """
+        if interval < 0 or max_attempts < 0:
+            raise ValueError("interval and max_attempts cannot be negative")
+        self.interval = interval
+        self.max_attempts = max_attempts
+
+    def delays(self) -> Iterator[float]:
+        """Yield interval max_attempts times."""
+        return itertools.repeat(float(self.interval), self.max_attempts)
+
+
+class ExponentialSchedule(PollSchedule):
+    """Grow the wait by multiplier after each poll, up to max_delay."""
+
+    def __init__(
+        self,
+        initial: float,
+        max_delay: float,
+        max_attempts: int,
+        multiplier: float = 2.0,
+    ):
+        """Initialize the schedule.
+
+        argument(s):
+        initial: seconds to wait before the first poll
+        max_delay: cap on the seconds to wait before any poll
+        max_attempts: number of polls to make
+        multiplier: factor applied to the wait after every poll
+        """
+        if initial < 0 or max_delay < 0 or max_attempts < 0:
+            raise ValueError(
+                "initial, max_delay and max_attempts cannot be negative"
+            )
+        if multiplier < 1:
+            raise ValueError("multiplier must be >= 1")
+        self.initial = initial
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.multiplier = multiplier
+
+    def delays(self) -> Iterator[float]:
+        """Yield initial * multiplier ** attempt, capped at max_delay."""
+        delay = float(self.initial)
+        for _ in range(self.max_attempts):
+            yield min(delay, self.max_delay)
+            delay *= self.multiplier
+
+
+class JitteredSchedule(PollSchedule):
+    """Randomise another schedule's delays to spread polls out."""
+
+    def __init__(
+        self,
+        schedule: PollSchedule,
+        jitter: float = 0.5,
+        rng: Optional[random.Random] = None,
+    ):
+        """Initialize the schedule.
+
+        argument(s):
+        schedule: the schedule whose delays are randomised
+        jitter: fraction of each delay that is randomised, between 0 and 1.
+            A delay d becomes a random value in [d * (1 - jitter), d].
+        rng: random number generator, mostly useful for tests
+        """
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self.schedule = schedule
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def delays(self) -> Iterator[float]:
+        """Yield the wrapped schedule's delays with jitter applied."""
+        for delay in self.schedule.delays():
+            yield delay * (1 - self.jitter * self.rng.random())
+
+
+class DeadlineSchedule(PollSchedule):
+    """Stop another schedule once a total wait budget is used up."""
+
+    def __init__(self, schedule: PollSchedule, deadline: float):
+        """Initialize the schedule.
+
+        argument(s):
+        schedule: the schedule to bound
+        deadline: seconds after the first delay is requested past which
+            no more polls are made
+        """
+        if deadline < 0:
+            raise ValueError("deadline cannot be negative")
+        self.schedule = schedule
+        self.deadline = deadline
+
+    def delays(self) -> Iterator[float]:
+        """Yield delays, shortened or stopped so polls end by the deadline."""
+        ends_at = time.monotonic() + self.deadline
+        for delay in self.schedule.delays():
+            remaining = ends_at - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(delay, remaining)
+
+
+class ChainedSchedule(PollSchedule):
+    """Run several schedules one after the other."""
+
+    def __init__(self, *schedules: PollSchedule):
+        """Initialize the schedule.
+
+        argument(s):
+        schedules: the schedules to run in order
+        """
+        self.schedules = schedules
+
+    def delays(self) -> Iterator[float]:
+        """Yield every delay of every schedule in order."""
+        return itertools.chain.from_iterable(
+            schedule.delays() for schedule in self.schedules
+        )
+
+
+# 2 seconds before each of the first three polls, then 4 seconds, for a
+# total of 20 polls.
+DEFAULT_POLL_SCHEDULE: PollSchedule = ChainedSchedule(
+    FixedSchedule(2, 3), FixedSchedule(4, 17)
+)
+
+
+def get_poll_schedule(
+    job_type: Any,
+    poll_schedules: Optional[Mapping[JobType, PollSchedule]] = None,
+) -> PollSchedule:
+    """Return the poll schedule to use for a job type.
+
+    argument(s):
+    job_type: the job type being polled
+    poll_schedules: schedules keyed by JobType, falling back to
+        DEFAULT_POLL_SCHEDULE for job types that are not listed
+
+    Returns:
+        PollSchedule: the schedule for job_type
+    """
+    if poll_schedules and job_type is not None and job_type in poll_schedules:
+        return poll_schedules[job_type]
+    return DEFAULT_POLL_SCHEDULE
+
+
+class JobHandle(Future[Dict[str, Any]]):
+    """Future of a job's final status, polled in the background.
+
+    It resolves with the first complete job status, or the last one if
+    the poll schedule runs out first. Cancelling it stops polling.
+
+    Attributes:
+    partner_params (Dict[str, Any]): the job's partner_params
+    smile_job_id (Optional[str]): id assigned by SmileID, when known
+    status (Optional[Dict[str, Any]]): the last job status received,
+        complete or not
+    """
+
+    def __init__(
+        self,
+        partner_params: Dict[str, Any],
+        smile_job_id: Optional[str] = None,
+    ):
+        """Initialize a pending handle for a job."""
+        super().__init__()
+        self.partner_params = partner_params
+        self.smile_job_id = smile_job_id
+        self.status: Optional[Dict[str, Any]] = None
+
+
+class _PendingJob:
+    """A job waiting in JobStatusPoller's queue."""
+
+    def __init__(
+        self,
+        partner_params: Dict[str, Any],
+        options_params: OptionsParams,
+        delays: Iterator[float],
+        future: JobHandle,
+    ):
+        self.partner_params = partner_params
+        self.options_params = options_params
+        self.delays = delays
+        self.future = future
+        # Sequence number of the job's live queue entry. Entries left behind
+        # when a wake-up queues the job again are skipped.
+        self.sequence = -1
+        self.in_flight = False
+        self.woken = False
+
+
+class JobStatusPoller:
+    """Poll many pending jobs from one queue and a bounded worker pool.
+
+    Every job added is kept in a priority queue keyed by the time its next
+    job_status query is due. A dispatcher thread hands due jobs to at most
+    max_workers threads, so the cost of polling grows with the number of
+    due jobs rather than with the number of jobs waiting.
+
+    Attributes:
+    utilities (Utilities): client used to query job status
+    """
+
+    def __init__(
+        self,
+        utilities: Utilities,
+        max_workers: int = 4,
+        poll_schedules: Optional[Mapping[JobType, PollSchedule]] = None,
+    ):
+        """Initialize the queue and worker pool.
+
+        argument(s):
+        utilities: client used to query job status
+        max_workers: maximum number of job_status queries in flight
+        poll_schedules: poll schedules keyed by JobType. Job types that are
+            not listed use DEFAULT_POLL_SCHEDULE.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.utilities = utilities
+        self.poll_schedules = poll_schedules
+        self._queue: List[Tuple[float, int, _PendingJob]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="smile-id-poller"
+        )
+        self._closed = False
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def add(
+        self,
+        partner_params: Dict[str, Any],
+        options_params: Optional[OptionsParams] = None,
+        callback: Optional[Callable[["Future[Dict[str, Any]]"], Any]] = None,
+        counter: int = 0,
+        smile_job_id: Optional[str] = None,
+        wake: Optional["Future[Any]"] = None,
+    ) -> JobHandle:
+        """Start polling a job until it completes or its schedule runs out.
+
+        argument(s):
+        partner_params: Dict containing the job's user_id, job_id and
+            job_type
+        options_params: Dict containing optional info params such as
+            return_history and return_images
+        callback: called with the returned future once it is done
+        counter: number of polls already made for this job, which are
+            skipped in its schedule
+        smile_job_id: id assigned by SmileID, kept on the returned handle
+        wake: a future, such as the one CallbackReceiver.register()
+            returns, whose completion polls the job at once instead of at
+            its next scheduled time
+
+        Returns:
+            A JobHandle resolved with the last job status, or with the error
+            raised while querying it. Cancelling it stops polling.
+        """
+        Utilities.validate_partner_params(
+            {
+                **partner_params,
+                "job_type": partner_params.get("job_type", "1"),
+            }
+        )
+        if not options_params:
+            options_params = OptionsParams(
+                return_job_status=True,
+                return_history=False,
+                return_images=False,
+                use_enrolled_image=False,
+            )
+        schedule = get_poll_schedule(
+            partner_params.get("job_type"), self.poll_schedules
+        )
+        future = JobHandle(partner_params, smile_job_id)
+        if callback is not None:
+            future.add_done_callback(callback)
+        job = _PendingJob(
+            partner_params,
+            options_params,
+            itertools.islice(schedule.delays(), counter, None),
+            future,
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("JobStatusPoller is closed")
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch,
+                    name="smile-id-poller-dispatcher",
+                    daemon=True,
+                )
+                self._dispatcher.start()
+        self._schedule(job, next(job.delays, 0.0))
+        if wake is not None:
+            wake.add_done_callback(lambda _: self._wake(job))
+        return future
+
+    @property
+    def pending(self) -> int:
+        """Return the number of jobs waiting for their next poll."""
+        with self._condition:
+            return sum(
+                1
+                for _, sequence, job in self._queue
+                if sequence == job.sequence
+            )
+
+    def close(self, wait: bool = True) -> None:
+        """Stop polling and cancel every job that is still pending.
+
+        argument(s):
+        wait: wait for queries already in flight to finish
+        """
+        with self._condition:
+            self._closed = True
+            queue, self._queue = self._queue, []
+            self._condition.notify_all()
+        for _, _, job in queue:
+            job.future.cancel()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "JobStatusPoller":
+        """Return the poller itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the poller when leaving the context manager."""
+        self.close()
+
+    def _schedule(self, job: _PendingJob, delay: float) -> None:
+        """Queue job to be polled after delay seconds."""
+        with self._condition:
+            if self._closed:
+                job.future.cancel()
+                return
+            job.sequence = next(self._sequence)
+            heapq.heappush(
+                self._queue, (time.monotonic() + delay, job.sequence, job)
+            )
+            self._condition.notify()
+
+    def _wake(self, job: _PendingJob) -> None:
+        """Poll a job at once, or right after the query in flight."""
+        with self._condition:
+            if job.future.done():
+                return
+            if job.in_flight:
+                job.woken = True
+            else:
+                self._schedule(job, 0.0)
+
+    def _dispatch(self) -> None:
+        """Hand due jobs to the worker pool until the poller is closed."""
+        while True:
+            self._workers.acquire()
+            with self._condition:
+                while not self._closed:
+                    now = time.monotonic()
+                    if self._queue and self._queue[0][0] <= now:
+                        break
+                    timeout = self._queue[0][0] - now if self._queue else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    self._workers.release()
+                    return
+                _, sequence, job = heapq.heappop(self._queue)
+                live = sequence == job.sequence
+                job.in_flight = live
+            if not live or job.future.cancelled():
+                self._workers.release()
+                continue
+            self._executor.submit(self._poll, job)
+
+    def _poll(self, job: _PendingJob) -> None:
+        """Query a job's status, then resolve it or queue its next poll."""
+        try:
+            status = self.utilities.get_job_status(
+                job.partner_params, job.options_params
+            )
+        except Exception as error:
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(error)
+            return
+        finally:
+            self._workers.release()
+
+        job.future.status = status
+        delay = next(job.delays, None)
+        with self._condition:
+            job.in_flight = False
+            if job.woken:
+                # The wake-up came while this query was in flight, and may
+                # not be reflected in its answer.
+                job.woken = False
+                delay = 0.0
+        if status.get("job_complete") or delay is None:
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_result(status)
+            return
+        self._schedule(job, delay)
@@ -0,0 +1,240 @@
+"""Pace outgoing requests with a token bucket per endpoint.
+
+A RateLimiter holds one bucket per endpoint, refilled at rate tokens per
+second up to burst tokens. Every request takes a token and waits until
+the bucket has one, so requests are spread out instead of sent in bursts
+that the API answers with 429. Buckets can be kept in lock files so that
+several worker processes sharing a partner_id share the same budget.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from smile_id_core.circuit_breaker import endpoint_key
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["FileTokenBucket", "RateLimiter", "TokenBucket"]
+
+_STATE = struct.Struct("!dd")
+
+
+class TokenBucket:
+    """Token bucket shared by the threads of one process.
+
+    Attributes:
+    rate (float): tokens added per second
+    burst (float): most tokens the bucket holds
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a full bucket.
+
+        argument(s):
+        rate: tokens added per second
+        burst: most tokens the bucket holds, i.e. the largest burst sent
+            without waiting
+        clock: clock in seconds, mostly useful for tests
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens from the bucket, going into debt if needed.
+
+        Returns:
+            The seconds to wait before sending the request
+        """
+        with self._lock:
+            self._tokens, self._updated, delay = _take(
+                self._tokens,
+                self._updated,
+                self._clock(),
+                self.rate,
+                self.burst,
+                tokens,
+            )
+            return delay
+
+
+class FileTokenBucket:
+    """Token bucket kept in a lock file and shared by processes of a host.
+
+    The bucket state is read and written under an exclusive fcntl lock, so
+    every process using the same path shares one rate. Only available on
+    platforms with fcntl.
+
+    Attributes:
+    path (str): file holding the bucket state
+    rate (float): tokens added per second
+    burst (float): most tokens the bucket holds
+    """
+
+    def __init__(self, path: str, rate: float, burst: float):
+        """Initialize the bucket, creating its file if needed.
+
+        argument(s):
+        path: file holding the bucket state
+        rate: tokens added per second
+        burst: most tokens the bucket holds
+        """
+        if fcntl is None:  # pragma: no cover
+            raise RuntimeError("FileTokenBucket requires fcntl")
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens from the shared bucket, going into debt if needed.
+
+        Returns:
+            The seconds to wait before sending the request
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            now = time.time()
+            data = os.pread(fd, _STATE.size, 0)
+            if len(data) == _STATE.size:
+                available, updated = _STATE.unpack(data)
+            else:
+                available, updated = self.burst, now
+            available, updated, delay = _take(
+                available, updated, now, self.rate, self.burst, tokens
+            )
+            os.pwrite(fd, _STATE.pack(available, updated), 0)
+            return delay
+        finally:
+            os.close(fd)
+
+
+def _take(
+    available: float,
+    updated: float,
+    now: float,
+    rate: float,
+    burst: float,
+    tokens: float,
+) -> Tuple[float, float, float]:
+    """Refill a bucket up to now and take tokens from it.
+
+    Returns:
+        The tokens left, the time they were counted at and the seconds to
+        wait for the tokens taken
+    """
+    available = min(burst, available + max(0.0, now - updated) * rate)
+    available -= tokens
+    return available, now, max(0.0, -available / rate)
+
+
+class RateLimiter:
+    """Keep a token bucket per endpoint and make requests wait for tokens.
+
+    Endpoints are the ones circuit breakers use, so each SmileID endpoint
+    and each presigned upload host is paced on its own.
+
+    Attributes:
+    rate (float): default requests per second of each endpoint
+    burst (float): default burst of each endpoint
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        endpoint_rates: Optional[Mapping[str, Tuple[float, float]]] = None,
+        lock_dir: Optional[str] = None,
+        namespace: str = "",
+    ):
+        """Initialize the limiter.
+
+        argument(s):
+        rate: requests per second allowed to each endpoint
+        burst: requests sent at once without waiting, defaults to rate
+        endpoint_rates: (rate, burst) of specific endpoints, keyed by the
+            endpoint url or its end, e.g. "/job_status"
+        lock_dir: directory of the lock files that share buckets between
+            processes. Buckets are per process when not supplied.
+        namespace: prefix of the lock file names, e.g. the partner_id, so
+            partners sharing lock_dir keep separate buckets
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.endpoint_rates = dict(endpoint_rates or {})
+        self.lock_dir = lock_dir
+        self.namespace = namespace
+        # Validate the defaults now rather than on the first request.
+        TokenBucket(self.rate, self.burst)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Any] = {}
+
+    def reserve(self, url: str) -> float:
+        """Take a token for a request to url.
+
+        Returns:
+            The seconds to wait before sending the request
+        """
+        delay: float = self._bucket(endpoint_key(url)).reserve()
+        return delay
+
+    def acquire(
+        self, url: str, sleep: Optional[Callable[[float], Any]] = None
+    ) -> float:
+        """Wait until a request to url may be sent.
+
+        argument(s):
+        url: url of the request
+        sleep: function used to wait, time.sleep when not supplied
+
+        Returns:
+            The seconds waited
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            (sleep or time.sleep)(delay)
+        return delay
+
+    def _bucket(self, endpoint: str) -> Any:
+        """Return the bucket of an endpoint, creating it if needed."""
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is not None:
+                return bucket
+            rate, burst = self.rate, self.burst
+            for key, limits in self.endpoint_rates.items():
+                if endpoint.endswith(key):
+                    rate, burst = limits
+                    break
+            if self.lock_dir is None:
+                bucket = TokenBucket(rate, burst)
+            else:
+                name = hashlib.sha256(
+                    f"{self.namespace}\n{endpoint}".encode("utf-8")
+                ).hexdigest()[:24]
+                bucket = FileTokenBucket(
+                    os.path.join(self.lock_dir, f"smile-id-{name}.bucket"),
+                    rate,
+                    burst,
+                )
+            self._buckets[endpoint] = bucket
+            return bucket
@@ -0,0 +1,344 @@
+"""Retry failed HTTP requests with backoff, jitter and a retry budget.
+
+RetryPolicy decides whether a failed request is retried and how long to
+wait first. Transient failures (connection errors, timeouts, 429 and most
+5xx responses) of idempotent requests are retried with exponential backoff
+and full jitter, and a Retry-After header is honoured. A RetryBudget
+shared by every request of a transport stops retries once most requests
+are failing, so an outage is not made worse by a retry storm.
+
+Replaying a POST that the server may have processed submits the job
+again, and it is billed twice. So by default non-idempotent requests are
+only retried when they were never sent (the connection could not be
+established), or were refused with a 429 or a 503 with Retry-After.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, FrozenSet, Optional, Tuple, Type
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+__all__ = [
+    "RETRYABLE_STATUS_CODES",
+    "RetryBudget",
+    "RetryPolicy",
+    "is_replayable",
+    "was_never_sent",
+]
+
+RETRYABLE_STATUS_CODES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+)
+# Errors raised before any byte of the request reached the server.
+UNSENT_ERRORS: Tuple[Type[BaseException], ...] = (requests.ConnectTimeout,)
+if httpx is not None:
+    RETRYABLE_ERRORS += (httpx.TransportError,)
+    UNSENT_ERRORS += (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def was_never_sent(error: BaseException) -> bool:
+    """Return True when error shows the request never reached the server.
+
+    requests reports a refused connection or a failed DNS lookup as a
+    ConnectionError wrapping urllib3's NewConnectionError, and a reset or
+    a read failure, after which the request may have been processed, as
+    other ConnectionErrors.
+    """
+    if isinstance(error, UNSENT_ERRORS):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = error.args[0]
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def is_replayable(data: Any) -> bool:
+    """Return True when a request body can be sent again unchanged.
+
+    Generators, iterators and unseekable file objects are consumed by the
+    first attempt, so requests with such bodies are never retried. Seekable
+    file objects are replayed after seeking back, see is_seekable.
+    """
+    return (
+        data is None
+        or isinstance(data, (bytes, bytearray, str, dict))
+        or is_seekable(data)
+    )
+
+
+def is_seekable(data: Any) -> bool:
+    """Return True when data is a file object that can be read again."""
+    seekable = getattr(data, "seekable", None)
+    return callable(seekable) and bool(seekable())
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of all requests.
+
+    Each retryable failure takes a token and each other outcome gives back
+    token_ratio of one. Retries are only allowed while more than half of
+    max_tokens is left, so when most requests fail the bucket drains and
+    retrying stops until requests succeed again.
+
+    Attributes:
+    max_tokens (float): size of the bucket
+    token_ratio (float): tokens given back by each successful request
+    """
+
+    def __init__(self, max_tokens: float = 10.0, token_ratio: float = 0.1):
+        """Initialize a full bucket.
+
+        argument(s):
+        max_tokens: size of the bucket
+        token_ratio: tokens given back by each successful request
+        """
+        if max_tokens <= 0 or token_ratio <= 0:
+            raise ValueError("max_tokens and token_ratio must be positive")
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """Return the number of tokens left."""
+        with self._lock:
+            return self._tokens
+
+    def record_success(self) -> None:
+        """Give back token_ratio tokens after a request that did not fail."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.token_ratio)
+
+    def record_failure(self) -> bool:
+        """Take a token for a retryable failure.
+
+        Returns:
+            bool: whether the failed request may be retried
+        """
+        with self._lock:
+            self._tokens = max(0.0, self._tokens - 1)
+            return self._tokens > self.max_tokens / 2
+
+
+class RetryPolicy:
+    """Decide which failed requests are retried and when.
+
+    Attributes:
+    max_attempts (int): attempts per request, including the first one
+    budget (RetryBudget): budget shared by every request using this policy
+    retry_non_idempotent (bool): whether non-idempotent requests are
+        retried like idempotent ones
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        multiplier: float = 2.0,
+        max_retry_after: float = 60.0,
+        retry_status_codes: FrozenSet[int] = RETRYABLE_STATUS_CODES,
+        retry_errors: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        budget: Optional[RetryBudget] = None,
+        rng: Optional[random.Random] = None,
+        retry_non_idempotent: bool = False,
+    ):
+        """Initialize the policy.
+
+        argument(s):
+        max_attempts: attempts per request, including the first one. 1
+            disables retries.
+        initial_backoff: cap on the wait before the first retry, in seconds
+        max_backoff: cap on the wait before any retry, in seconds
+        multiplier: factor applied to the cap after every retry
+        max_retry_after: longest Retry-After honoured, in seconds. A
+            response asking for a longer wait is returned as it is.
+        retry_status_codes: response status codes that are retried
+        retry_errors: exceptions that are retried
+        budget: retry budget, a new one is created when not supplied
+        rng: random number generator for the jitter, mostly for tests
+        retry_non_idempotent: also retry non-idempotent requests, such as
+            job submissions, on read timeouts and 5xx responses, which
+            may submit a job twice. Off by default.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+        if initial_backoff < 0 or max_backoff < 0 or max_retry_after < 0:
+            raise ValueError("backoff and max_retry_after cannot be negative")
+        if multiplier < 1:
+            raise ValueError("multiplier must be >= 1")
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.max_retry_after = max_retry_after
+        self.retry_status_codes = retry_status_codes
+        self.retry_errors = retry_errors
+        self.budget = budget if budget is not None else RetryBudget()
+        self.rng = rng or random.Random()
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def backoff(self, attempt: int) -> float:
+        """Return a jittered wait before retry number attempt, from 1."""
+        cap = min(
+            self.max_backoff,
+            self.initial_backoff * self.multiplier ** (attempt - 1),
+        )
+        return self.rng.uniform(0, cap)
+
+    def retry_delay(
+        self,
+        attempt: int,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+        idempotent: bool = True,
+    ) -> Optional[float]:
+        """Record the outcome of an attempt and decide whether to retry.
+
+        argument(s):
+        attempt: number of attempts made so far, from 1
+        response: the response received, if any
+        error: the exception raised, if any
+        idempotent: whether the request can be processed twice safely
+
+        Returns:
+            The seconds to wait before the next attempt, or None when the
+            outcome is final
+        """
+        replay_any = idempotent or self.retry_non_idempotent
+        if error is not None:
+            if not isinstance(error, self.retry_errors):
+                return None
+            if not (replay_any or was_never_sent(error)):
+                return None
+        elif response is None or (
+            response.status_code not in self.retry_status_codes
+        ):
+            self.budget.record_success()
+            return None
+        elif not (replay_any or _was_refused(response)):
+            return None
+
+        allowed = self.budget.record_failure()
+        if attempt >= self.max_attempts or not allowed:
+            return None
+        delay = self.backoff(attempt)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                delay = max(delay, retry_after)
+        return delay
+
+    def call(
+        self,
+        send: Callable[[], Any],
+        replayable: bool = True,
+        sleep: Optional[Callable[[float], Any]] = None,
+        idempotent: bool = True,
+    ) -> Any:
+        """Call send until it succeeds or the policy gives up.
+
+        argument(s):
+        send: function sending the request and returning its response
+        replayable: whether the request body can be sent again
+        sleep: function used to wait between attempts, time.sleep when
+            not supplied
+        idempotent: whether the request can be processed twice safely
+
+        Returns:
+            The last response. The last error is raised if the final
+            attempt raised one.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = send()
+            except Exception as error:
+                delay = self.retry_delay(
+                    attempt, error=error, idempotent=idempotent
+                )
+                if delay is None or not replayable:
+                    raise
+            else:
+                delay = self.retry_delay(
+                    attempt, response=response, idempotent=idempotent
+                )
+                if delay is None or not replayable:
+                    return response
+                response.close()
+            (sleep or time.sleep)(delay)
+
+    async def call_async(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        replayable: bool = True,
+        idempotent: bool = True,
+    ) -> Any:
+        """Await send until it succeeds or the policy gives up.
+
+        The asyncio version of call(), waiting with asyncio.sleep.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await send()
+            except Exception as error:
+                delay = self.retry_delay(
+                    attempt, error=error, idempotent=idempotent
+                )
+                if delay is None or not replayable:
+                    raise
+            else:
+                delay = self.retry_delay(
+                    attempt, response=response, idempotent=idempotent
+                )
+                if delay is None or not replayable:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+
+def _was_refused(response: Any) -> bool:
+    """Return True when a response shows the request was not processed."""
+    return response.status_code == 429 or (
+        response.status_code == 503
+        and response.headers.get("Retry-After") is not None
+    )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the seconds asked for by a Retry-After header, if valid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
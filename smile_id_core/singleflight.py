@@ -0,0 +1,131 @@
+"""Share one call between concurrent callers asking for the same thing.
+
+While a call for a key is in flight, SingleFlight makes every other caller
+with the same key wait for it and receive its result, or its error,
+instead of making their own call. Utilities uses it so that threads asking
+about the same job at the same moment send a single job_status request.
+AsyncSingleFlight does the same for coroutines.
+"""
+
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+__all__ = ["AsyncSingleFlight", "SingleFlight"]
+
+
+class _Call:
+    """A call in flight and, once done, its outcome."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key in threaded code.
+
+    Attributes:
+    coalesced (int): calls answered by another caller's call
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no call in flight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Call func, or wait for the call already in flight for key.
+
+        Every caller gets its own copy of the result, so no caller can
+        modify what another one receives.
+
+        Returns:
+            The result of func. Its error is raised to every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            if shared and call.error is None:
+                # Keep a copy the leader's caller cannot modify.
+                call.result = copy.deepcopy(result)
+            call.done.set()
+        return result
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent calls with the same key in asyncio code.
+
+    Use one instance per event loop.
+
+    Attributes:
+    coalesced (int): calls answered by another caller's call
+    """
+
+    def __init__(self) -> None:
+        """Initialize with no call in flight."""
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.coalesced = 0
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Await func, or the call already in flight for key.
+
+        Returns:
+            The result of func. Its error is raised to every caller.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            self._waiters[key] += 1
+            # A caller giving up must not cancel the call others wait for.
+            return copy.deepcopy(await asyncio.shield(future))
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self._waiters[key] = 0
+        try:
+            result = await func()
+        except Exception as error:
+            future.set_exception(error)
+            # Mark the error as retrieved when no other caller waited.
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled: the callers waiting are cancelled too.
+            future.cancel()
+            raise
+        else:
+            # Waiters resume after the leader's caller, which may modify
+            # the result by then, so they copy from a private copy.
+            future.set_result(
+                copy.deepcopy(result) if self._waiters[key] else result
+            )
+            return result
+        finally:
+            del self._calls[key]
+            del self._waiters[key]
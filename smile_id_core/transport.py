@@ -0,0 +1,443 @@
+"""Pooled HTTP transports shared by every SmileID API class.
+
+All outgoing requests go through a single keep-alive requests.Session so
+that DNS lookups, TCP connects and TLS handshakes are paid once per host
+rather than once per call. AsyncTransport does the same for the asyncio
+clients on top of httpx, an optional dependency.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from smile_id_core.circuit_breaker import CircuitBreakerRegistry
+from smile_id_core.codec import JsonCodec
+from smile_id_core.concurrency import record_rpc_latency
+from smile_id_core.deadline import DeadlineExceeded, Timeout, current_deadline
+from smile_id_core.rate_limit import RateLimiter
+from smile_id_core.retry import RetryPolicy, is_replayable, is_seekable
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+__all__ = ["AsyncTransport", "Transport", "get_default_transport"]
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_ASYNC_MAX_CONNECTIONS = 100
+DEFAULT_ASYNC_MAX_KEEPALIVE = 20
+# (connect, read) timeouts in seconds. The read timeout bounds the wait
+# for each chunk of the response, not the whole request.
+DEFAULT_TIMEOUT: Tuple[float, float] = (10.0, 60.0)
+
+
+class Transport:
+    """Send HTTP requests over a pooled, keep-alive requests.Session.
+
+    A single Transport is safe to share between threads and between the
+    WebApi, IdApi, BusinessVerification and Utilities classes. Transient
+    failures are retried according to its retry_policy, requests to an
+    endpoint that keeps failing fail fast with CircuitOpenError, and
+    requests wait for their endpoint's rate_limiter, if any. Requests sent
+    inside deadline_scope() have their timeouts capped by the time left.
+
+    Attributes:
+    session (requests.Session): the pooled session used for every request
+    retry_policy (RetryPolicy): decides which failed requests are retried
+    circuit_breakers (CircuitBreakerRegistry): circuit breakers by endpoint
+    rate_limiter (Optional[RateLimiter]): paces requests by endpoint
+    timeout (Optional[Timeout]): timeout of requests that do not set one
+    codec (JsonCodec): encodes payloads and decodes responses of clients
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = 0,
+        session: Optional[requests.Session] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        timeout: Optional[Timeout] = DEFAULT_TIMEOUT,
+        codec: Optional[JsonCodec] = None,
+    ):
+        """Initialize the session and mount the pooled adapters.
+
+        argument(s):
+        pool_connections: number of per-host connection pools to cache
+        pool_maxsize: maximum number of connections kept alive per host
+        max_retries: connection-level retries done by urllib3 (off by
+            default)
+        session: an existing session to use instead of creating one
+        retry_policy: retries for failed requests, a default RetryPolicy
+            when not supplied. Pass RetryPolicy(max_attempts=1) to disable.
+        circuit_breakers: circuit breakers by endpoint, a default
+            CircuitBreakerRegistry when not supplied. Pass
+            CircuitBreakerRegistry(enabled=False) to disable.
+        rate_limiter: token buckets every request, retries included, waits
+            for. Requests are not paced when not supplied.
+        timeout: timeout in seconds, or (connect, read) timeouts, of
+            requests that do not set one. None waits forever.
+        codec: JSON codec of the clients using this transport, the
+            standard library JsonCodec when not supplied
+        """
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError("pool_connections and pool_maxsize must be >= 1")
+        self.session = session if session is not None else requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else RetryPolicy()
+        )
+        self.circuit_breakers = (
+            circuit_breakers
+            if circuit_breakers is not None
+            else CircuitBreakerRegistry()
+        )
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.codec = codec if codec is not None else JsonCodec()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> Response:
+        """Send a GET request to url using the pooled session."""
+        return self._send(self.session.get, url, None, headers, True, **kwargs)
+
+    def post(
+        self,
+        url: str,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> Response:
+        """Send a POST request to url using the pooled session.
+
+        Unless idempotent is set, the request is only retried when it was
+        not processed, see RetryPolicy.
+        """
+        return self._send(
+            self.session.post, url, data, headers, idempotent, **kwargs
+        )
+
+    def put(
+        self,
+        url: str,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> Response:
+        """Send a PUT request to url using the pooled session.
+
+        PUTs upload job files to the storage host, so their duration is not
+        recorded as API latency.
+        """
+        return self._send(
+            self.session.put, url, data, headers, True, False, **kwargs
+        )
+
+    def _send(
+        self,
+        method: Callable[..., Response],
+        url: str,
+        data: Any,
+        headers: Optional[Dict[str, str]],
+        idempotent: bool,
+        timed: bool = True,
+        **kwargs: Any,
+    ) -> Response:
+        """Send a request with method, retrying it per retry_policy.
+
+        The duration of each attempt is passed to record_rpc_latency()
+        when timed is set.
+        """
+        if data is not None:
+            kwargs["data"] = data
+        # Where each attempt starts reading a file object body.
+        start = data.tell() if is_seekable(data) else None
+        timeout = kwargs.pop("timeout", self.timeout)
+        breaker = self.circuit_breakers.get(url)
+        deadline = current_deadline()
+        sleep = None if deadline is None else deadline.sleep
+
+        def attempt() -> Response:
+            if start is not None:
+                data.seek(start)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url, sleep)
+            if deadline is not None:
+                deadline.check(url)
+            # Checked last, so that nothing can fail between reserving a
+            # half-open probe and recording its outcome.
+            probe = breaker is not None and breaker.before_call()
+            started = time.monotonic()
+            try:
+                response = method(
+                    url=url,
+                    headers=headers,
+                    timeout=(
+                        timeout if deadline is None else deadline.cap(timeout)
+                    ),
+                    **kwargs,
+                )
+            except Exception as error:
+                if breaker is not None:
+                    breaker.record_failure()
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(url, deadline.timeout) from error
+                raise
+            except BaseException:
+                if probe and breaker is not None:
+                    breaker.release_probe()
+                raise
+            finally:
+                if timed:
+                    record_rpc_latency(time.monotonic() - started)
+            if breaker is not None:
+                breaker.record_status(response.status_code)
+            return response
+
+        response: Response = self.retry_policy.call(
+            attempt, is_replayable(data), sleep, idempotent
+        )
+        return response
+
+    def close(self) -> None:
+        """Close the session and release every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> "Transport":
+        """Return the transport itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the transport when leaving the context manager."""
+        self.close()
+
+
+_default_transport: Optional[Transport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """Return the process-wide transport used when none is supplied.
+
+    Returns:
+        Transport: a lazily created transport shared by all clients
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
+
+
+class AsyncTransport:
+    """Send HTTP requests over a pooled, keep-alive httpx.AsyncClient.
+
+    An AsyncTransport is bound to the event loop it is first used on, so
+    create one per loop and close it with aclose() when done.
+
+    Attributes:
+    client (httpx.AsyncClient): the pooled client used for every request
+    rate_limiter (Optional[RateLimiter]): paces requests by endpoint
+    timeout (Optional[Timeout]): timeout of requests that do not set one
+    codec (JsonCodec): encodes payloads and decodes responses of clients
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_ASYNC_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_ASYNC_MAX_KEEPALIVE,
+        client: Optional["httpx.AsyncClient"] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        timeout: Optional[Timeout] = DEFAULT_TIMEOUT,
+        codec: Optional[JsonCodec] = None,
+    ):
+        """Initialize the pooled async client.
+
+        argument(s):
+        max_connections: maximum number of concurrent connections
+        max_keepalive_connections: maximum number of idle connections kept
+        client: an existing httpx.AsyncClient to use instead of creating one
+        retry_policy: retries for failed requests, a default RetryPolicy
+            when not supplied
+        circuit_breakers: circuit breakers by endpoint, a default
+            CircuitBreakerRegistry when not supplied
+        rate_limiter: token buckets every request waits for, without
+            blocking the event loop. Requests are not paced when not
+            supplied.
+        timeout: timeout in seconds, or (connect, read) timeouts, of
+            requests that do not set one. None waits forever.
+        codec: JSON codec of the clients using this transport, the
+            standard library JsonCodec when not supplied
+
+        Requests sent inside deadline_scope() time out when the deadline
+        passes.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncTransport requires httpx, install it with"
+                " `pip install httpx`"
+            )
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                ),
+                timeout=_httpx_timeout(timeout),
+            )
+        self.client = client
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else RetryPolicy()
+        )
+        self.circuit_breakers = (
+            circuit_breakers
+            if circuit_breakers is not None
+            else CircuitBreakerRegistry()
+        )
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.codec = codec if codec is not None else JsonCodec()
+
+    async def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> "httpx.Response":
+        """Send a GET request to url using the pooled client."""
+        return await self._send("GET", url, None, headers, True, **kwargs)
+
+    async def post(
+        self,
+        url: str,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> "httpx.Response":
+        """Send a POST request to url using the pooled client.
+
+        Unless idempotent is set, the request is only retried when it was
+        not processed, see RetryPolicy.
+        """
+        return await self._send(
+            "POST", url, data, headers, idempotent, **kwargs
+        )
+
+    async def put(
+        self,
+        url: str,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> "httpx.Response":
+        """Send a PUT request to url using the pooled client.
+
+        PUTs upload job files to the storage host, so their duration is not
+        recorded as API latency.
+        """
+        return await self._send(
+            "PUT", url, data, headers, True, False, **kwargs
+        )
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        data: Any,
+        headers: Optional[Dict[str, str]],
+        idempotent: bool,
+        timed: bool = True,
+        **kwargs: Any,
+    ) -> "httpx.Response":
+        """Send a request, retrying it per retry_policy, see Transport."""
+        if data is not None:
+            kwargs["content"] = data
+        start = data.tell() if is_seekable(data) else None
+        breaker = self.circuit_breakers.get(url)
+        timeout = kwargs.pop("timeout", self.timeout)
+
+        deadline = current_deadline()
+
+        async def attempt() -> "httpx.Response":
+            if start is not None:
+                data.seek(start)
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(url)
+                if delay > 0:
+                    if deadline is not None and delay >= deadline.remaining():
+                        raise DeadlineExceeded(url, deadline.timeout)
+                    await asyncio.sleep(delay)
+            request_timeout = timeout
+            if deadline is not None:
+                deadline.check(url)
+                request_timeout = deadline.cap(timeout)
+            probe = breaker is not None and breaker.before_call()
+            started = time.monotonic()
+            try:
+                response = await self.client.request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=_httpx_timeout(request_timeout),
+                    **kwargs,
+                )
+            except Exception as error:
+                if breaker is not None:
+                    breaker.record_failure()
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(url, deadline.timeout) from error
+                raise
+            except BaseException:
+                # asyncio.CancelledError: the probe never got an outcome.
+                if probe and breaker is not None:
+                    breaker.release_probe()
+                raise
+            finally:
+                if timed:
+                    record_rpc_latency(time.monotonic() - started)
+            if breaker is not None:
+                breaker.record_status(response.status_code)
+            return response
+
+        response: "httpx.Response" = await self.retry_policy.call_async(
+            attempt, is_replayable(data), idempotent
+        )
+        return response
+
+    async def aclose(self) -> None:
+        """Close the client and release every pooled connection."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncTransport":
+        """Return the transport itself when used as a context manager."""
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """Close the transport when leaving the context manager."""
+        await self.aclose()
+
+
+def _httpx_timeout(timeout: Optional[Timeout]) -> "httpx.Timeout":
+    """Return the httpx.Timeout of a requests style timeout."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
@@ -1,7 +1,7 @@
 """Define strict typings to paramters used throughout the SmileID SDK."""
 
 import sys
-from typing import Union
+from typing import BinaryIO, Union
 
 if sys.version_info >= (3, 8):
     from typing import TypedDict
@@ -41,4 +41,17 @@ FileImage = TypedDict(
     },
 )
 
-ImageParams = Union[Base64Image, FileImage]
+# Image content held by the caller: bytes-like objects are written to the
+# zip file as they are and binary files, which must be seekable, are read in
+# chunks from their start. file_name only names the zip entry and must end
+# with an image file extension.
+BinaryImage = TypedDict(
+    "BinaryImage",
+    {
+        "image_type_id": int,
+        "file_name": str,
+        "content": Union[bytes, bytearray, memoryview, BinaryIO],
+    },
+)
+
+ImageParams = Union[Base64Image, FileImage, BinaryImage]
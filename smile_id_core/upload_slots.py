@@ -0,0 +1,232 @@
+"""Request upload slots ahead of the jobs that will use them.
+
+Before its files can be uploaded, every job waits for a round trip to
+/upload, which returns the upload_url and smile_job_id of the job. That
+request only depends on the job's partner_params, so when the job_id is
+known in advance WebApi.prefetch_upload() can make it on a background
+thread, and submit_job then takes the ready slot instead of waiting.
+
+Every slot requested creates a job upstream, so UploadSlotPool holds at
+most max_slots of them and drops those older than ttl, whose upload_url
+may have expired, or than the ttl of their reservation, which
+WebApi.prefetch_upload bounds by how long its signature stays fresh.
+"""
+
+import copy
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from smile_id_core.types import SignatureParams
+
+__all__ = ["UploadSlot", "UploadSlotPool", "UploadSlotStats"]
+
+# (user_id, job_id)
+_SlotKey = Tuple[str, str]
+
+
+class UploadSlot(NamedTuple):
+    """What /upload returned for a job.
+
+    Attributes:
+    upload_url (str): where the job's zip file is uploaded
+    smile_job_id (str): id assigned by SmileID
+    signature_params (SignatureParams): signature the slot was requested
+        with, also written to the job's info.json
+    """
+
+    upload_url: str
+    smile_job_id: str
+    signature_params: SignatureParams
+
+
+class UploadSlotStats(NamedTuple):
+    """Counters of an UploadSlotPool.
+
+    Attributes:
+    reserved (int): slots requested
+    used (int): slots taken by a job
+    wasted (int): slots that failed, expired, did not match their job's
+        parameters or were still held when the pool closed
+    size (int): slots held, ready or still being requested
+    """
+
+    reserved: int
+    used: int
+    wasted: int
+    size: int
+
+
+class _Reservation:
+    """A slot being requested or ready, and the job it is for."""
+
+    def __init__(
+        self,
+        partner_params: Dict[str, Any],
+        use_enrolled_image: bool,
+        expires_at: float,
+    ):
+        self.partner_params = partner_params
+        self.use_enrolled_image = use_enrolled_image
+        self.expires_at = expires_at
+        self.future: "Optional[Future[UploadSlot]]" = None
+
+
+class UploadSlotPool:
+    """Bounded pool of upload slots requested in the background.
+
+    A pool is safe to share between threads, and between clients with
+    the same credentials.
+    """
+
+    def __init__(
+        self,
+        max_slots: int = 8,
+        ttl: float = 300.0,
+        max_workers: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize an empty pool.
+
+        argument(s):
+        max_slots: most slots held at once, ready or being requested
+        ttl: seconds after its request a slot is no longer used
+        max_workers: most /upload requests in flight at once
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        if max_slots < 1 or ttl <= 0 or max_workers < 1:
+            raise ValueError(
+                "max_slots and max_workers must be >= 1 and ttl positive"
+            )
+        self.max_slots = max_slots
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._slots: Dict[_SlotKey, _Reservation] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="smile-id-upload-slots"
+        )
+        self._closed = False
+        self._reserved = 0
+        self._used = 0
+        self._wasted = 0
+
+    def reserve(
+        self,
+        partner_params: Dict[str, Any],
+        use_enrolled_image: bool,
+        fetch: Callable[[], UploadSlot],
+        ttl: Optional[float] = None,
+    ) -> bool:
+        """Request the slot of a job in the background, if there is room.
+
+        argument(s):
+        partner_params: the partner_params the job will be submitted with
+        use_enrolled_image: the job's use_enrolled_image option
+        fetch: makes the /upload request for the job
+        ttl: seconds after its request the slot is no longer used, at
+            most the pool's ttl, which is the default
+
+        Returns:
+            bool: whether a slot for the job is held, including one
+            reserved before. False when the pool is full.
+        """
+        key = _key(partner_params)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("UploadSlotPool is closed")
+            self._drop_expired()
+            if key in self._slots:
+                return True
+            if len(self._slots) >= self.max_slots:
+                return False
+            reservation = _Reservation(
+                copy.deepcopy(partner_params),
+                use_enrolled_image,
+                self._clock()
+                + (self.ttl if ttl is None else min(self.ttl, ttl)),
+            )
+            self._slots[key] = reservation
+            self._reserved += 1
+            reservation.future = self._executor.submit(fetch)
+        return True
+
+    def take(
+        self, partner_params: Dict[str, Any], use_enrolled_image: bool
+    ) -> Optional[UploadSlot]:
+        """Remove and return the slot of a job, if one can be used.
+
+        A slot still being requested is waited for, which is never longer
+        than requesting a new one.
+
+        Returns:
+            The slot, or None when the job has no usable slot and must
+            request one itself.
+        """
+        with self._lock:
+            reservation = self._slots.pop(_key(partner_params), None)
+        if reservation is None:
+            return None
+        assert reservation.future is not None
+        try:
+            slot = reservation.future.result()
+        except Exception:
+            slot = None
+        usable = (
+            slot is not None
+            and self._clock() < reservation.expires_at
+            and reservation.partner_params == partner_params
+            and reservation.use_enrolled_image == use_enrolled_image
+        )
+        with self._lock:
+            if usable:
+                self._used += 1
+            else:
+                self._wasted += 1
+        return slot if usable else None
+
+    @property
+    def stats(self) -> UploadSlotStats:
+        """Return the reserved, used and wasted counters and the size."""
+        with self._lock:
+            self._drop_expired()
+            return UploadSlotStats(
+                self._reserved, self._used, self._wasted, len(self._slots)
+            )
+
+    def close(self) -> None:
+        """Drop every slot held and stop requesting new ones."""
+        with self._lock:
+            self._closed = True
+            self._wasted += len(self._slots)
+            reservations, self._slots = self._slots, {}
+        for reservation in reservations.values():
+            if reservation.future is not None:
+                reservation.future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "UploadSlotPool":
+        """Return the pool itself when used as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the pool when leaving the context manager."""
+        self.close()
+
+    def _drop_expired(self) -> None:
+        """Drop expired slots. The lock must be held."""
+        now = self._clock()
+        expired = [
+            key
+            for key, reservation in self._slots.items()
+            if now >= reservation.expires_at
+        ]
+        for key in expired:
+            del self._slots[key]
+        self._wasted += len(expired)
+
+
+def _key(partner_params: Dict[str, Any]) -> _SlotKey:
+    """Return the key of a job's slot."""
+    return str(partner_params.get("user_id")), str(partner_params.get("job_id"))
@@ -0,0 +1,318 @@
+"""Receive job callbacks sent by SmileID to a WebApi call_back_url.
+
+CallbackReceiver checks the signature and timestamp of every callback and
+resolves the future of the job it belongs to, so a WebApi polling a job
+queries /job_status as soon as its callback arrives. It can be mounted as
+a WSGI or ASGI app, or served on its own with the standard library's
+http.server.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from smile_id_core.Signature import Signature
+
+__all__ = ["CallbackReceiver"]
+
+DEFAULT_MAX_AGE = 3600
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+DEFAULT_PENDING_TTL = 24 * 3600
+
+JobKey = Tuple[str, str]
+Callback = Dict[str, Any]
+
+
+class CallbackReceiver:
+    """Match signed SmileID callbacks to the jobs waiting for them.
+
+    Jobs are registered by user_id and job_id, either directly with
+    register() or by a WebApi created with this receiver. Each registration
+    returns a concurrent.futures.Future resolved with the callback payload.
+    Registrations whose callback never arrives are dropped, and their
+    futures cancelled, after pending_ttl seconds.
+
+    Attributes:
+    partner_id (str): Smile partner id from the portal
+    max_age (float): oldest callback timestamp accepted, in seconds
+    pending_ttl (float): seconds a job waits for its callback
+    """
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        default_handler: Optional[Callable[[Callback], Any]] = None,
+        pending_ttl: Optional[float] = DEFAULT_PENDING_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the receiver.
+
+        argument(s):
+        partner_id: distinct identification number for a partner
+        api_key: api key obtained from the partner portal
+        max_age: reject callbacks whose timestamp is older than this many
+            seconds. None disables the check.
+        max_body_size: largest request body accepted, in bytes
+        default_handler: called with verified callbacks that do not match
+            a registered job
+        pending_ttl: seconds after which a job still waiting for its
+            callback is dropped. None keeps jobs until they are resolved
+            or unregistered.
+        clock: monotonic clock in seconds, mostly useful for tests
+        """
+        self.partner_id = partner_id
+        self.signature = Signature(partner_id, api_key)
+        self.max_age = max_age
+        self.max_body_size = max_body_size
+        self.default_handler = default_handler
+        self.pending_ttl = pending_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: Dict[JobKey, "Future[Callback]"] = {}
+        self._expires_at: Dict[JobKey, float] = {}
+
+    def register(
+        self,
+        partner_params: Dict[str, Any],
+        handler: Optional[Callable[["Future[Callback]"], Any]] = None,
+    ) -> "Future[Callback]":
+        """Wait for the callback of a job.
+
+        Registering a job that is already pending returns its existing
+        future, so callers can look a job up after WebApi registered it.
+
+        argument(s):
+        partner_params: Dict containing the job's user_id and job_id
+        handler: called with the future once the callback arrives
+
+        Returns:
+            A future resolved with the verified callback payload
+        """
+        key = _job_key(partner_params)
+        with self._lock:
+            expired = self._expire()
+            future = self._pending.get(key)
+            if future is None:
+                future = Future()
+                self._pending[key] = future
+                if self.pending_ttl is not None:
+                    self._expires_at[key] = self._clock() + self.pending_ttl
+        for stale in expired:
+            stale.cancel()
+        if handler is not None:
+            future.add_done_callback(handler)
+        return future
+
+    def unregister(self, partner_params: Dict[str, Any]) -> None:
+        """Stop waiting for a job's callback and cancel its future."""
+        with self._lock:
+            future = self._pop(_job_key(partner_params))
+        if future is not None:
+            future.cancel()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of jobs still waiting for a callback."""
+        with self._lock:
+            expired = self._expire()
+            pending = len(self._pending)
+        for stale in expired:
+            stale.cancel()
+        return pending
+
+    def _pop(self, key: JobKey) -> Optional["Future[Callback]"]:
+        """Remove a registration, the lock being held."""
+        self._expires_at.pop(key, None)
+        return self._pending.pop(key, None)
+
+    def _expire(self) -> List["Future[Callback]"]:
+        """Remove registrations past pending_ttl, the lock being held.
+
+        Returns:
+            The futures of the expired jobs, to be cancelled by the caller
+            once the lock is released
+        """
+        # Jobs expire in the order they were registered, so only the
+        # oldest registrations need to be looked at.
+        now = self._clock()
+        keys: List[JobKey] = []
+        for key, expires_at in self._expires_at.items():
+            if expires_at > now:
+                break
+            keys.append(key)
+        for key in keys:
+            del self._expires_at[key]
+        return [self._pending.pop(key) for key in keys]
+
+    def handle(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Verify a callback body and resolve the job it belongs to.
+
+        argument(s):
+        body: raw request body sent by SmileID
+
+        Returns:
+            The HTTP status code and JSON body to answer with
+        """
+        if len(body) > self.max_body_size:
+            return 413, {"error": "Callback body is too large"}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"error": "Callback body is not valid JSON"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Callback body is not valid JSON"}
+
+        timestamp = payload.get("timestamp")
+        signature = payload.get("signature")
+        if not isinstance(timestamp, str) or not isinstance(signature, str):
+            return 401, {"error": "Missing callback signature or timestamp"}
+        if not self.signature.confirm_signature(timestamp, signature):
+            return 401, {"error": "Invalid callback signature"}
+        if not self._is_fresh(timestamp):
+            return 401, {"error": "Callback timestamp is too old"}
+
+        partner_params = payload.get("PartnerParams")
+        if partner_params is None and isinstance(payload.get("result"), dict):
+            partner_params = payload["result"].get("PartnerParams")
+        future = None
+        if isinstance(partner_params, dict):
+            with self._lock:
+                future = self._pop(_job_key(partner_params))
+        if future is None:
+            if self.default_handler is not None:
+                self.default_handler(payload)
+        elif future.set_running_or_notify_cancel():
+            future.set_result(payload)
+        return 200, {"success": True}
+
+    def wsgi_app(
+        self, environ: Dict[str, Any], start_response: Callable[..., Any]
+    ) -> Iterable[bytes]:
+        """Serve callbacks as a WSGI application."""
+        if environ.get("REQUEST_METHOD") != "POST":
+            status, response = 405, {"error": "Method not allowed"}
+        else:
+            try:
+                length = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                length = 0
+            if length > self.max_body_size:
+                status, response = 413, {"error": "Callback body is too large"}
+            else:
+                status, response = self.handle(
+                    environ["wsgi.input"].read(length)
+                )
+        data = json.dumps(response).encode("utf-8")
+        start_response(
+            f"{status} {HTTPStatus(status).phrase}",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(data))),
+            ],
+        )
+        return [data]
+
+    async def asgi_app(
+        self,
+        scope: Dict[str, Any],
+        receive: Callable[..., Any],
+        send: Callable[..., Any],
+    ) -> None:
+        """Serve callbacks as an ASGI application."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        if scope.get("method") != "POST":
+            status, response = 405, {"error": "Method not allowed"}
+        else:
+            chunks: List[bytes] = []
+            size = 0
+            more_body = True
+            while more_body and size <= self.max_body_size:
+                message = await receive()
+                chunk = message.get("body", b"")
+                chunks.append(chunk)
+                size += len(chunk)
+                more_body = message.get("more_body", False)
+            status, response = self.handle(b"".join(chunks))
+        data = json.dumps(response).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(data)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": data})
+
+    def make_server(
+        self, host: str = "", port: int = 8080
+    ) -> ThreadingHTTPServer:
+        """Return a standalone http.server that receives callbacks.
+
+        Call serve_forever() on the returned server, usually from a
+        background thread, and shutdown() to stop it.
+
+        argument(s):
+        host: interface to listen on, all interfaces by default
+        port: port to listen on
+        """
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = 0
+                if length > receiver.max_body_size:
+                    status, response = 413, {
+                        "error": "Callback body is too large"
+                    }
+                else:
+                    status, response = receiver.handle(self.rfile.read(length))
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def _is_fresh(self, timestamp: str) -> bool:
+        """Check that a callback timestamp is no older than max_age."""
+        if self.max_age is None:
+            return True
+        try:
+            sent_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        if sent_at.tzinfo is None:
+            sent_at = sent_at.replace(tzinfo=timezone.utc)
+        age = (datetime.now(timezone.utc) - sent_at).total_seconds()
+        return age <= self.max_age
+
+
+def _job_key(partner_params: Dict[str, Any]) -> JobKey:
+    """Return the key a job is registered under."""
+    return str(partner_params.get("user_id")), str(partner_params.get("job_id"))
@@ -0,0 +1,241 @@
+"""Test class for the asyncio clients."""
+
+import asyncio
+import io
+import json
+import zipfile
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from smile_id_core.AsyncIdApi import AsyncIdApi
+from smile_id_core.AsyncUtilities import AsyncUtilities
+from smile_id_core.AsyncWebApi import AsyncWebApi
+from smile_id_core.circuit_breaker import CircuitBreakerRegistry
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature
+from smile_id_core.transport import AsyncTransport
+from smile_id_core.types import ImageParams, OptionsParams
+from tests.conftest import get_job_status_response, get_pre_upload_response
+
+httpx = pytest.importorskip("httpx")
+
+
+def mock_transport(
+    handler: Callable[[Any], Any]
+) -> Tuple[AsyncTransport, List[Any]]:
+    """Return an AsyncTransport whose requests are answered by handler."""
+    calls: List[Any] = []
+
+    def record(request: Any) -> Any:
+        calls.append(request)
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    return AsyncTransport(client=client), calls
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Skip the poll delays so tests run instantly."""
+
+    real_sleep = asyncio.sleep
+
+    async def sleep(_: float) -> None:
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+
+def test_async_get_job_status(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    partner_params_util: Dict[str, Any],
+) -> None:
+    """Job status is queried, signature checked and returned as a dict."""
+    api_key, partner_id, sid_server = setup_client
+    signature = signature_fixture.generate_signature()
+    transport, calls = mock_transport(
+        lambda request: httpx.Response(
+            200, json=get_job_status_response(signature)
+        )
+    )
+    utilities = AsyncUtilities(partner_id, api_key, sid_server, transport)
+
+    options: Any = None
+
+    async def run() -> Dict[str, Any]:
+        async with transport:
+            return await utilities.get_job_status(partner_params_util, options)
+
+    result = asyncio.run(run())
+    assert result["job_complete"] is True
+    assert (
+        str(calls[0].url) == "https://testapi.smileidentity.com/v1/job_status"
+    )
+    body = json.loads(calls[0].content)
+    assert body["job_id"] == partner_params_util["job_id"]
+
+
+def test_async_id_api_error(
+    setup_client: Tuple[str, str, str],
+    kyc_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+) -> None:
+    """Non 200 responses raise a ServerError with the response body."""
+    api_key, partner_id, sid_server = setup_client
+    transport, _ = mock_transport(
+        lambda request: httpx.Response(
+            400, json={"code": "2204", "error": "unauthorized"}
+        )
+    )
+    id_api = AsyncIdApi(partner_id, api_key, sid_server, transport)
+    with pytest.raises(ServerError) as server_error:
+        asyncio.run(id_api.submit_job(kyc_partner_params, kyc_id_info))
+    assert str(server_error.value) == (
+        "Failed to post entity to "
+        "https://testapi.smileidentity.com/v1/id_verification, status=400,"
+        " response={'code': '2204', 'error': 'unauthorized'}"
+    )
+
+
+def test_async_web_api_submit_job(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """Upload prep, zip upload and polling all go through the transport."""
+    api_key, partner_id, sid_server = setup_client
+    signature = signature_fixture.generate_signature()
+    statuses = iter([False, True])
+
+    def handler(request: Any) -> Any:
+        if request.url.path.endswith("/upload"):
+            return httpx.Response(200, json=get_pre_upload_response(signature))
+        if request.method == "PUT":
+            return httpx.Response(200, json={})
+        return httpx.Response(
+            200, json=get_job_status_response(signature, next(statuses))
+        )
+
+    transport, calls = mock_transport(handler)
+    web_api = AsyncWebApi(
+        partner_id, "https://a_callback.com", api_key, sid_server, transport
+    )
+    result = asyncio.run(
+        web_api.submit_job(
+            web_partner_params, image_params, kyc_id_info, option_params
+        )
+    )
+    assert result["job_complete"] is True
+    assert [request.method for request in calls] == [
+        "POST",
+        "PUT",
+        "POST",
+        "POST",
+    ]
+    assert calls[1].headers["Content-type"] == "application/zip"
+
+
+def test_async_submit_job_pipelines_upload(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """With pipeline_uploads the images are zipped before info.json."""
+    api_key, partner_id, sid_server = setup_client
+    signature = signature_fixture.generate_signature()
+
+    def handler(request: Any) -> Any:
+        if request.url.path.endswith("/upload"):
+            return httpx.Response(200, json=get_pre_upload_response(signature))
+        return httpx.Response(200, json={})
+
+    transport, calls = mock_transport(handler)
+    web_api = AsyncWebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        transport,
+        pipeline_uploads=True,
+    )
+    option_params["return_job_status"] = False
+    result = asyncio.run(
+        web_api.submit_job(
+            web_partner_params, image_params, kyc_id_info, option_params
+        )
+    )
+    assert result["success"] is True
+    zip_file = zipfile.ZipFile(io.BytesIO(calls[1].content))
+    assert zip_file.namelist() == ["base64imgString", "info.json"]
+
+
+def test_async_client_closes_owned_transport(
+    setup_client: Tuple[str, str, str]
+) -> None:
+    """A client only closes the transport it created itself."""
+    api_key, partner_id, sid_server = setup_client
+    transport, _ = mock_transport(lambda request: httpx.Response(200))
+
+    async def run() -> Tuple[bool, bool]:
+        async with AsyncUtilities(
+            partner_id, api_key, sid_server, transport
+        ) as shared:
+            pass
+        async with AsyncUtilities(partner_id, api_key, sid_server) as owned:
+            pass
+        return (
+            shared.async_transport.client.is_closed,
+            owned.async_transport.client.is_closed,
+        )
+
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_cancelled_probe_is_given_back() -> None:
+    """A half-open probe cancelled mid-request does not stay reserved."""
+    registry = CircuitBreakerRegistry(
+        minimum_calls=1, window_size=1, reset_timeout=0
+    )
+    url = "https://testapi.smileidentity.com/v1/upload"
+    breaker = registry.get(url)
+    assert breaker is not None
+    breaker.record_failure()
+
+    def cancel(request: Any) -> Any:
+        raise asyncio.CancelledError()
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(cancel))
+    transport = AsyncTransport(client=client, circuit_breakers=registry)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(transport.post(url, "{}"))
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+
+
+def test_requests_time_out_by_default() -> None:
+    """Requests get DEFAULT_TIMEOUT unless a timeout is given."""
+    timeouts: List[Dict[str, Any]] = []
+
+    def handler(request: Any) -> Any:
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def send() -> None:
+        await AsyncTransport(client=client).get("https://example.com")
+        await AsyncTransport(client=client, timeout=5).get(
+            "https://example.com"
+        )
+
+    asyncio.run(send())
+    assert timeouts[0]["connect"] == 10 and timeouts[0]["read"] == 60
+    assert timeouts[1]["connect"] == timeouts[1]["read"] == 5
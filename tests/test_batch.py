@@ -0,0 +1,106 @@
+"""Test class for bulk job submission."""
+
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+from unittest.mock import patch
+
+import pytest
+
+from smile_id_core import IdApi, JobResult, ServerError
+from smile_id_core.batch import run_jobs
+
+
+def test_results_in_completion_and_input_order() -> None:
+    """Results stream as jobs finish, or in input order when ordered."""
+
+    def submit(delay: float) -> Dict[str, Any]:
+        time.sleep(delay)
+        return {"delay": delay}
+
+    jobs = [(0.2,), (0.0,), (0.1,)]
+    unordered = list(run_jobs(submit, jobs, max_in_flight=3))
+    assert [result.position for result in unordered] == [1, 2, 0]
+
+    ordered = list(run_jobs(submit, jobs, max_in_flight=3, ordered=True))
+    assert [result.position for result in ordered] == [0, 1, 2]
+    assert [result.result for result in ordered] == [
+        {"delay": 0.2},
+        {"delay": 0.0},
+        {"delay": 0.1},
+    ]
+
+
+def test_errors_are_returned_per_job() -> None:
+    """A failing job does not stop the rest of the batch."""
+
+    def submit(job_id: str) -> Dict[str, Any]:
+        if job_id == "bad":
+            raise ServerError("Failed to post entity")
+        return {"job_id": job_id}
+
+    results = list(
+        run_jobs(
+            submit,
+            [{"job_id": "a"}, {"job_id": "bad"}, {"job_id": "b"}],
+            ordered=True,
+        )
+    )
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ServerError)
+    assert results[1].result is None
+    assert results[2] == JobResult(2, {"job_id": "b"}, {"job_id": "b"}, None)
+
+
+def test_input_is_consumed_lazily() -> None:
+    """No more than max_in_flight jobs are read or running at once."""
+    lock = threading.Lock()
+    running: List[int] = [0, 0]
+    read: List[int] = []
+
+    def jobs() -> Iterator[List[int]]:
+        for index in range(20):
+            read.append(index)
+            yield [index]
+
+    def submit(index: int) -> Dict[str, Any]:
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return {"index": index}
+
+    results = run_jobs(submit, jobs(), max_in_flight=3)
+    first = next(results)
+    assert first.ok
+    assert len(read) <= 4
+    assert len(list(results)) == 19
+    assert running[1] <= 3
+
+    with pytest.raises(ValueError):
+        next(run_jobs(submit, [], max_in_flight=0))
+
+
+def test_id_api_submit_jobs(
+    kyc_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    client: IdApi,
+) -> None:
+    """IdApi.submit_jobs submits every job through submit_job."""
+    jobs = [
+        {
+            "partner_params": {**kyc_partner_params, "job_id": str(index)},
+            "id_params": kyc_id_info,
+        }
+        for index in range(5)
+    ]
+    with patch("requests.Session.post") as mocked_post:
+        mocked_post.return_value.status_code = 200
+        mocked_post.return_value.json.return_value = {"ResultCode": "1012"}
+        results = list(client.submit_jobs(jobs, max_in_flight=2, ordered=True))
+
+    assert mocked_post.call_count == 5
+    assert [result.job for result in results] == jobs
+    assert all(result.result == {"ResultCode": "1012"} for result in results)
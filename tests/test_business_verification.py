@@ -228,8 +228,8 @@ def test_error_return_data(
     kyb_partner_params["job_type"] = JobType.BUSINESS_VERIFICATION
     with pytest.raises(ServerError) as value_error:
         with (
-            patch("requests.post") as mocked_post,
-            patch("requests.get") as mocked_get,
+            patch("requests.Session.post") as mocked_post,
+            patch("requests.Session.get") as mocked_get,
         ):
             mocked_post.return_value.status_code = 400
             mocked_post.return_value.ok = True
@@ -262,7 +262,7 @@ def test_validate_return_data(
 ) -> None:
     """Validate KYB responses output on successful job_submit"""
     signature_fixture.generate_signature()
-    with patch("requests.post") as mocked_post:
+    with patch("requests.Session.post") as mocked_post:
         mocked_post.return_value.status_code = 200
         mocked_post.return_value.ok = True
         response = client_kyb.submit_job(kyb_partner_params, kyb_id_info)
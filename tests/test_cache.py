@@ -0,0 +1,134 @@
+"""Test class for the job status cache."""
+
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+import responses
+
+from smile_id_core import Utilities
+from smile_id_core.cache import (
+    CacheStats,
+    JobStatusCache,
+    ZipEntry,
+    ZipEntryCache,
+)
+from smile_id_core.Signature import Signature
+from smile_id_core.types import OptionsParams
+from tests.conftest import stub_get_job_status
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_completed_jobs_stay_until_evicted() -> None:
+    """Completed jobs are kept until the least recently used is evicted."""
+    clock = FakeClock()
+    cache = JobStatusCache(max_entries=2, clock=clock)
+    for job_id in ("a", "b"):
+        cache.put(("user", job_id, False, False), {"job_complete": True})
+    clock.now = 10**6
+    assert cache.get(("user", "a", False, False)) == {"job_complete": True}
+
+    cache.put(("user", "c", False, False), {"job_complete": True})
+    assert cache.get(("user", "b", False, False)) is None
+    assert cache.get(("user", "a", False, False)) is not None
+    assert cache.stats == CacheStats(hits=2, misses=1, evictions=1, size=2)
+
+
+def test_pending_jobs_expire() -> None:
+    """Jobs in progress are only served for pending_ttl seconds."""
+    clock = FakeClock()
+    key = ("user", "job", False, False)
+    cache = JobStatusCache(pending_ttl=2, clock=clock)
+    cache.put(key, {"job_complete": False})
+    clock.now = 1
+    assert cache.get(key) == {"job_complete": False}
+    clock.now = 2
+    assert cache.get(key) is None
+    assert cache.stats.size == 0
+
+    JobStatusCache(pending_ttl=0).put(key, {"job_complete": False})
+    assert JobStatusCache(pending_ttl=0).get(key) is None
+
+
+def test_cached_statuses_are_copies() -> None:
+    """Modifying a returned status does not change the cached one."""
+    key = ("user", "job", False, False)
+    cache = JobStatusCache()
+    status: Dict[str, Any] = {"job_complete": True, "result": {"a": 1}}
+    cache.put(key, status)
+    status["result"]["a"] = 2
+    cached = cache.get(key)
+    assert cached is not None and cached["result"] == {"a": 1}
+    cached["result"]["a"] = 3
+    assert cache.get(key) == {"job_complete": True, "result": {"a": 1}}
+
+
+def test_key_includes_option_flags() -> None:
+    """Queries with and without history are cached separately."""
+    options = OptionsParams(
+        return_job_status=True,
+        return_history=True,
+        return_images=False,
+        use_enrolled_image=False,
+    )
+    assert JobStatusCache.key("user", "job", options) == (
+        "user",
+        "job",
+        False,
+        True,
+    )
+
+
+def test_zip_entries_are_bounded_by_size() -> None:
+    """Zip entries are evicted once their data exceeds max_bytes."""
+    cache = ZipEntryCache(max_bytes=10)
+
+    def entry(size: int) -> ZipEntry:
+        return ZipEntry(zipfile.ZipInfo("selfie.jpg"), b"x" * size)
+
+    cache.put("a", entry(4))
+    cache.put("b", entry(4))
+    assert cache.get("a") is not None
+    cache.put("c", entry(4))
+    cache.put("d", entry(11))
+
+    assert cache.get("b") is None
+    assert cache.get("d") is None
+    assert cache.nbytes == 8
+    assert cache.stats == CacheStats(1, 2, 1, 2)
+    cache.clear()
+    assert cache.nbytes == 0
+
+
+@responses.activate
+def test_utilities_serve_completed_jobs_from_cache(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    option_params: OptionsParams,
+    kyc_partner_params: Dict[str, Any],
+) -> None:
+    """A completed job is queried once, then served from the cache."""
+    api_key, partner_id, sid_server = setup_client
+    cache = JobStatusCache()
+    utilities = Utilities(
+        partner_id, api_key, sid_server, job_status_cache=cache
+    )
+    signature = signature_fixture.generate_signature(datetime.now().isoformat())
+    expected = stub_get_job_status(signature, True)
+
+    for _ in range(3):
+        job_status = utilities.get_job_status(
+            kyc_partner_params, option_params, signature
+        )
+        assert job_status == expected["json"]
+    assert len(responses.calls) == 1
+    assert cache.stats.hits == 2
@@ -0,0 +1,129 @@
+"""Test class for the per-endpoint circuit breakers."""
+
+from typing import List
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from smile_id_core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    endpoint_key,
+)
+from smile_id_core.deadline import DeadlineExceeded, deadline_scope
+from smile_id_core.retry import RetryPolicy
+from smile_id_core.ServerError import ServerError
+from smile_id_core.transport import Transport
+
+URL = "https://testapi.smileidentity.com/v1/upload"
+
+
+def test_opens_on_error_rate_and_probes_half_open() -> None:
+    """The circuit opens at the error rate and closes after a good probe."""
+    now: List[float] = [0.0]
+    breaker = CircuitBreaker(
+        URL,
+        failure_rate_threshold=0.5,
+        minimum_calls=4,
+        window_size=4,
+        reset_timeout=10,
+        clock=lambda: now[0],
+    )
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.endpoint == URL
+    assert error.value.retry_after == 10
+    assert isinstance(error.value, ServerError)
+
+    now[0] = 10
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_rejects_invalid_options() -> None:
+    """Thresholds and window sizes are validated."""
+    pytest.raises(ValueError, CircuitBreaker, URL, failure_rate_threshold=0)
+    pytest.raises(ValueError, CircuitBreaker, URL, 0.5, 10, 5)
+    pytest.raises(ValueError, CircuitBreaker, URL, half_open_max_calls=0)
+
+
+def test_endpoint_key() -> None:
+    """API endpoints are keyed by path, presigned uploads by host."""
+    assert endpoint_key(URL) == URL
+    assert (
+        endpoint_key("https://bucket.s3.amazonaws.com/jobs/1.zip?X-Sig=abc")
+        == "https://bucket.s3.amazonaws.com"
+    )
+    registry = CircuitBreakerRegistry(minimum_calls=2, window_size=2)
+    assert registry.get(URL) is registry.get(URL + "?")
+    assert registry.get(URL) is not registry.get(URL + "/other")
+    assert CircuitBreakerRegistry(enabled=False).get(URL) is None
+
+
+@responses.activate
+def test_transport_fails_fast_when_open() -> None:
+    """Once an endpoint's circuit opens, requests to it are not sent."""
+    responses.add(responses.POST, URL, status=503)
+    responses.add(responses.POST, URL + "/other", status=200)
+    transport = Transport(
+        retry_policy=RetryPolicy(max_attempts=1),
+        circuit_breakers=CircuitBreakerRegistry(
+            minimum_calls=3, window_size=3, reset_timeout=60
+        ),
+    )
+    for _ in range(3):
+        assert transport.post(URL, "{}").status_code == 503
+
+    with pytest.raises(CircuitOpenError):
+        transport.post(URL, "{}")
+    assert len(responses.calls) == 3
+    assert transport.post(URL + "/other", "{}").status_code == 200
+
+
+@responses.activate
+def test_probes_are_not_leaked() -> None:
+    """A probe that ends without an outcome is given back."""
+    now: List[float] = [0.0]
+    registry = CircuitBreakerRegistry(
+        minimum_calls=1, window_size=1, reset_timeout=10, clock=lambda: now[0]
+    )
+    transport = Transport(
+        retry_policy=RetryPolicy(max_attempts=1), circuit_breakers=registry
+    )
+    breaker = registry.get(URL)
+    assert breaker is not None
+    breaker.record_failure()
+    now[0] = 10
+
+    with deadline_scope(0), pytest.raises(DeadlineExceeded):
+        transport.post(URL, "{}")
+    with (
+        patch("requests.Session.post", side_effect=KeyboardInterrupt),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        transport.post(URL, "{}")
+    assert breaker.state == "half_open"
+
+    responses.add(responses.POST, URL, status=200)
+    assert transport.post(URL, "{}").status_code == 200
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
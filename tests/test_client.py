@@ -0,0 +1,62 @@
+"""Test class for SmileClient."""
+
+from typing import Any, Dict, Tuple
+from unittest.mock import patch
+
+from smile_id_core import (
+    BusinessVerification,
+    IdApi,
+    SmileClient,
+    Transport,
+    Utilities,
+)
+from smile_id_core.Signature import get_signature_provider
+
+
+def test_clients_share_configuration(
+    setup_client: Tuple[str, str, str]
+) -> None:
+    """Every product client shares one transport, signer and Utilities."""
+    api_key, partner_id, sid_server = setup_client
+    transport = Transport()
+    client = SmileClient(
+        partner_id, api_key, sid_server, "https://a_callback.com", transport
+    )
+    assert client.signature_provider is get_signature_provider(
+        partner_id, api_key
+    )
+    for product in (client.web, client.id_api, client.kyb, client.utilities):
+        assert product.transport is transport
+        assert product.signature_provider is client.signature_provider
+    assert client.web.utilities is client.utilities
+    assert client.id_api.utilities is client.utilities
+    assert client.kyb.utilities is client.utilities
+    assert client.web.id_api is client.id_api
+    assert client.id_api.business_verification is client.kyb
+    assert client.web.call_back_url == "https://a_callback.com"
+
+
+def test_jobs_do_not_create_clients(
+    setup_client: Tuple[str, str, str],
+    kyc_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    kyb_partner_params: Dict[str, Any],
+    kyb_id_info: Dict[str, str],
+) -> None:
+    """Submitting jobs reuses the clients built by SmileClient."""
+    api_key, partner_id, sid_server = setup_client
+    client = SmileClient(partner_id, api_key, sid_server)
+    with (
+        patch("requests.Session.post") as mocked_post,
+        patch.object(Utilities, "__init__", side_effect=AssertionError),
+        patch.object(IdApi, "__init__", side_effect=AssertionError),
+        patch.object(
+            BusinessVerification, "__init__", side_effect=AssertionError
+        ),
+    ):
+        mocked_post.return_value.status_code = 200
+        mocked_post.return_value.json.return_value = {"ResultCode": "1012"}
+        client.web.submit_job(kyc_partner_params, [], kyc_id_info, None)  # type: ignore
+        client.id_api.submit_job(kyb_partner_params, kyb_id_info)
+        client.kyb.submit_job(kyb_partner_params, kyb_id_info)
+    assert mocked_post.call_count == 3
@@ -0,0 +1,63 @@
+"""Test class for the JSON codecs."""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from smile_id_core import Transport, Utilities
+from smile_id_core.codec import JsonCodec, OrjsonCodec, get_codec
+from smile_id_core.constants import JobType
+from smile_id_core.Signature import Signature
+from smile_id_core.types import OptionsParams
+from tests.conftest import stub_get_job_status
+
+orjson = pytest.importorskip("orjson")
+
+
+def test_codecs_encode_the_same_document() -> None:
+    """Both codecs encode payloads that decode to the same object."""
+    payload = {"partner_params": {"job_type": JobType.ENHANCED_KYC}, 1: None}
+    assert JsonCodec().dumps(payload) == json.dumps(payload)
+    encoded = OrjsonCodec().dumps(payload)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == json.loads(json.dumps(payload))
+    assert OrjsonCodec().loads(encoded) == JsonCodec().loads(encoded)
+
+
+def test_get_codec() -> None:
+    """Codecs are looked up by name, auto preferring orjson."""
+    assert isinstance(get_codec(), OrjsonCodec)
+    assert type(get_codec("json")) is JsonCodec
+    with pytest.raises(ValueError):
+        get_codec("ujson")
+
+
+@responses.activate
+def test_job_status_is_decoded_once(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    option_params: OptionsParams,
+    kyc_partner_params: Dict[str, Any],
+) -> None:
+    """The job status response is decoded once and encoded by the codec."""
+    api_key, partner_id, sid_server = setup_client
+    utilities = Utilities(
+        partner_id, api_key, sid_server, Transport(codec=OrjsonCodec())
+    )
+    signature = signature_fixture.generate_signature(datetime.now().isoformat())
+    expected = stub_get_job_status(signature, True)
+
+    with patch.object(orjson, "loads", wraps=orjson.loads) as loads:
+        job_status = utilities.get_job_status(
+            kyc_partner_params, option_params, signature
+        )
+
+    assert job_status == expected["json"]
+    assert loads.call_count == 1
+    body = responses.calls[0].request.body
+    assert isinstance(body, bytes)
+    assert json.loads(body)["job_id"] == kyc_partner_params["job_id"]
@@ -0,0 +1,171 @@
+"""Test class for the adaptive concurrency limiter."""
+
+import threading
+from typing import Any, Dict, Tuple
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from smile_id_core import IdApi, RetryPolicy, Transport
+from smile_id_core.circuit_breaker import CircuitOpenError
+from smile_id_core.concurrency import (
+    AdaptiveLimiter,
+    is_overload,
+    record_rpc_latency,
+)
+from smile_id_core.deadline import DeadlineExceeded, deadline_scope
+from smile_id_core.ServerError import ServerError
+
+
+def test_limit_grows_while_saturated_and_healthy() -> None:
+    """Each round of fast, successful submissions raises the limit by one."""
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=3)
+    for _ in range(2):
+        tokens = [limiter.acquire(), limiter.acquire()]
+        for token in tokens:
+            limiter.release(token, 0.1, overload=False)
+    assert 2.5 < limiter.limit <= 3
+
+    for _ in range(20):
+        limiter.release(limiter.acquire(), 0.1, overload=False)
+    assert limiter.limit <= 3
+
+
+def test_limit_does_not_grow_when_idle() -> None:
+    """Submissions that never reach the limit do not raise it."""
+    limiter = AdaptiveLimiter(initial_limit=4)
+    for _ in range(10):
+        limiter.release(limiter.acquire(), 0.1, overload=False)
+    assert limiter.limit == 4
+
+
+def test_overloads_cut_the_limit_once() -> None:
+    """Concurrent overloads only cut the limit once, down to min_limit."""
+    limiter = AdaptiveLimiter(initial_limit=8, min_limit=3)
+    tokens = [limiter.acquire() for _ in range(4)]
+    for token in tokens:
+        limiter.release(token, 0.1, overload=True)
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+    limiter.release(limiter.acquire(), 0.1, overload=True)
+    assert limiter.limit == 3
+
+
+def test_latency_spikes_cut_the_limit() -> None:
+    """A submission much slower than usual counts as an overload."""
+    limiter = AdaptiveLimiter(initial_limit=4, latency_tolerance=2)
+    limiter.release(limiter.acquire(), 1.0, overload=False)
+    limiter.release(limiter.acquire(), 1.5, overload=False)
+    assert limiter.limit == 4
+    limiter.release(limiter.acquire(), 5.0, overload=False)
+    assert limiter.limit == 2
+
+
+def test_limit_recovers_after_a_lasting_latency_shift() -> None:
+    """The usual latency follows a lasting change instead of cutting forever."""
+    limiter = AdaptiveLimiter(initial_limit=4, latency_tolerance=2)
+    limiter.release(limiter.acquire(), 1.0, overload=False)
+    for _ in range(200):
+        tokens = [limiter.acquire() for _ in range(int(limiter.limit))]
+        for token in tokens:
+            limiter.release(token, 3.0, overload=False)
+    assert limiter.limit > 4
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_run_only_times_api_calls() -> None:
+    """Time spent outside API calls is not counted as latency."""
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial_limit=4, clock=clock)
+
+    def submit(rpc_latency: float) -> None:
+        clock.now += 100
+        record_rpc_latency(rpc_latency)
+
+    limiter.run(submit, 0.1)
+    limiter.run(submit, 0.15)
+    assert limiter.limit == 4
+    limiter.run(submit, 1.0)
+    assert limiter.limit == 2
+
+    limiter.run(lambda: None)
+    record_rpc_latency(5.0)
+    assert limiter.in_flight == 0
+
+
+def test_acquire_is_bounded_by_the_deadline() -> None:
+    """Waiting for a slot stops at the timeout or the current deadline."""
+    limiter = AdaptiveLimiter(initial_limit=1)
+    token = limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.01)
+    with deadline_scope(0.01), pytest.raises(DeadlineExceeded) as error:
+        limiter.acquire()
+    assert error.value.stage == "concurrency_limiter"
+    limiter.release(token, 0.1, overload=False)
+    assert limiter.in_flight == 0
+
+
+def test_acquire_waits_for_a_free_slot() -> None:
+    """No more than limit submissions hold a slot at once."""
+    limiter = AdaptiveLimiter(initial_limit=1)
+    token = limiter.acquire()
+    acquired = threading.Event()
+
+    def worker() -> None:
+        limiter.release(limiter.acquire(), 0.1, overload=False)
+        acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.05)
+    limiter.release(token, 0.1, overload=False)
+    thread.join(1)
+    assert acquired.is_set()
+
+
+def test_is_overload() -> None:
+    """Timeouts, 429, 5xx and open circuits are overloads."""
+    assert is_overload(requests.Timeout())
+    assert is_overload(CircuitOpenError("https://x", 1))
+    assert is_overload(ServerError("busy", status_code=429))
+    assert is_overload(ServerError("down", status_code=503))
+    assert not is_overload(ServerError("bad request", status_code=400))
+    assert not is_overload(ValueError("invalid id_type"))
+
+
+def test_id_api_submissions_use_the_limiter(
+    setup_client: Tuple[str, str, str],
+    kyc_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+) -> None:
+    """A 429 from id_verification is raised and cuts the limit."""
+    api_key, partner_id, sid_server = setup_client
+    limiter = AdaptiveLimiter(initial_limit=4)
+    transport = Transport(retry_policy=RetryPolicy(max_attempts=1))
+    client = IdApi(
+        partner_id,
+        api_key,
+        sid_server,
+        transport,
+        concurrency_limiter=limiter,
+    )
+    with patch("requests.Session.post") as mocked_post:
+        mocked_post.return_value.status_code = 429
+        mocked_post.return_value.json.return_value = {"error": "slow down"}
+        with pytest.raises(ServerError) as error:
+            client.submit_job(kyc_partner_params, kyc_id_info)
+    assert error.value.status_code == 429
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
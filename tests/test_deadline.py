@@ -0,0 +1,141 @@
+"""Test class for deadlines and request timeouts."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from unittest.mock import patch
+
+import pytest
+import requests
+import responses
+
+from smile_id_core import Transport, WebApi
+from smile_id_core.constants import JobType
+from smile_id_core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    deadline_scope,
+)
+from smile_id_core.polling import FixedSchedule
+from smile_id_core.retry import RetryPolicy
+from smile_id_core.Signature import Signature
+from smile_id_core.transport import DEFAULT_TIMEOUT
+from smile_id_core.types import ImageParams, OptionsParams
+from tests.conftest import stub_upload_request
+
+URL = "https://testapi.smileidentity.com/v1/job_status"
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deadline_caps_timeouts_and_waits() -> None:
+    """Timeouts and waits are bounded by the time left."""
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+    assert deadline.cap((10, 60)) == (5, 5)
+    assert deadline.cap(None) == 5
+    clock.now = 3
+    assert deadline.cap((1, 60)) == (1, 2)
+    with pytest.raises(DeadlineExceeded) as error:
+        deadline.sleep(2, "poll_job_status")
+    assert error.value.stage == "poll_job_status"
+
+    clock.now = 5
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.check(URL)
+
+
+def test_nested_scopes_keep_the_sooner_deadline() -> None:
+    """A scope cannot extend the deadline of the scope around it."""
+    assert current_deadline() is None
+    with deadline_scope(10) as outer:
+        with deadline_scope(60) as inner:
+            assert inner is outer
+        with deadline_scope(1) as inner:
+            assert inner is not outer
+            assert current_deadline() is inner
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_requests_have_timeouts() -> None:
+    """Requests use the transport timeout, capped inside a deadline."""
+    transport = Transport()
+    with patch("requests.Session.post") as mocked_post:
+        mocked_post.return_value.status_code = 200
+        transport.post(URL, "{}")
+        assert mocked_post.call_args.kwargs["timeout"] == DEFAULT_TIMEOUT
+
+        with deadline_scope(5):
+            transport.post(URL, "{}")
+        connect, read = mocked_post.call_args.kwargs["timeout"]
+        assert 4 < connect <= 5 and 4 < read <= 5
+
+
+def test_timeouts_past_the_deadline_raise_deadline_exceeded() -> None:
+    """A request timing out because the deadline passed is not retried."""
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+
+    def time_out(**kwargs: Any) -> None:
+        clock.now = 5
+        raise requests.ReadTimeout()
+
+    transport = Transport(retry_policy=RetryPolicy(max_attempts=3))
+    with (
+        patch("requests.Session.post", side_effect=time_out) as mocked_post,
+        deadline_scope(deadline),
+        pytest.raises(DeadlineExceeded) as error,
+    ):
+        transport.post(URL, "{}")
+    assert mocked_post.call_count == 1
+    assert error.value.stage == URL
+    assert isinstance(error.value.__cause__, requests.ReadTimeout)
+
+
+@responses.activate
+def test_submit_job_deadline_reports_smile_job_id(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """Polling past the deadline raises with the uploaded job's id."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 3)},
+    )
+    sleeps: List[float] = []
+    signature = signature_fixture.generate_signature(datetime.now().isoformat())
+    stub_upload_request(signature)
+    with (
+        patch("time.sleep", sleeps.append),
+        pytest.raises(DeadlineExceeded) as error,
+    ):
+        web_api.submit_job(
+            web_partner_params,
+            image_params,
+            kyc_id_info,
+            option_params,
+            deadline=30,
+        )
+    assert len(responses.calls) == 2
+    assert error.value.stage == "poll_job_status"
+    assert error.value.smile_job_id == "0000000857"
+    assert error.value.job_status is None
+    assert sleeps == []
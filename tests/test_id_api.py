@@ -181,8 +181,8 @@ def test_error_return_data(
     )
     with pytest.raises(ServerError) as value_error:
         with (
-            patch("requests.post") as mocked_post,
-            patch("requests.get") as mocked_get,
+            patch("requests.Session.post") as mocked_post,
+            patch("requests.Session.get") as mocked_get,
         ):
             mocked_post.return_value.status_code = 400
             mocked_post.return_value.ok = True
@@ -218,7 +218,7 @@ def test_validate_return_data(
         kyc_partner_params,
         kyc_id_info,
     )
-    with patch("requests.post") as mocked_post:
+    with patch("requests.Session.post") as mocked_post:
         mocked_post.return_value.status_code = 200
         mocked_post.return_value.ok = True
         mocked_post.return_value.text.return_value = get_id_response(
@@ -255,7 +255,7 @@ def test_show_deprecation_warning_for_use_validation_api(
         kyc_partner_params,
         kyc_id_info,
     )
-    with patch("requests.post") as mocked_post:
+    with patch("requests.Session.post") as mocked_post:
         mocked_post.return_value.status_code = 200
         mocked_post.return_value.ok = True
         mocked_post.return_value.text.return_value = get_id_response(
@@ -291,7 +291,7 @@ def test_validate_return_data_business_verification(
         "partner_id": "001",
     }
 
-    with patch("requests.post") as mocked_post:
+    with patch("requests.Session.post") as mocked_post:
         mocked_post.return_value.status_code = 200
         mocked_post.return_value.ok = True
         mocked_post.return_value.text.return_value = (
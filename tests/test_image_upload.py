@@ -1,27 +1,37 @@
+import array
 import base64
 import io
+import json
 import os
 import tempfile
+import warnings
 import zipfile
-from typing import List
+from typing import Any, Dict, List
 
 import pytest
 
+from smile_id_core import image_upload
+from smile_id_core.cache import CacheStats, ZipEntryCache
 from smile_id_core.constants import JobType
 from smile_id_core.image_upload import (
+    CompressionPolicy,
     generate_zip_file,
+    iter_zip_file,
+    pack_image_entries,
     prepare_image_entry_dict,
     prepare_image_payload,
     prepare_info_json,
+    spool_zip_file,
     validate_images,
 )
-from smile_id_core.types import ImageParams
+from smile_id_core.types import BinaryImage, ImageParams
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 image_path = os.path.join(current_dir, "../tests/fixtures/1pixel.jpg")
 
 with open(image_path, "rb") as binary_file:
-    base64_data = base64.b64encode(binary_file.read())
+    image_bytes = binary_file.read()
+    base64_data = base64.b64encode(image_bytes)
     base64_img = base64_data.decode("utf-8")
 
 
@@ -120,6 +130,380 @@ def test_generate_zip_file() -> None:
         ]
 
 
+def test_iter_zip_file(temp_image_file: str) -> None:
+    """Streams the same zipped file as generate_zip_file, in chunks"""
+    with open(temp_image_file, "wb") as image_file:
+        image_file.write(os.urandom(256 * 1024))
+
+    image_params: List[ImageParams] = [
+        {"image_type_id": 0, "file_name": temp_image_file},
+        {"image_type_id": 2, "image": base64_img},
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": image_params,
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+    }
+    chunks = list(iter_zip_file(**arguments, chunk_size=16 * 1024))  # type: ignore
+    assert len(chunks) > 2
+    assert max(len(chunk) for chunk in chunks) < 64 * 1024
+
+    streamed = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    buffered = zipfile.ZipFile(
+        io.BytesIO(bytes(generate_zip_file(**arguments)))  # type: ignore
+    )
+    assert streamed.testzip() is None
+    assert streamed.namelist() == buffered.namelist()
+    for name in buffered.namelist():
+        assert streamed.read(name) == buffered.read(name)
+
+    with pytest.raises(Exception):
+        iter_zip_file(**{**arguments, "signature_params": {}})  # type: ignore
+
+
+@pytest.mark.parametrize("max_memory", [1024, 1024 * 1024])
+def test_spool_zip_file(max_memory: int) -> None:
+    """The spooled body has a length and reads back the chunks"""
+    chunks = [os.urandom(700) for _ in range(4)]
+    with spool_zip_file(iter(chunks), max_memory=max_memory) as body:
+        assert len(body) == 2800
+        assert body.read(100) + body.read() == b"".join(chunks)
+        body.seek(0)
+        assert body.read() == b"".join(chunks)
+    assert body.closed
+
+
+def test_generate_zip_file_with_packed_images() -> None:
+    """Appends info.json to images zipped beforehand"""
+    image_params: List[ImageParams] = [
+        {"image_type_id": 0, "file_name": image_path},
+        {"image_type_id": 2, "image": base64_img},
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": image_params,
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+    }
+    packed_images = pack_image_entries(image_params)
+    with zipfile.ZipFile(io.BytesIO(packed_images)) as zipped_file:
+        assert "info.json" not in zipped_file.namelist()
+
+    pipelined = zipfile.ZipFile(
+        io.BytesIO(
+            bytes(
+                generate_zip_file(
+                    **arguments, packed_images=packed_images  # type: ignore
+                )
+            )
+        )
+    )
+    buffered = zipfile.ZipFile(
+        io.BytesIO(bytes(generate_zip_file(**arguments)))  # type: ignore
+    )
+    assert pipelined.testzip() is None
+    assert pipelined.namelist() == [
+        os.path.basename(image_path),
+        "base64imgString",
+        "info.json",
+    ]
+    for name in buffered.namelist():
+        assert pipelined.read(name) == buffered.read(name)
+        assert (
+            pipelined.getinfo(name).compress_type
+            == buffered.getinfo(name).compress_type
+        )
+
+
+def test_zip_file_with_binary_images() -> None:
+    """Writes bytes, memoryviews and file objects like image files"""
+    image_params: List[ImageParams] = [
+        BinaryImage(
+            image_type_id=0, file_name="selfie.jpg", content=image_bytes
+        ),
+        BinaryImage(
+            image_type_id=1,
+            file_name="id_card.jpg",
+            content=memoryview(bytearray(image_bytes)),
+        ),
+        BinaryImage(
+            image_type_id=4,
+            file_name="liveness.jpg",
+            content=io.BytesIO(image_bytes),
+        ),
+        BinaryImage(
+            image_type_id=5,
+            file_name="id_card_back.png",
+            content=memoryview(array.array("I", [1, 2, 3])),
+        ),
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+    }
+    assert validate_images(image_params)
+    buffered = zipfile.ZipFile(
+        io.BytesIO(
+            bytes(
+                generate_zip_file(
+                    image_params=image_params, **arguments  # type: ignore
+                )
+            )
+        )
+    )
+    image_params[2]["content"] = io.BytesIO(image_bytes)  # type: ignore
+    streamed = zipfile.ZipFile(
+        io.BytesIO(
+            b"".join(
+                iter_zip_file(
+                    image_params=image_params, **arguments  # type: ignore
+                )
+            )
+        )
+    )
+    for zipped_file in (buffered, streamed):
+        assert zipped_file.testzip() is None
+        for name in ("selfie.jpg", "id_card.jpg", "liveness.jpg"):
+            assert zipped_file.read(name) == image_bytes
+        assert zipped_file.read("id_card_back.png") == bytes(
+            array.array("I", [1, 2, 3])
+        )
+    info_json = json.loads(buffered.read("info.json"))
+    assert info_json["images"][0] == {
+        "image_type_id": 0,
+        "image": "",
+        "file_name": "selfie.jpg",
+    }
+
+
+@pytest.mark.skipif(
+    not image_upload._CAN_SPLICE, reason="ZipFile internals have changed"
+)
+def test_zip_entry_cache(temp_image_file: str) -> None:
+    """Splices cached entries instead of reading and compressing again"""
+    with open(temp_image_file, "wb") as image_file:
+        image_file.write(os.urandom(32 * 1024))
+    stat = os.stat(temp_image_file)
+    image_params: List[ImageParams] = [
+        {"image_type_id": 0, "file_name": temp_image_file},
+        BinaryImage(
+            image_type_id=1, file_name="id_card.jpg", content=image_bytes
+        ),
+        {"image_type_id": 2, "image": base64_img},
+        BinaryImage(
+            image_type_id=4,
+            file_name="liveness.jpg",
+            content=io.BytesIO(image_bytes),
+        ),
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": image_params,
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+        "compression": CompressionPolicy(stored_extensions=()),
+    }
+    entry_cache = ZipEntryCache()
+    expected = zipfile.ZipFile(
+        io.BytesIO(bytes(generate_zip_file(**arguments)))  # type: ignore
+    )
+    image_params[3]["content"] = io.BytesIO(image_bytes)  # type: ignore
+    generate_zip_file(**arguments, entry_cache=entry_cache)  # type: ignore
+    assert entry_cache.stats == CacheStats(0, 3, 0, 3)
+
+    # Same size and modification time: the cached entry is used as is.
+    with open(temp_image_file, "r+b") as image_file:
+        first_byte = image_file.read(1)
+        image_file.seek(0)
+        image_file.write(bytes([first_byte[0] ^ 0xFF]))
+    os.utime(temp_image_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    for build in (generate_zip_file, iter_zip_file, pack_image_entries):
+        image_params[3]["content"] = io.BytesIO(image_bytes)  # type: ignore
+        if build is pack_image_entries:
+            zip_stream: Any = pack_image_entries(
+                image_params, arguments["compression"], entry_cache  # type: ignore
+            )
+        else:
+            zip_stream = build(
+                **arguments, entry_cache=entry_cache  # type: ignore
+            )
+        if build is iter_zip_file:
+            zip_stream = b"".join(zip_stream)
+        with zipfile.ZipFile(io.BytesIO(bytes(zip_stream))) as zipped_file:
+            assert zipped_file.testzip() is None
+            for name in zipped_file.namelist():
+                assert zipped_file.read(name) == expected.read(name)
+                assert (
+                    zipped_file.getinfo(name).compress_type
+                    == zipfile.ZIP_DEFLATED
+                )
+    assert entry_cache.stats == CacheStats(9, 3, 0, 3)
+
+    os.utime(temp_image_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    image_params[3]["content"] = io.BytesIO(image_bytes)  # type: ignore
+    zip_stream = generate_zip_file(
+        **arguments, entry_cache=entry_cache  # type: ignore
+    )
+    with zipfile.ZipFile(io.BytesIO(bytes(zip_stream))) as zipped_file:
+        assert zipped_file.read(os.path.basename(temp_image_file)) != (
+            expected.read(os.path.basename(temp_image_file))
+        )
+    assert entry_cache.stats.size == 4
+
+
+def test_zip_entry_cache_needs_zipfile_internals(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Entries are compressed as usual where they cannot be spliced"""
+    monkeypatch.setattr(image_upload, "_CAN_SPLICE", False)
+    monkeypatch.setattr(image_upload, "_warned_cannot_splice", False)
+    entry_cache = ZipEntryCache()
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": [{"image_type_id": 0, "file_name": image_path}],
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+        "entry_cache": entry_cache,
+    }
+    with pytest.warns(RuntimeWarning, match="entry_cache is not used"):
+        zip_file = generate_zip_file(**arguments)  # type: ignore
+    with zipfile.ZipFile(io.BytesIO(bytes(zip_file))) as zipped_file:
+        assert zipped_file.read("1pixel.jpg") == image_bytes
+    assert entry_cache.stats == CacheStats(0, 0, 0, 0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        generate_zip_file(**arguments)  # type: ignore
+
+
+class _Unseekable(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+
+def test_file_objects_are_read_from_the_start() -> None:
+    """Rewinds file objects so a zip file can be built again"""
+    content = io.BytesIO(image_bytes)
+    content.read()
+    image_params: List[ImageParams] = [
+        BinaryImage(image_type_id=0, file_name="selfie.jpg", content=content)
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": image_params,
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+    }
+    assert validate_images(image_params)
+    for zip_stream in (
+        bytes(generate_zip_file(**arguments)),  # type: ignore
+        b"".join(iter_zip_file(**arguments)),  # type: ignore
+        bytes(generate_zip_file(**arguments)),  # type: ignore
+    ):
+        with zipfile.ZipFile(io.BytesIO(zip_stream)) as zipped_file:
+            assert zipped_file.read("selfie.jpg") == image_bytes
+
+    content.truncate(0)
+    for build in (generate_zip_file, iter_zip_file):
+        with pytest.raises(ValueError, match="selfie.jpg is empty"):
+            b"".join(build(**arguments))  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "image, error",
+    [
+        ({"file_name": "selfie", "content": image_bytes}, "must end with"),
+        ({"file_name": "selfie.jpg", "content": b""}, "cannot be empty"),
+        ({"file_name": "selfie.jpg", "content": "abc"}, "binary file"),
+        ({"file_name": "selfie.jpg", "content": io.StringIO()}, "binary"),
+        ({"file_name": "selfie.jpg", "content": io.BytesIO()}, "empty"),
+        (
+            {"file_name": "selfie.jpg", "content": _Unseekable(image_bytes)},
+            "seekable",
+        ),
+        (
+            {"file_name": "selfie.jpg", "content": memoryview(b"abcd")[::2]},
+            "contiguous",
+        ),
+    ],
+)
+def test_validate_images_binary_content(
+    image: Dict[str, Any], error: str
+) -> None:
+    """Rejects image content that cannot be written to the zip file"""
+    with pytest.raises(ValueError, match=error):
+        validate_images([{"image_type_id": 0, **image}])  # type: ignore
+
+
+def test_compression_policy() -> None:
+    """Stores images that are already compressed and deflates the rest"""
+    image_params: List[ImageParams] = [
+        {"image_type_id": 0, "file_name": image_path},
+        {"image_type_id": 2, "image": base64_img},
+    ]
+    arguments = {
+        "partner_id": "partner_id",
+        "callback_url": "callback_url",
+        "upload_url": "upload_url",
+        "partner_params": {"user_id": "user_id"},
+        "image_params": image_params,
+        "id_info_params": {"country": "NG"},
+        "signature_params": {"signature": "signature", "timestamp": "ts"},
+    }
+    expected = {
+        "info.json": zipfile.ZIP_DEFLATED,
+        os.path.basename(image_path): zipfile.ZIP_STORED,
+        "base64imgString": zipfile.ZIP_DEFLATED,
+    }
+    for zip_stream in (
+        bytes(generate_zip_file(**arguments)),  # type: ignore
+        b"".join(iter_zip_file(**arguments)),  # type: ignore
+    ):
+        with zipfile.ZipFile(io.BytesIO(zip_stream)) as zipped_file:
+            assert zipped_file.testzip() is None
+            assert {
+                info.filename: info.compress_type
+                for info in zipped_file.infolist()
+            } == expected
+
+    deflate_all = CompressionPolicy(compresslevel=1, stored_extensions=())
+    assert deflate_all.compression_for("selfie.JPG") == (
+        zipfile.ZIP_DEFLATED,
+        1,
+    )
+    zip_stream = generate_zip_file(
+        **arguments, compression=deflate_all  # type: ignore
+    )
+    with zipfile.ZipFile(io.BytesIO(bytes(zip_stream))) as zipped_file:
+        assert all(
+            info.compress_type == zipfile.ZIP_DEFLATED
+            for info in zipped_file.infolist()
+        )
+
+    with pytest.raises(ValueError):
+        CompressionPolicy(compresslevel=10)
+
+
 def test_validate_images__ok_file_exists() -> None:
     """Validates image file exists (is Not None)"""
     image_params: List[ImageParams] = [
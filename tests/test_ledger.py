@@ -0,0 +1,169 @@
+"""Test class for the SQLite job ledger."""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+import responses
+
+from smile_id_core import WebApi
+from smile_id_core.constants import JobType
+from smile_id_core.ledger import (
+    COMPLETE,
+    FAILED,
+    SUBMITTED,
+    UPLOADING,
+    JobLedger,
+)
+from smile_id_core.polling import FixedSchedule, JobStatusPoller
+from smile_id_core.Signature import Signature
+from smile_id_core.types import ImageParams, OptionsParams
+from smile_id_core.Utilities import Utilities
+from tests.conftest import stub_get_job_status, stub_upload_request
+
+
+def job(job_id: str, user_id: str = "user") -> Dict[str, Any]:
+    """Return partner params for a biometric kyc job."""
+    return {
+        "user_id": user_id,
+        "job_id": job_id,
+        "job_type": JobType.BIOMETRIC_KYC,
+    }
+
+
+def test_record_keeps_known_fields(tmp_path: Path) -> None:
+    """Later records update the state without losing the smile_job_id."""
+    with JobLedger(str(tmp_path / "jobs.db")) as ledger:
+        ledger.record(job("a"), UPLOADING, smile_job_id="0001", wait=True)
+        ledger.record(job("a"), SUBMITTED)
+        entry = ledger.get("user", "a")
+
+    assert entry is not None
+    assert entry.state == SUBMITTED
+    assert entry.smile_job_id == "0001"
+    assert entry.partner_params == job("a")
+    assert entry.job_type == JobType.BIOMETRIC_KYC
+
+
+def test_find_by_state_job_id_and_user_id(tmp_path: Path) -> None:
+    """Entries are found by any combination of indexed columns."""
+    with JobLedger(str(tmp_path / "jobs.db")) as ledger:
+        ledger.record(job("a"), SUBMITTED)
+        ledger.record(job("b"), COMPLETE, result={"job_complete": True})
+        ledger.record(job("a", user_id="other"), FAILED, error="boom")
+
+        assert [e.job_id for e in ledger.find(state=SUBMITTED)] == ["a"]
+        assert len(ledger.find(job_id="a")) == 2
+        assert [e.job_id for e in ledger.find(user_id="user")] == ["a", "b"]
+        assert ledger.find(user_id="other")[0].error == "boom"
+        assert ledger.find(limit=1)[0].job_id == "a"
+        assert ledger.get("user", "b").result == {  # type: ignore[union-attr]
+            "job_complete": True
+        }
+        assert ledger.get("user", "c") is None
+
+
+def test_records_are_committed_in_batches(tmp_path: Path) -> None:
+    """Records nobody waits for are committed together."""
+    with JobLedger(str(tmp_path / "jobs.db"), flush_interval=5) as ledger:
+        for index in range(100):
+            ledger.record(job(str(index)), SUBMITTED)
+        ledger.flush()
+        assert len(ledger.find(state=SUBMITTED)) == 100
+
+
+def test_ledger_survives_reopening(tmp_path: Path) -> None:
+    """Jobs in flight are still in flight after a restart."""
+    path = str(tmp_path / "jobs.db")
+    ledger = JobLedger(path)
+    ledger.record(job("a"), UPLOADING, smile_job_id="0001")
+    ledger.record(job("b"), SUBMITTED)
+    ledger.record(job("c"), COMPLETE)
+    ledger.close()
+
+    with JobLedger(path) as reopened:
+        assert sorted(e.job_id for e in reopened.in_flight()) == ["a", "b"]
+    journal_mode = sqlite3.connect(path).execute("PRAGMA journal_mode")
+    assert journal_mode.fetchone()[0] == "wal"
+
+
+def test_resume_polls_jobs_in_flight(tmp_path: Path) -> None:
+    """Resumed jobs are polled and their outcome recorded."""
+    utilities = MagicMock(spec=Utilities)
+    utilities.get_job_status.side_effect = lambda params, options: {
+        "job_complete": params["job_id"] == "a"
+    }
+    poller = JobStatusPoller(
+        utilities, poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(0, 1)}
+    )
+    with JobLedger(str(tmp_path / "jobs.db")) as ledger, poller:
+        ledger.record(job("a"), SUBMITTED)
+        ledger.record(job("b"), UPLOADING)
+        futures = ledger.resume(poller)
+        assert sorted(futures) == [("user", "a"), ("user", "b")]
+        for future in futures.values():
+            future.result(5)
+        poller.close()
+
+        assert ledger.get("user", "a").state == COMPLETE  # type: ignore
+        assert ledger.in_flight()[0].job_id == "b"
+
+
+def test_closed_ledger_rejects_records(tmp_path: Path) -> None:
+    """Recording after close raises instead of being lost."""
+    ledger = JobLedger(str(tmp_path / "jobs.db"))
+    ledger.close()
+    with pytest.raises(RuntimeError):
+        ledger.record(job("a"), SUBMITTED)
+
+
+@responses.activate
+def test_submit_job_records_each_state(
+    tmp_path: Path,
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A submitted job is recorded, then its result once complete."""
+    api_key, partner_id, sid_server = setup_client
+    ledger = JobLedger(str(tmp_path / "jobs.db"))
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        ledger=ledger,
+    )
+    states: List[str] = []
+    record = ledger.record
+
+    def spy(partner_params: Dict[str, Any], state: str, **kwargs: Any) -> None:
+        states.append(state)
+        record(partner_params, state, **kwargs)
+
+    monkeypatch.setattr(ledger, "record", spy)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    signature = signature_fixture.generate_signature(datetime.now().isoformat())
+    stub_upload_request(signature)
+    stub_get_job_status(signature, True)
+
+    web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    entry = ledger.get(
+        web_partner_params["user_id"], web_partner_params["job_id"]
+    )
+    ledger.close()
+
+    assert states == [UPLOADING, SUBMITTED, COMPLETE]
+    assert entry is not None
+    assert entry.state == COMPLETE
+    assert entry.smile_job_id == "0000000857"
+    assert entry.result is not None and entry.result["job_complete"]
@@ -0,0 +1,224 @@
+"""Test class for submitting prepared job packages."""
+
+import io
+import json
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+import responses
+
+from smile_id_core import WebApi
+from smile_id_core.image_upload import generate_zip_file
+from smile_id_core.package import PreparedPackage
+from smile_id_core.Signature import Signature
+from smile_id_core.types import (
+    BinaryImage,
+    ImageParams,
+    OptionsParams,
+    SignatureParams,
+)
+from tests.conftest import stub_upload_request
+
+SIGNATURE = SignatureParams(signature="signature", timestamp="timestamp")
+
+
+def build_package(
+    partner_id: str,
+    partner_params: Dict[str, Any],
+    images: List[ImageParams],
+) -> bytes:
+    """Return a job zip file as built before its upload is prepared."""
+    return bytes(
+        generate_zip_file(
+            partner_id=partner_id,
+            callback_url="https://a_callback.com",
+            upload_url="",
+            partner_params=partner_params,
+            image_params=images,
+            id_info_params={},
+            signature_params=SIGNATURE,
+        )
+    )
+
+
+def selfie() -> List[ImageParams]:
+    """Return a selfie given as bytes."""
+    return [
+        BinaryImage(
+            image_type_id=0, file_name="selfie.jpg", content=b"\xff\xd8" * 64
+        )
+    ]
+
+
+@pytest.mark.parametrize("open_package", ["path", "fd", "file"])
+@responses.activate
+def test_submit_prepared_package(
+    tmp_path: Path,
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    option_params: OptionsParams,
+    open_package: str,
+) -> None:
+    """The package is uploaded with a new info.json and its images."""
+    api_key, partner_id, sid_server = setup_client
+    path = tmp_path / "job.zip"
+    path.write_bytes(build_package(partner_id, web_partner_params, selfie()))
+    web_api = WebApi(partner_id, "https://a_callback.com", api_key, sid_server)
+    stub_upload_request(signature_fixture.generate_signature())
+    option_params["return_job_status"] = False
+
+    with open(path, "rb") as file:
+        package: Any = {
+            "path": path,
+            "fd": file.fileno(),
+            "file": file,
+        }[open_package]
+        response = web_api.submit_prepared_package(package, option_params)
+        assert not file.closed
+        request = responses.calls[1].request
+    uploaded: Any = request.body
+
+    assert request.headers["Content-Length"] == str(len(uploaded))
+
+    assert response == {"success": True, "smile_job_id": "0000000857"}
+    with zipfile.ZipFile(io.BytesIO(uploaded)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == ["info.json", "selfie.jpg"]
+        assert archive.read("selfie.jpg") == b"\xff\xd8" * 64
+        info_json = json.loads(archive.read("info.json"))
+    assert info_json["server_information"] == "https://some_url.com"
+    assert info_json["misc_information"]["partner_params"] == (
+        web_partner_params
+    )
+    assert path.read_bytes() == build_package(
+        partner_id, web_partner_params, selfie()
+    )
+
+
+def test_body_has_a_length_and_can_be_reread(
+    tmp_path: Path, web_partner_params: Dict[str, Any]
+) -> None:
+    """The body is sized up front and reads the same after a seek."""
+    path = tmp_path / "job.zip"
+    path.write_bytes(build_package("001", web_partner_params, selfie()))
+    with PreparedPackage(path) as prepared:
+        body = prepared.body("https://some_url.com", SIGNATURE)
+        first = body.read()
+        body.seek(0)
+        assert body.read(7) + body.read() == first
+        assert len(body) == len(first)
+    assert prepared.partner_id == "001"
+
+
+def local_entries(body: bytes) -> List[str]:
+    """Return the names of the local entries of an archive, in order."""
+    names = []
+    offset = 0
+    while body[offset : offset + 4] == b"PK\x03\x04":
+        compressed_size, name_length, extra_length = struct.unpack(
+            "<I4xHH", body[offset + 18 : offset + 30]
+        )
+        start = offset + 30
+        names.append(body[start : start + name_length].decode())
+        offset = start + name_length + extra_length + compressed_size
+    assert body[offset : offset + 4] == b"PK\x01\x02"
+    return names
+
+
+@pytest.mark.parametrize("info_json_first", [True, False])
+def test_body_leaves_out_the_old_info_json(
+    tmp_path: Path, web_partner_params: Dict[str, Any], info_json_first: bool
+) -> None:
+    """Only the new info.json entry is sent, wherever the old one was."""
+    package = build_package("001", web_partner_params, selfie())
+    if not info_json_first:
+        with zipfile.ZipFile(io.BytesIO(package)) as archive:
+            entries = [
+                (name, archive.read(name)) for name in archive.namelist()
+            ]
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in sorted(entries, reverse=True):
+                archive.writestr(name, data)
+        package = buffer.getvalue()
+    path = tmp_path / "job.zip"
+    path.write_bytes(package)
+    with PreparedPackage(path) as prepared:
+        body = prepared.body("https://some_url.com", SIGNATURE).read()
+
+    assert local_entries(body) == ["selfie.jpg", "info.json"]
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.testzip() is None
+        assert archive.read("selfie.jpg") == b"\xff\xd8" * 64
+        info_json = json.loads(archive.read("info.json"))
+    assert info_json["server_information"] == "https://some_url.com"
+
+
+@pytest.mark.parametrize(
+    "corrupt, message",
+    [
+        (lambda archive, info: None, "no info.json"),
+        (
+            lambda archive, info: archive.writestr("info.json", "[]"),
+            "JSON object",
+        ),
+        (
+            lambda archive, info: archive.writestr(
+                "info.json", json.dumps(dict(info, images=[]))
+            ),
+            "no images",
+        ),
+        (
+            lambda archive, info: archive.writestr(
+                "info.json", json.dumps(dict(info, misc_information={}))
+            ),
+            "partner_params",
+        ),
+    ],
+)
+def test_invalid_packages_are_rejected(
+    tmp_path: Path,
+    web_partner_params: Dict[str, Any],
+    corrupt: Callable[[zipfile.ZipFile, Dict[str, Any]], None],
+    message: str,
+) -> None:
+    """Packages whose info.json does not describe a job are rejected."""
+    with zipfile.ZipFile(
+        io.BytesIO(build_package("001", web_partner_params, selfie()))
+    ) as source:
+        info_json = json.loads(source.read("info.json"))
+    path = tmp_path / "job.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("selfie.jpg", b"\xff\xd8")
+        corrupt(archive, info_json)
+
+    with pytest.raises(ValueError, match=message):
+        PreparedPackage(str(path))
+
+
+def test_missing_images_and_partners_are_rejected(
+    tmp_path: Path,
+    setup_client: Tuple[str, str, str],
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """Images listed but not packed, and other partners' jobs, are errors."""
+    api_key, partner_id, sid_server = setup_client
+    path = tmp_path / "job.zip"
+    with zipfile.ZipFile(
+        io.BytesIO(build_package("001", web_partner_params, selfie()))
+    ) as source:
+        info_json = source.read("info.json")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("info.json", info_json)
+    with pytest.raises(ValueError, match="selfie.jpg"):
+        PreparedPackage(os.fspath(path))
+
+    path.write_bytes(build_package("other", web_partner_params, selfie()))
+    web_api = WebApi(partner_id, "https://a_callback.com", api_key, sid_server)
+    with pytest.raises(ValueError, match="partner other"):
+        web_api.submit_prepared_package(path)
@@ -0,0 +1,332 @@
+"""Test class for the poll schedules used by WebApi.poll_job_status."""
+
+import json
+import random
+import time
+from typing import Any, Dict, List, Tuple
+from unittest.mock import MagicMock, patch
+
+import pytest
+import responses
+
+from smile_id_core.constants import JobType
+from smile_id_core.polling import (
+    DEFAULT_POLL_SCHEDULE,
+    ChainedSchedule,
+    DeadlineSchedule,
+    ExponentialSchedule,
+    FixedSchedule,
+    JitteredSchedule,
+    JobStatusPoller,
+    PollSchedule,
+    get_poll_schedule,
+)
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.types import ImageParams, OptionsParams
+from smile_id_core.Utilities import Utilities
+from smile_id_core.WebApi import WebApi
+from tests.conftest import stub_get_job_status, stub_upload_request
+
+
+def test_default_schedule_matches_legacy_polling() -> None:
+    """Three 2 second waits, then 4 seconds, for 20 polls in total."""
+    assert list(DEFAULT_POLL_SCHEDULE.delays()) == [2.0] * 3 + [4.0] * 17
+
+
+def test_schedules_must_define_delays() -> None:
+    """PollSchedule is abstract, as are subclasses without delays()."""
+
+    class Incomplete(PollSchedule):
+        pass
+
+    for schedule in (PollSchedule, Incomplete):
+        with pytest.raises(TypeError):
+            schedule()  # type: ignore[abstract]
+
+
+def test_exponential_schedule_is_capped() -> None:
+    """Delays double until they reach max_delay."""
+    schedule = ExponentialSchedule(0.5, max_delay=3, max_attempts=5)
+    assert list(schedule.delays()) == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_jittered_schedule_stays_within_bounds() -> None:
+    """Jitter only ever shortens a delay, by at most the jitter fraction."""
+    schedule = JitteredSchedule(
+        FixedSchedule(4, 50), jitter=0.5, rng=random.Random(1)
+    )
+    delays = list(schedule.delays())
+    assert len(delays) == 50
+    assert all(2 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_deadline_schedule_stops_at_deadline() -> None:
+    """Delays are trimmed to the budget and stop once it is spent."""
+    with patch("smile_id_core.polling.time.monotonic") as monotonic:
+        monotonic.side_effect = [0.0, 0.0, 3.0, 5.0]
+        schedule = DeadlineSchedule(FixedSchedule(3, 10), deadline=5)
+        assert list(schedule.delays()) == [3.0, 2.0]
+
+
+def test_schedule_is_chosen_per_job_type() -> None:
+    """Listed job types use their schedule, others the default one."""
+    fast = ChainedSchedule(FixedSchedule(0.5, 4))
+    schedules = {JobType.ENHANCED_KYC: fast}
+    assert get_poll_schedule(5, schedules) is fast
+    assert get_poll_schedule(JobType.BIOMETRIC_KYC, schedules) is (
+        DEFAULT_POLL_SCHEDULE
+    )
+    assert get_poll_schedule(None) is DEFAULT_POLL_SCHEDULE
+
+
+@responses.activate
+def test_poll_job_status_uses_schedule(
+    web_partner_params: Dict[str, Any],
+    option_params: OptionsParams,
+    signature_fixture: Signature,
+    setup_client: Any,
+) -> None:
+    """Polling waits per the schedule and stops once the job completes."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(0.25, 5)},
+    )
+    signature = signature_fixture.generate_signature()
+    stub_get_job_status(signature, False)
+    stub_get_job_status(signature, True)
+    slept: List[float] = []
+    with patch("time.sleep", side_effect=slept.append):
+        job_status = web_api.poll_job_status(
+            0, web_partner_params, option_params, signature
+        )
+    assert job_status["job_complete"] is True
+    assert slept == [0.25, 0.25]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_poll_job_status_queries_once_when_schedule_is_used_up(
+    client_web: WebApi,
+    web_partner_params: Dict[str, Any],
+    option_params: OptionsParams,
+    signature_fixture: Signature,
+) -> None:
+    """A counter past the schedule still makes a single query."""
+    signature = signature_fixture.generate_signature()
+    stub_get_job_status(signature, False)
+    with patch("time.sleep") as sleep:
+        job_status = client_web.poll_job_status(
+            25, web_partner_params, option_params, signature
+        )
+    assert job_status["job_complete"] is False
+    sleep.assert_not_called()
+    assert len(responses.calls) == 1
+
+
+def make_poller(
+    statuses: Dict[str, List[bool]], max_workers: int = 2
+) -> JobStatusPoller:
+    """Return a poller whose job_status queries answer from statuses."""
+    utilities = MagicMock(spec=Utilities)
+
+    def get_job_status(
+        partner_params: Dict[str, Any], options_params: Any
+    ) -> Dict[str, Any]:
+        job_id = partner_params["job_id"]
+        return {"job_id": job_id, "job_complete": statuses[job_id].pop(0)}
+
+    utilities.get_job_status.side_effect = get_job_status
+    return JobStatusPoller(
+        utilities,
+        max_workers=max_workers,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(0.01, 3)},
+    )
+
+
+def job(job_id: str) -> Dict[str, Any]:
+    """Return partner params for a biometric kyc job."""
+    return {
+        "user_id": "user",
+        "job_id": job_id,
+        "job_type": JobType.BIOMETRIC_KYC,
+    }
+
+
+def test_poller_resolves_futures_when_jobs_complete() -> None:
+    """Each future resolves with the first complete status of its job."""
+    statuses = {
+        "a": [False, True],
+        "b": [True],
+        "c": [False, False, False],
+    }
+    completed: List[str] = []
+    with make_poller(statuses) as poller:
+        futures = {
+            job_id: poller.add(
+                job(job_id),
+                callback=lambda future: completed.append(
+                    future.result()["job_id"]
+                ),
+            )
+            for job_id in statuses
+        }
+        results = {
+            job_id: future.result(timeout=5)
+            for job_id, future in futures.items()
+        }
+    assert results["a"]["job_complete"] is True
+    assert results["b"]["job_complete"] is True
+    # The schedule ran out, the last status is returned.
+    assert results["c"]["job_complete"] is False
+    assert sorted(completed) == ["a", "b", "c"]
+    assert poller.utilities.get_job_status.call_count == 6  # type: ignore
+
+
+def test_poller_reports_errors_through_the_future() -> None:
+    """An error raised while querying resolves the future with it."""
+    utilities = MagicMock(spec=Utilities)
+    utilities.get_job_status.side_effect = ServerError("boom")
+    with JobStatusPoller(utilities, max_workers=1) as poller:
+        future = poller.add(job("a"))
+        with pytest.raises(ServerError):
+            future.result(timeout=5)
+
+
+def test_poller_close_cancels_pending_jobs() -> None:
+    """Jobs still waiting for a poll are cancelled on close."""
+    utilities = MagicMock(spec=Utilities)
+    poller = JobStatusPoller(
+        utilities, poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 1)}
+    )
+    future = poller.add(job("a"))
+    assert poller.pending == 1
+    poller.close()
+    assert future.cancelled()
+    utilities.get_job_status.assert_not_called()
+    pytest.raises(RuntimeError, poller.add, job("b"))
+
+
+def test_handle_exposes_last_status_and_cancels_polling() -> None:
+    """A handle shows intermediate statuses and cancel() stops polling."""
+    utilities = MagicMock(spec=Utilities)
+    utilities.get_job_status.return_value = {"job_complete": False}
+    schedule = ChainedSchedule(FixedSchedule(0, 1), FixedSchedule(60, 1))
+    with JobStatusPoller(
+        utilities, poll_schedules={JobType.BIOMETRIC_KYC: schedule}
+    ) as poller:
+        handle = poller.add(job("a"), smile_job_id="0001")
+        deadline = time.monotonic() + 5
+        while handle.status is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        assert handle.status == {"job_complete": False}
+        assert handle.smile_job_id == "0001"
+        assert not handle.done()
+        assert handle.cancel()
+    utilities.get_job_status.assert_called_once()
+
+
+@responses.activate
+def test_submit_job_async_returns_after_upload(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """The job is polled in the background and resolves its handle."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(0, 3)},
+    )
+    signature = signature_fixture.generate_signature()
+    stub_upload_request(signature)
+    expected = stub_get_job_status(signature, True)
+
+    handle = web_api.submit_job_async(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert handle.smile_job_id == "0000000857"
+    assert handle.result(timeout=5) == expected["json"]
+    assert web_api.poller is not None
+    web_api.poller.close()
+
+    option_params["return_job_status"] = False
+    handle = web_api.submit_job_async(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert handle.done()
+    assert handle.result() == {"success": True, "smile_job_id": "0000000857"}
+
+
+def test_close_stops_the_threads_a_client_created(
+    setup_client: Tuple[str, str, str],
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """close() shuts down the zip worker and an owned poller only."""
+    api_key, partner_id, sid_server = setup_client
+    shared = JobStatusPoller(MagicMock(spec=Utilities))
+    with WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poller=shared,
+        pipeline_uploads=True,
+    ) as web_api:
+        assert web_api._get_poller() is shared
+    assert web_api._zip_executor is not None
+    pytest.raises(RuntimeError, web_api._zip_executor.submit, print)
+    shared.add(web_partner_params).cancel()
+    shared.close()
+
+    web_api = WebApi(partner_id, "https://a_callback.com", api_key, sid_server)
+    owned = web_api._get_poller()
+    web_api.close()
+    pytest.raises(RuntimeError, owned.add, web_partner_params)
+
+
+@responses.activate
+def test_each_poll_is_signed_when_sent(
+    web_partner_params: Dict[str, Any],
+    option_params: OptionsParams,
+    signature_fixture: Signature,
+    setup_client: Any,
+) -> None:
+    """Polls take a current signature instead of the submission's."""
+    api_key, partner_id, sid_server = setup_client
+    provider = MagicMock(spec=SignatureProvider)
+    provider.get_signature.side_effect = [
+        {"signature": f"signature-{n}", "timestamp": f"timestamp-{n}"}
+        for n in range(2)
+    ]
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        signature_provider=provider,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(200, 3)},
+    )
+    signature = signature_fixture.generate_signature()
+    stub_get_job_status(signature, False)
+    stub_get_job_status(signature, True)
+
+    with patch("time.sleep"):
+        web_api.poll_job_status(0, web_partner_params, option_params, None)
+    sent = [json.loads(call.request.body or "{}") for call in responses.calls]
+    assert [body["signature"] for body in sent] == [
+        "signature-0",
+        "signature-1",
+    ]
@@ -0,0 +1,89 @@
+"""Test class for the per-endpoint rate limiter."""
+
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+import responses
+
+from smile_id_core.rate_limit import FileTokenBucket, RateLimiter, TokenBucket
+from smile_id_core.transport import Transport
+
+URL = "https://testapi.smileidentity.com/v1"
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_paces() -> None:
+    """A full bucket sends burst requests at once, then one per 1/rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now = 10
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_rejects_invalid_limits() -> None:
+    """The rate must be positive and the burst at least one request."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        RateLimiter(rate=1, burst=0)
+
+
+def test_endpoints_have_their_own_buckets() -> None:
+    """Endpoints are paced separately and can have their own limits."""
+    limiter = RateLimiter(
+        rate=1, burst=1, endpoint_rates={"/job_status": (10, 5)}
+    )
+    assert limiter.reserve(f"{URL}/upload") == 0
+    assert limiter.reserve(f"{URL}/upload") > 0
+    assert [limiter.reserve(f"{URL}/job_status") for _ in range(5)] == [0] * 5
+    assert limiter.reserve(f"{URL}/job_status") == pytest.approx(0.1, abs=0.02)
+
+
+def test_file_buckets_are_shared_between_processes(tmp_path: Path) -> None:
+    """Buckets in the same lock file share one budget."""
+    path = str(tmp_path / "bucket")
+    first = FileTokenBucket(path, rate=1, burst=2)
+    second = FileTokenBucket(path, rate=1, burst=2)
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() > 0
+
+    limiter = RateLimiter(rate=1, lock_dir=str(tmp_path), namespace="001")
+    other = RateLimiter(rate=1, lock_dir=str(tmp_path), namespace="001")
+    assert limiter.reserve(f"{URL}/upload") == 0
+    assert other.reserve(f"{URL}/upload") > 0
+    partner = RateLimiter(rate=1, lock_dir=str(tmp_path), namespace="002")
+    assert partner.reserve(f"{URL}/upload") == 0
+
+
+@responses.activate
+def test_transport_waits_for_rate_limiter(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Requests over the rate wait for a token before being sent."""
+    sleeps: List[float] = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    responses.add(responses.POST, f"{URL}/upload", status=200)
+    transport = Transport(rate_limiter=RateLimiter(rate=0.01, burst=1))
+
+    transport.post(f"{URL}/upload", "{}")
+    transport.post(f"{URL}/upload", "{}")
+
+    assert len(responses.calls) == 2
+    assert len(sleeps) == 1
+    assert 99 < sleeps[0] <= 100
@@ -0,0 +1,207 @@
+"""Test class for the retry policy used by Transport."""
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+import requests
+import responses
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from smile_id_core.image_upload import spool_zip_file
+from smile_id_core.retry import (
+    RetryBudget,
+    RetryPolicy,
+    parse_retry_after,
+    was_never_sent,
+)
+from smile_id_core.transport import Transport
+
+URL = "https://testapi.smileidentity.com/v1/job_status"
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """Record the waits between attempts instead of sleeping."""
+    waits: List[float] = []
+    monkeypatch.setattr(time, "sleep", waits.append)
+    return waits
+
+
+@responses.activate
+def test_retries_transient_responses(sleeps: List[float]) -> None:
+    """5xx and 429 responses are retried with jittered backoff."""
+    responses.add(responses.POST, URL, status=503)
+    responses.add(responses.POST, URL, status=429)
+    responses.add(responses.POST, URL, status=200, json={"ok": True})
+    transport = Transport(
+        retry_policy=RetryPolicy(initial_backoff=1, rng=random.Random(1))
+    )
+
+    response = transport.post(URL, "{}", idempotent=True)
+
+    assert response.json() == {"ok": True}
+    assert len(responses.calls) == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1 and 0 <= sleeps[1] <= 2
+
+
+@responses.activate
+def test_gives_up_after_max_attempts(sleeps: List[float]) -> None:
+    """The last response is returned once max_attempts is reached."""
+    responses.add(responses.POST, URL, status=502)
+    transport = Transport(retry_policy=RetryPolicy(max_attempts=2))
+    assert transport.post(URL, "{}", idempotent=True).status_code == 502
+    assert len(responses.calls) == 2
+
+    responses.add(responses.GET, URL, status=400)
+    assert transport.get(URL).status_code == 400
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_honours_retry_after(sleeps: List[float]) -> None:
+    """Retry-After sets the minimum wait, and too long a wait is not retried."""
+    responses.add(responses.POST, URL, status=503, headers={"Retry-After": "7"})
+    responses.add(responses.POST, URL, status=200)
+    transport = Transport(retry_policy=RetryPolicy(initial_backoff=0.1))
+    assert transport.post(URL, "{}").status_code == 200
+    assert sleeps == [7.0]
+
+    responses.add(
+        responses.POST, URL, status=429, headers={"Retry-After": "3600"}
+    )
+    assert transport.post(URL, "{}").status_code == 429
+    assert sleeps == [7.0]
+
+
+@responses.activate
+def test_streamed_bodies_are_not_retried(sleeps: List[float]) -> None:
+    """A body consumed by the first attempt cannot be sent again."""
+
+    def body() -> Iterator[bytes]:
+        yield b"zip"
+
+    responses.add(responses.PUT, URL, status=503)
+    assert Transport().put(URL, body()).status_code == 503
+    assert len(responses.calls) == 1
+    assert sleeps == []
+
+
+@responses.activate
+def test_seekable_bodies_are_replayed(sleeps: List[float]) -> None:
+    """A seekable body is read again from where the first attempt started."""
+    sent: List[bytes] = []
+
+    def upload(
+        request: requests.PreparedRequest,
+    ) -> Tuple[int, Dict[str, str], str]:
+        sent.append(request.body)  # type: ignore[arg-type]
+        return (503 if len(sent) == 1 else 200), {}, ""
+
+    responses.add_callback(responses.PUT, URL, callback=upload)
+    with spool_zip_file([b"job ", b"zip"]) as body:
+        body.read(4)
+        assert Transport().put(URL, body).status_code == 200
+    assert sent == [b"zip", b"zip"]
+    assert len(sleeps) == 1
+
+
+@responses.activate
+def test_retries_connection_errors(sleeps: List[float]) -> None:
+    """Connection errors are retried and re-raised on the last attempt."""
+    responses.add(
+        responses.GET, URL, body=requests.ConnectionError("reset by peer")
+    )
+    with pytest.raises(requests.ConnectionError):
+        Transport().get(URL)
+    assert len(responses.calls) == 3
+    assert len(sleeps) == 2
+
+
+def refused() -> requests.ConnectionError:
+    """Return the error requests raises when a connection is refused."""
+    return requests.ConnectionError(
+        MaxRetryError(None, URL, NewConnectionError(None, "refused"))  # type: ignore
+    )
+
+
+@responses.activate
+def test_submissions_are_only_retried_when_not_processed(
+    sleeps: List[float],
+) -> None:
+    """POSTs the server may have processed are not sent twice by default."""
+    submit = "https://testapi.smileidentity.com/v1/id_verification"
+    for failure in (
+        {"status": 500},
+        {"body": requests.ReadTimeout()},
+        {"body": requests.ConnectionError("reset by peer")},
+        {"status": 503},
+    ):
+        responses.add(responses.POST, submit, **failure)  # type: ignore
+        try:
+            Transport().post(submit, "{}")
+        except requests.RequestException:
+            pass
+    assert len(responses.calls) == 4
+
+    responses.add(responses.POST, submit, body=refused())
+    responses.add(responses.POST, submit, status=429)
+    responses.add(responses.POST, submit, status=200)
+    assert Transport().post(submit, "{}").status_code == 200
+    assert len(responses.calls) == 7
+
+    responses.add(responses.POST, submit, status=500)
+    responses.add(responses.POST, submit, status=200)
+    transport = Transport(retry_policy=RetryPolicy(retry_non_idempotent=True))
+    assert transport.post(submit, "{}").status_code == 200
+    assert len(responses.calls) == 9
+
+
+def test_was_never_sent() -> None:
+    """Only failures to connect show a request was never sent."""
+    assert was_never_sent(refused())
+    assert was_never_sent(requests.ConnectTimeout())
+    assert not was_never_sent(requests.ConnectionError("reset by peer"))
+    assert not was_never_sent(requests.ReadTimeout())
+
+
+def test_retry_budget_stops_retry_storms() -> None:
+    """Retries stop once most requests fail and resume after successes."""
+    budget = RetryBudget(max_tokens=4, token_ratio=1)
+    assert budget.record_failure() is True
+    assert budget.record_failure() is False
+    assert budget.tokens == 2
+
+    policy = RetryPolicy(budget=budget)
+    calls: List[int] = []
+
+    class Unavailable:
+        status_code = 503
+        headers: Dict[str, str] = {}
+
+        def close(self) -> None:
+            calls.append(1)
+
+    sleeps: List[float] = []
+    assert policy.call(Unavailable, sleep=sleeps.append).status_code == 503
+    assert sleeps == []
+    assert calls == []
+    assert budget.tokens == 1
+
+    for _ in range(3):
+        budget.record_success()
+    assert budget.tokens == 4
+    assert policy.retry_delay(1, response=Unavailable()) is not None
+
+
+def test_parse_retry_after() -> None:
+    """Retry-After is read as seconds or as an HTTP date."""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < parse_retry_after(format_datetime(later, usegmt=True)) <= 30  # type: ignore
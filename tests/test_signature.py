@@ -4,12 +4,20 @@ import base64
 import hashlib
 import hmac
 import os
+import threading
 from datetime import datetime, timezone
-from typing import Tuple
+from typing import List, Tuple
+from unittest.mock import patch
 
 import pytest
 
-from smile_id_core.Signature import Signature
+from smile_id_core import IdApi, Utilities, WebApi
+from smile_id_core.Signature import (
+    Signature,
+    SignatureProvider,
+    get_signature_provider,
+)
+from smile_id_core.types import SignatureParams
 
 
 def test_no_partner_id_api_key(
@@ -65,3 +73,84 @@ def test_confirm_signature(
     assert (
         signature_fixture.confirm_signature(timestamp, fake_signature) is False
     )
+
+
+def test_signature_provider_reuses_and_refreshes(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+) -> None:
+    """Reuses a signature within its window and replaces it near expiry"""
+    api_key, partner_id, _ = setup_client
+    now = [0.0]
+    provider = SignatureProvider(
+        partner_id,
+        api_key,
+        validity=60,
+        refresh_margin=10,
+        clock=lambda: now[0],
+    )
+    first = provider.get_signature()
+    assert signature_fixture.confirm_signature(
+        first["timestamp"], first["signature"]
+    )
+
+    with patch.object(
+        provider.signer,
+        "generate_signature",
+        wraps=provider.signer.generate_signature,
+    ) as generate_signature:
+        now[0] = 49.9
+        assert provider.get_signature() == first
+        first["signature"] = "changed by the caller"
+        assert provider.get_signature()["signature"] != first["signature"]
+        assert generate_signature.call_count == 0
+
+        now[0] = 50.0
+        provider.get_signature()
+        provider.get_signature()
+        assert generate_signature.call_count == 1
+        provider.refresh()
+        assert generate_signature.call_count == 2
+
+    pytest.raises(ValueError, SignatureProvider, partner_id, api_key, 0)
+    pytest.raises(ValueError, SignatureProvider, partner_id, api_key, 10, 10)
+
+
+def test_signature_provider_is_thread_safe(
+    setup_client: Tuple[str, str, str],
+) -> None:
+    """Threads asking at the same time get the same signature"""
+    api_key, partner_id, _ = setup_client
+    provider = SignatureProvider(partner_id, api_key)
+    signatures: List[SignatureParams] = []
+    threads = [
+        threading.Thread(
+            target=lambda: signatures.append(provider.get_signature())
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(signature == signatures[0] for signature in signatures)
+
+
+def test_clients_share_signature_provider(
+    setup_client: Tuple[str, str, str],
+) -> None:
+    """Clients with the same credentials share one provider by default"""
+    api_key, partner_id, sid_server = setup_client
+    shared = get_signature_provider(partner_id, api_key)
+    id_api = IdApi(partner_id, api_key, sid_server)
+    web_api = WebApi(partner_id, "https://a_callback.com", api_key, sid_server)
+    assert id_api.signature_provider is shared
+    assert id_api.utilities.signature_provider is shared
+    assert web_api.signature_provider is shared
+    assert web_api.signature_params == shared.get_signature()
+
+    own = SignatureProvider(partner_id, api_key, validity=30, refresh_margin=5)
+    utilities = Utilities(
+        partner_id, api_key, sid_server, signature_provider=own
+    )
+    assert utilities.signature_provider is own
@@ -0,0 +1,135 @@
+"""Test class for single-flight coalescing of job status queries."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+import responses
+
+from smile_id_core import Utilities
+from smile_id_core.Signature import Signature
+from smile_id_core.singleflight import AsyncSingleFlight, SingleFlight
+from smile_id_core.types import OptionsParams
+from tests.conftest import stub_get_job_status
+
+
+def wait_for(condition: Callable[[], bool]) -> None:
+    """Wait until condition() is true."""
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_call() -> None:
+    """Callers arriving while a call is in flight get its result."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls: List[int] = []
+
+    def slow() -> Dict[str, Any]:
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"job_complete": True}
+
+    with ThreadPoolExecutor(4) as executor:
+        leader = executor.submit(flight.do, "job", slow)
+        started.wait(5)
+        followers = [executor.submit(flight.do, "job", slow) for _ in range(3)]
+        wait_for(lambda: flight.coalesced == 3)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert calls == [1]
+    assert all(result == {"job_complete": True} for result in results)
+    assert len({id(result) for result in results}) == 4
+    assert flight.do("job", lambda: {"job_complete": False}) == {
+        "job_complete": False
+    }
+
+
+def test_errors_are_raised_to_every_caller() -> None:
+    """A failed call fails every caller that waited for it."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing() -> None:
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, "job", failing)
+        started.wait(5)
+        follower = executor.submit(flight.do, "job", failing)
+        wait_for(lambda: flight.coalesced == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
+
+
+def test_async_calls_share_one_call() -> None:
+    """Coroutines asking for the same key share one call."""
+    flight = AsyncSingleFlight()
+    calls: List[int] = []
+
+    async def slow() -> Dict[str, Any]:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"job_complete": True}
+
+    async def run() -> List[Dict[str, Any]]:
+        return list(
+            await asyncio.gather(*(flight.do("job", slow) for _ in range(5)))
+        )
+
+    results = asyncio.run(run())
+    assert calls == [1]
+    assert flight.coalesced == 4
+    assert results == [{"job_complete": True}] * 5
+
+
+@responses.activate
+def test_utilities_coalesce_job_status_queries(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    option_params: OptionsParams,
+    kyc_partner_params: Dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Threads querying the same job at once send a single request."""
+    api_key, partner_id, sid_server = setup_client
+    utilities = Utilities(partner_id, api_key, sid_server)
+    signature = signature_fixture.generate_signature(datetime.now().isoformat())
+    expected = stub_get_job_status(signature, True)
+    barrier = threading.Barrier(4)
+    fetch = utilities._fetch_job_status
+
+    def slow_fetch(*args: Any) -> Dict[str, Any]:
+        wait_for(lambda: utilities.single_flight.coalesced == 3)
+        return fetch(*args)
+
+    monkeypatch.setattr(utilities, "_fetch_job_status", slow_fetch)
+
+    def query() -> Dict[str, Any]:
+        barrier.wait(5)
+        return utilities.get_job_status(
+            kyc_partner_params, option_params, signature
+        )
+
+    with ThreadPoolExecutor(4) as executor:
+        results = [
+            future.result(5)
+            for future in [executor.submit(query) for _ in range(4)]
+        ]
+
+    assert len(responses.calls) == 1
+    assert results == [expected["json"]] * 4
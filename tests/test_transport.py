@@ -0,0 +1,71 @@
+"""Test class for the pooled HTTP Transport."""
+
+from typing import Any, Dict, Tuple
+
+import pytest
+import responses
+
+from smile_id_core.IdApi import IdApi
+from smile_id_core.transport import Transport, get_default_transport
+from smile_id_core.Utilities import Utilities
+from smile_id_core.WebApi import WebApi
+
+
+def test_default_transport_is_shared(
+    setup_client: Tuple[str, str, str]
+) -> None:
+    """Clients built without a transport share the process-wide one."""
+    api_key, partner_id, sid_server = setup_client
+    utilities = Utilities(partner_id, api_key, sid_server)
+    id_api = IdApi(partner_id, api_key, sid_server)
+    assert utilities.transport is get_default_transport()
+    assert id_api.transport is utilities.transport
+    assert id_api.utilities.transport is id_api.transport
+
+
+def test_custom_transport_is_propagated(
+    setup_client: Tuple[str, str, str]
+) -> None:
+    """A transport handed to WebApi is reused by the classes it builds."""
+    api_key, partner_id, sid_server = setup_client
+    transport = Transport(pool_maxsize=4)
+    web_api = WebApi(
+        partner_id, "https://a_callback.com", api_key, sid_server, transport
+    )
+    assert web_api.transport is transport
+    assert web_api.utilities is not None
+    assert web_api.utilities.transport is transport
+
+
+def test_invalid_pool_size() -> None:
+    """Pool sizes below one are rejected."""
+    pytest.raises(ValueError, Transport, pool_maxsize=0)
+    pytest.raises(ValueError, Transport, pool_connections=0)
+
+
+def test_adapter_has_no_retries() -> None:
+    """Retries are off by default and the pool size is configurable."""
+    transport = Transport(pool_connections=2, pool_maxsize=8)
+    adapter: Any = transport.session.get_adapter("https://example.com")
+    assert adapter.max_retries.total == 0
+    assert adapter._pool_maxsize == 8
+    assert adapter._pool_connections == 2
+
+
+@responses.activate
+def test_requests_go_through_session() -> None:
+    """Static helpers send requests through the supplied transport."""
+    responses.add(responses.POST, "https://example.com/post", json={})
+    responses.add(responses.PUT, "https://example.com/put", json={})
+    transport = Transport()
+    payload: Dict[str, Any] = {"a": "b"}
+    assert (
+        Utilities.execute_post("https://example.com/post", payload, transport)
+    ).status_code == 200
+    assert (
+        WebApi.upload("https://example.com/put", b"zip", transport)
+    ).status_code == 200
+    assert responses.calls[0].request.body == '{"a": "b"}'
+    assert responses.calls[1].request.headers["Content-type"] == (
+        "application/zip"
+    )
@@ -0,0 +1,169 @@
+"""Test class for the pool of upload slots requested ahead of jobs."""
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import responses
+
+from smile_id_core import WebApi
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature, SignatureProvider
+from smile_id_core.types import ImageParams, OptionsParams, SignatureParams
+from smile_id_core.upload_slots import (
+    UploadSlot,
+    UploadSlotPool,
+    UploadSlotStats,
+)
+from tests.conftest import stub_upload_request
+
+SIGNATURE = SignatureParams(signature="signature", timestamp="timestamp")
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def job(job_id: str) -> Dict[str, Any]:
+    """Return partner params for a biometric kyc job."""
+    return {"user_id": "user", "job_id": job_id, "job_type": 1}
+
+
+def slot(smile_job_id: str) -> UploadSlot:
+    """Return a slot with a made up upload_url."""
+    return UploadSlot("https://some_url.com", smile_job_id, SIGNATURE)
+
+
+def test_slots_are_taken_once() -> None:
+    """A reserved slot is handed to its job, then forgotten."""
+    with UploadSlotPool() as pool:
+        assert pool.reserve(job("a"), False, lambda: slot("1"))
+        assert pool.reserve(job("a"), False, lambda: slot("2"))
+        assert pool.take(job("a"), False) == slot("1")
+        assert pool.take(job("a"), False) is None
+        assert pool.stats == UploadSlotStats(1, 1, 0, 0)
+
+
+def test_pool_is_bounded() -> None:
+    """No more than max_slots slots are requested at once."""
+    release = threading.Event()
+
+    def fetch() -> UploadSlot:
+        release.wait(5)
+        return slot("1")
+
+    with UploadSlotPool(max_slots=2) as pool:
+        assert pool.reserve(job("a"), False, fetch)
+        assert pool.reserve(job("b"), False, fetch)
+        assert not pool.reserve(job("c"), False, fetch)
+        release.set()
+        assert pool.take(job("a"), False) == slot("1")
+        assert pool.reserve(job("c"), False, fetch)
+
+
+def test_unusable_slots_are_wasted() -> None:
+    """Expired, failed and mismatched slots are not used."""
+    clock = FakeClock()
+
+    def fail() -> UploadSlot:
+        raise ServerError("boom")
+
+    with UploadSlotPool(ttl=10, clock=clock) as pool:
+        pool.reserve(job("a"), False, lambda: slot("1"))
+        pool.reserve(job("b"), False, fail)
+        pool.reserve(job("c"), False, lambda: slot("3"))
+        assert pool.take(job("b"), False) is None
+        assert pool.take(job("c"), True) is None
+        clock.now = 10
+        assert pool.stats == UploadSlotStats(3, 0, 3, 0)
+        assert pool.take(job("a"), False) is None
+
+    with pytest.raises(RuntimeError):
+        pool.reserve(job("a"), False, lambda: slot("1"))
+
+
+@responses.activate
+def test_prefetched_slots_expire_with_their_signature(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """A slot is dropped when its signature is due for a refresh."""
+    api_key, partner_id, sid_server = setup_client
+    clock = FakeClock()
+    provider = SignatureProvider(
+        partner_id, api_key, validity=100, refresh_margin=10, clock=clock
+    )
+    pool = UploadSlotPool(ttl=300, clock=clock)
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        signature_provider=provider,
+        upload_slots=pool,
+    )
+    stub_upload_request(signature_fixture.generate_signature())
+    provider.get_signature()
+
+    # Signed again, as the signature would be refreshed at 90.
+    clock.now = 50
+    assert web_api.prefetch_upload(web_partner_params)
+    clock.now = 139
+    prefetched = pool.take(web_partner_params, False)
+    assert prefetched is not None
+    assert prefetched.signature_params == provider.get_signature()
+
+    assert web_api.prefetch_upload(web_partner_params)
+    clock.now = 139 + 90
+    assert pool.take(web_partner_params, False) is None
+    assert pool.stats == UploadSlotStats(2, 1, 1, 0)
+    web_api.close()
+    pool.close()
+
+
+@responses.activate
+def test_submit_job_uses_prefetched_slot(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """A job whose slot was prefetched only uploads its files."""
+    api_key, partner_id, sid_server = setup_client
+    pool = UploadSlotPool()
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        upload_slots=pool,
+    )
+    stub_upload_request(signature_fixture.generate_signature())
+    option_params["return_job_status"] = False
+
+    assert web_api.prefetch_upload(web_partner_params, option_params)
+    assert pool.stats.size == 1
+    response = web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    pool.close()
+
+    assert response == {"success": True, "smile_job_id": "0000000857"}
+    assert [call.request.method for call in responses.calls] == [
+        "POST",
+        "PUT",
+    ]
+    assert pool.stats == UploadSlotStats(1, 1, 0, 0)
+    with pytest.raises(ValueError):
+        WebApi(
+            partner_id, "https://a_callback.com", api_key, sid_server
+        ).prefetch_upload(web_partner_params)
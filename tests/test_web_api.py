@@ -1,13 +1,19 @@
 """Test class for Web API"""
 
+import io
+import json
 import os
+import threading
+import zipfile
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Tuple
+from unittest.mock import patch
 
 import pytest
 import responses
 
 from smile_id_core.constants import JobType
+from smile_id_core.deadline import DeadlineExceeded
 from smile_id_core.ServerError import ServerError
 from smile_id_core.Signature import Signature
 from smile_id_core.types import ImageParams, OptionsParams, SignatureParams
@@ -546,6 +552,133 @@ def test_validate_return_data(
     assert response == job_status_response["json"]
 
 
+@responses.activate
+def test_submit_job_streams_upload(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """With stream_uploads the zip file is spooled and uploaded sized"""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        stream_uploads=True,
+    )
+    signature = get_signature(signature_fixture)
+    stub_upload_request(signature)
+    option_params["return_job_status"] = False
+
+    response = web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+
+    assert response["success"]
+    request = responses.calls[1].request
+    upload_body: Any = request.body
+    assert request.headers["Content-Length"] == str(len(upload_body))
+    assert "Transfer-Encoding" not in request.headers
+    zip_file = zipfile.ZipFile(io.BytesIO(upload_body))
+    assert zip_file.namelist() == ["info.json", "base64imgString"]
+
+
+@responses.activate
+def test_submit_job_pipelines_upload(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """With pipeline_uploads info.json is added to images zipped early"""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        pipeline_uploads=True,
+    )
+    signature = get_signature(signature_fixture)
+    stub_upload_request(signature)
+    option_params["return_job_status"] = False
+
+    response = web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+
+    assert response["success"]
+    upload_body: Any = responses.calls[1].request.body
+    zip_file = zipfile.ZipFile(io.BytesIO(upload_body))
+    assert zip_file.namelist() == ["base64imgString", "info.json"]
+    info_json = json.loads(zip_file.read("info.json"))
+    assert info_json["server_information"] == "https://some_url.com"
+
+
+@responses.activate
+def test_pipelined_packing_is_not_left_behind(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    option_params: OptionsParams,
+    image_params: List[ImageParams],
+) -> None:
+    """Zipping is waited for when the upload fails, within the deadline."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        pipeline_uploads=True,
+    )
+    option_params["return_job_status"] = False
+    packed = threading.Event()
+    release = threading.Event()
+
+    def pack(*args: Any) -> bytes:
+        release.wait(5)
+        packed.set()
+        return b""
+
+    responses.add(
+        responses.POST,
+        "https://testapi.smileidentity.com/v1/upload",
+        status=400,
+        json={"code": "2204", "error": "unauthorized"},
+    )
+    with patch("smile_id_core.WebApi.pack_image_entries", side_effect=pack):
+        release.set()
+        with pytest.raises(ServerError):
+            web_api.submit_job(
+                web_partner_params, image_params, kyc_id_info, option_params
+            )
+        assert packed.is_set()
+
+        responses.reset()
+        stub_upload_request(get_signature(signature_fixture))
+        release.clear()
+        with pytest.raises(DeadlineExceeded) as error:
+            web_api.submit_job(
+                web_partner_params,
+                image_params,
+                kyc_id_info,
+                option_params,
+                deadline=0.5,
+            )
+        release.set()
+    assert error.value.stage == "pack_image_entries"
+    assert error.value.smile_job_id == "0000000857"
+    web_api.close()
+
+
 @responses.activate
 def test_get_web_token(
     client_web: WebApi, signature_fixture: Signature
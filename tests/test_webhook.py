@@ -0,0 +1,413 @@
+"""Test class for the CallbackReceiver."""
+
+import asyncio
+import io
+import json
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import responses
+
+from smile_id_core.constants import JobType
+from smile_id_core.polling import FixedSchedule
+from smile_id_core.ServerError import ServerError
+from smile_id_core.Signature import Signature
+from smile_id_core.types import ImageParams, OptionsParams
+from smile_id_core.WebApi import WebApi
+from smile_id_core.webhook import CallbackReceiver
+from tests.conftest import stub_get_job_status, stub_upload_request
+
+
+@pytest.fixture(scope="function")
+def receiver(setup_client: Tuple[str, str, str]) -> CallbackReceiver:
+    """Create a receiver for the test partner."""
+    api_key, partner_id, _ = setup_client
+    return CallbackReceiver(partner_id, api_key)
+
+
+def callback_body(
+    signature: Signature,
+    partner_params: Dict[str, Any],
+    timestamp: str = "",
+) -> bytes:
+    """Return a signed callback body for partner_params."""
+    return json.dumps(
+        {
+            **signature.generate_signature(timestamp or None),
+            "ResultCode": "1012",
+            "PartnerParams": partner_params,
+        }
+    ).encode("utf-8")
+
+
+def test_callback_resolves_registered_job(
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """A verified callback resolves the future of its job."""
+    handled: List[Any] = []
+    future = receiver.register(web_partner_params, handled.append)
+    assert receiver.register(web_partner_params) is future
+
+    status, _ = receiver.handle(
+        callback_body(signature_fixture, web_partner_params)
+    )
+    assert status == 200
+    assert future.result(timeout=1)["ResultCode"] == "1012"
+    assert handled == [future]
+    assert receiver.pending == 0
+
+
+def test_unmatched_callback_goes_to_default_handler(
+    setup_client: Tuple[str, str, str],
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """Verified callbacks for unknown jobs are passed to default_handler."""
+    api_key, partner_id, _ = setup_client
+    unmatched: List[Dict[str, Any]] = []
+    receiver = CallbackReceiver(
+        partner_id, api_key, default_handler=unmatched.append
+    )
+    status, _ = receiver.handle(
+        callback_body(signature_fixture, web_partner_params)
+    )
+    assert status == 200
+    assert unmatched[0]["PartnerParams"] == web_partner_params
+
+
+def test_rejects_bad_callbacks(
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """Malformed, unsigned, forged and stale callbacks are rejected."""
+    future = receiver.register(web_partner_params)
+    assert receiver.handle(b"not json")[0] == 400
+    assert receiver.handle(b"{}")[0] == 401
+
+    forged = json.loads(callback_body(signature_fixture, web_partner_params))
+    forged["signature"] = Signature("002", "other-key").generate_signature(
+        forged["timestamp"]
+    )["signature"]
+    assert receiver.handle(json.dumps(forged).encode("utf-8"))[0] == 401
+
+    stale = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    status, response = receiver.handle(
+        callback_body(signature_fixture, web_partner_params, stale)
+    )
+    assert (status, response) == (
+        401,
+        {"error": "Callback timestamp is too old"},
+    )
+    assert not future.done()
+
+
+def test_wsgi_app(
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """The WSGI app reads the body and answers with JSON."""
+    future = receiver.register(web_partner_params)
+    body = callback_body(signature_fixture, web_partner_params)
+    started: List[Any] = []
+    result = receiver.wsgi_app(
+        {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        },
+        lambda status, headers: started.append(status),
+    )
+    assert started == ["200 OK"]
+    assert json.loads(b"".join(result)) == {"success": True}
+    assert future.done()
+
+    receiver.wsgi_app(
+        {"REQUEST_METHOD": "GET"},
+        lambda status, headers: started.append(status),
+    )
+    assert started[-1] == "405 Method Not Allowed"
+
+
+def test_asgi_app(
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """The ASGI app reads a chunked body and answers with JSON."""
+    future = receiver.register(web_partner_params)
+    body = callback_body(signature_fixture, web_partner_params)
+    messages = [
+        {"type": "http.request", "body": body[:10], "more_body": True},
+        {"type": "http.request", "body": body[10:], "more_body": False},
+    ]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return messages.pop(0)
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(
+        receiver.asgi_app({"type": "http", "method": "POST"}, receive, send)
+    )
+    assert sent[0]["status"] == 200
+    assert json.loads(sent[1]["body"]) == {"success": True}
+    assert future.done()
+
+
+def test_standalone_server(
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """The http.server based receiver resolves jobs end to end."""
+    future = receiver.register(web_partner_params)
+    server = receiver.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_address[1]}/callback",
+            data=callback_body(signature_fixture, web_partner_params),
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert future.result(timeout=1)["PartnerParams"] == web_partner_params
+
+
+@responses.activate
+def test_web_api_registers_and_unregisters_jobs(
+    setup_client: Tuple[str, str, str],
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """Submitted jobs are registered and dropped again if the upload fails."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        callback_receiver=receiver,
+    )
+    responses.add(
+        responses.POST,
+        "https://testapi.smileidentity.com/v1/upload",
+        status=400,
+        json={"code": "2204", "error": "unauthorized"},
+    )
+    with pytest.raises(ServerError):
+        web_api.submit_job(
+            web_partner_params, image_params, kyc_id_info, option_params
+        )
+    assert receiver.pending == 0
+
+    stub_upload_request(signature_fixture.generate_signature())
+    option_params["return_job_status"] = False
+    web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert receiver.pending == 1
+    assert not receiver.register(web_partner_params).done()
+
+
+def test_jobs_without_callback_expire(
+    setup_client: Tuple[str, str, str],
+    web_partner_params: Dict[str, Any],
+) -> None:
+    """Registrations are dropped once pending_ttl passes."""
+    api_key, partner_id, _ = setup_client
+    now = [0.0]
+    receiver = CallbackReceiver(
+        partner_id, api_key, pending_ttl=10, clock=lambda: now[0]
+    )
+    future = receiver.register(web_partner_params)
+    now[0] = 5
+    receiver.register({"user_id": "user", "job_id": "other"})
+    assert receiver.pending == 2
+
+    now[0] = 10
+    assert receiver.pending == 1
+    assert future.cancelled()
+    now[0] = 15
+    assert receiver.pending == 0
+
+
+@responses.activate
+def test_callback_cuts_polling_short(
+    setup_client: Tuple[str, str, str],
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    option_params: OptionsParams,
+) -> None:
+    """A job is queried once its callback arrives and is then unregistered."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 3)},
+        callback_receiver=receiver,
+    )
+    stub_get_job_status(signature_fixture.generate_signature(), True)
+    timer = threading.Timer(
+        0.05,
+        receiver.handle,
+        [callback_body(signature_fixture, web_partner_params)],
+    )
+
+    started = time.monotonic()
+    timer.start()
+    job_status = web_api.poll_job_status(
+        0,
+        web_partner_params,
+        option_params,
+        None,
+        callback=receiver.register(web_partner_params),
+    )
+    assert time.monotonic() - started < 30
+    assert job_status["job_complete"] is True
+    assert len(responses.calls) == 1
+    assert receiver.pending == 0
+
+
+@responses.activate
+def test_callback_before_polling_is_kept(
+    setup_client: Tuple[str, str, str],
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """A callback arriving before the first poll makes it immediate."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 3)},
+        callback_receiver=receiver,
+    )
+    signature = signature_fixture.generate_signature()
+    upload_url = stub_upload_request(signature)["upload_url"]
+    stub_get_job_status(signature, True)
+
+    def upload(request: Any) -> Tuple[int, Dict[str, str], str]:
+        # SmileID answers fast jobs before the upload request returns.
+        receiver.handle(callback_body(signature_fixture, web_partner_params))
+        return 200, {}, "{}"
+
+    responses.remove(responses.PUT, upload_url)
+    responses.add_callback(responses.PUT, upload_url, callback=upload)
+
+    started = time.monotonic()
+    job_status = web_api.submit_job(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert time.monotonic() - started < 30
+    assert job_status["job_complete"] is True
+    assert receiver.pending == 0
+
+
+@responses.activate
+def test_callback_wakes_background_polling(
+    setup_client: Tuple[str, str, str],
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """submit_job_async polls a job whose callback arrived at once."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 3)},
+        callback_receiver=receiver,
+    )
+    signature = signature_fixture.generate_signature()
+    stub_upload_request(signature)
+    expected = stub_get_job_status(signature, True)
+
+    handle = web_api.submit_job_async(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert not handle.done()
+    receiver.handle(callback_body(signature_fixture, web_partner_params))
+    assert handle.result(timeout=30) == expected["json"]
+    assert web_api.poller is not None
+    web_api.poller.close()
+    assert receiver.pending == 0
+
+
+@responses.activate
+def test_background_polling_keeps_early_callbacks(
+    setup_client: Tuple[str, str, str],
+    receiver: CallbackReceiver,
+    signature_fixture: Signature,
+    web_partner_params: Dict[str, Any],
+    kyc_id_info: Dict[str, str],
+    image_params: List[ImageParams],
+    option_params: OptionsParams,
+) -> None:
+    """A callback during the upload wakes the poller; done handles unregister."""
+    api_key, partner_id, sid_server = setup_client
+    web_api = WebApi(
+        partner_id,
+        "https://a_callback.com",
+        api_key,
+        sid_server,
+        poll_schedules={JobType.BIOMETRIC_KYC: FixedSchedule(60, 3)},
+        callback_receiver=receiver,
+    )
+    signature = signature_fixture.generate_signature()
+    upload_url = stub_upload_request(signature)["upload_url"]
+    expected = stub_get_job_status(signature, True)
+
+    def upload(request: Any) -> Tuple[int, Dict[str, str], str]:
+        receiver.handle(callback_body(signature_fixture, web_partner_params))
+        return 200, {}, "{}"
+
+    responses.remove(responses.PUT, upload_url)
+    responses.add_callback(responses.PUT, upload_url, callback=upload)
+    handle = web_api.submit_job_async(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert handle.result(timeout=30) == expected["json"]
+
+    responses.remove(responses.PUT, upload_url)
+    responses.add(responses.PUT, upload_url, json={})
+    handle = web_api.submit_job_async(
+        web_partner_params, image_params, kyc_id_info, option_params
+    )
+    assert receiver.pending == 1
+    assert handle.cancel()
+    assert receiver.pending == 0
+    assert web_api.poller is not None
+    web_api.poller.close()